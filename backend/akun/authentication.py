@@ -0,0 +1,142 @@
+# akun/authentication.py
+
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import Profile
+
+DEFAULT_AUTH_TOKEN = {
+    # request.user dibangun dari klaim token, tanpa SELECT auth_user per request
+    'tanpa_query': True,
+    # Lama status user (aktif, staff, role, password) disimpan di memori proses (detik).
+    # Perubahan lewat proses ini langsung berlaku; worker lain paling lambat setelah ttl.
+    'ttl_status': 30,
+}
+
+
+def konfigurasi():
+    return {**DEFAULT_AUTH_TOKEN, **getattr(settings, 'AUTH_TOKEN', {})}
+
+
+# --- Cache status user per proses ---
+
+_status = {}
+_lock = threading.Lock()
+
+
+def status_user(user_id):
+    """
+    Status user yang menentukan token masih berlaku: {'id', 'is_active',
+    'is_staff', 'is_superuser', 'role', 'hash_password'}, atau None jika user
+    sudah dihapus. Diambil dengan satu query (JOIN profile) lalu disimpan
+    selama `ttl_status`.
+    """
+    # Klaim user_id di token berupa string, pk dari kode lain berupa int
+    kunci = str(user_id)
+    sekarang = time.monotonic()
+    with _lock:
+        simpanan = _status.get(kunci)
+    if simpanan is not None and simpanan[0] > sekarang:
+        return simpanan[1]
+
+    baris = (
+        User.objects.filter(pk=user_id)
+        .values('id', 'is_active', 'is_staff', 'is_superuser', 'password', 'profile__role')
+        .first()
+    )
+    status = None
+    if baris is not None:
+        status = {
+            'id': baris['id'],
+            'is_active': baris['is_active'],
+            'is_staff': baris['is_staff'],
+            'is_superuser': baris['is_superuser'],
+            'role': baris['profile__role'],
+            'hash_password': get_md5_hash_password(baris['password']),
+        }
+    with _lock:
+        _status[kunci] = (sekarang + konfigurasi()['ttl_status'], status)
+    return status
+
+
+def lupakan_status(user_id=None):
+    """Buang status user (atau semua user) dari cache; dipanggil saat user/profile berubah."""
+    with _lock:
+        if user_id is None:
+            _status.clear()
+        else:
+            _status.pop(str(user_id), None)
+
+
+# --- User dari token ---
+
+class UserToken(TokenUser):
+    """
+    request.user yang dibangun dari klaim token (username, full_name, email)
+    dan status user di cache. Baris User dan Profile hanya dimuat bila
+    benar-benar dipakai (`user_db`, `profile`).
+    """
+
+    def __init__(self, token, status):
+        super().__init__(token)
+        self.id = self.pk = status['id']
+        self.is_active = status['is_active']
+        self.is_staff = status['is_staff']
+        self.is_superuser = status['is_superuser']
+        self.role = status['role']
+
+    def get_full_name(self):
+        return self.token.get('full_name', '')
+
+    @cached_property
+    def user_db(self):
+        return User.objects.get(pk=self.pk)
+
+    @cached_property
+    def profile(self):
+        # User ikut di-JOIN karena serializer profile selalu membaca profile.user
+        return Profile.objects.select_related('user').get(user_id=self.pk)
+
+
+def user_database(user):
+    """Instance User asli di balik request.user (dimuat dari database bila perlu)."""
+    return user.user_db if isinstance(user, UserToken) else user
+
+
+class JWTClaimAuthentication(JWTAuthentication):
+    """
+    Seperti JWTAuthentication, tetapi tanpa query User per request: user
+    dibangun dari klaim token dan status user di cache proses. Token yang
+    dibuat sebelum password diganti (klaim hash_password berbeda) ditolak.
+    Token lama tanpa klaim tersebut tetap diperiksa ke database.
+    """
+
+    def get_user(self, validated_token):
+        klaim_password = api_settings.REVOKE_TOKEN_CLAIM
+        if not konfigurasi()['tanpa_query'] or klaim_password not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken('Token contained no recognizable user identification') from e
+
+        status = status_user(user_id)
+        if status is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not status['is_active']:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if validated_token[klaim_password] != status['hash_password']:
+            raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+        return UserToken(validated_token, status)
+
@@ -2,6 +2,7 @@
 
 from django.db import models
 from django.contrib.auth.models import User
+from pengelolaSiswa.gambar import url_varian
 
 class Profile(models.Model):
     # Definisikan pilihan untuk peran/status
@@ -18,6 +19,13 @@ class Profile(models.Model):
     def __str__(self):
         return f'{self.user.username} Profile'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Foto saat dimuat, untuk menghapus varian foto lama (pengelolaSiswa/gambar.py)
+        instance._foto_awal = instance.__dict__.get('foto_profil')
+        return instance
+
     @property
     def nama_lengkap(self):
         return self.user.get_full_name()
@@ -28,4 +36,10 @@ class Profile(models.Model):
             url = self.foto_profil.url
         except (ValueError, AttributeError):
             url = ''
-        return url
\ No newline at end of file
+        return url
+
+    @property
+    def foto_profil_thumb_url(self):
+        """URL thumbnail WebP (lihat pengelolaSiswa/gambar.py); kosong jika tidak ada foto."""
+        varian = url_varian(self.foto_profil.name) if self.foto_profil else None
+        return varian['thumb']['webp'] if varian else ''
\ No newline at end of file
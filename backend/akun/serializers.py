@@ -4,6 +4,9 @@ from django.contrib.auth.models import User
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from pengelolaSiswa.gambar import VarianGambarField
 from .models import Profile
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -23,19 +26,18 @@ class RegisterSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         role_data = validated_data.pop('role', 'ADMIN')
 
-        user = User.objects.create(
+        user = User(
             username=validated_data['username'],
             email=validated_data['email'],
             first_name=validated_data.get('first_name', ''),
             last_name=validated_data.get('last_name', '')
         )
+        # Password di-hash sebelum INSERT, dan role diteruskan ke signal
+        # create_user_profile, jadi cukup satu INSERT user dan satu INSERT profile
         user.set_password(validated_data['password'])
+        user._profile_awal = {'role': role_data}
         user.save()
 
-        # Simpan role ke profil user yang baru dibuat (setelah user.save())
-        user.profile.role = role_data
-        user.profile.save()
-
         return user
 
 
@@ -48,15 +50,18 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['username'] = user.username
         token['full_name'] = user.get_full_name()
         token['email'] = user.email
-        
-        if hasattr(user, 'profile'):
-            token['profile_picture_url'] = user.profile.foto_profil_url
-            token['role'] = user.profile.role
-        else:
+        # Sidik jari password: token otomatis ditolak setelah password diganti
+        # (lihat akun/authentication.py), tanpa mengambil User di setiap request
+        token[api_settings.REVOKE_TOKEN_CLAIM] = get_md5_hash_password(user.password)
+
+        try:
+            profile = user.profile
+        except Profile.DoesNotExist:
             # Fallback jika profile belum ada (misal untuk user lama)
             profile = Profile.objects.create(user=user)
-            token['profile_picture_url'] = profile.foto_profil_url
-            token['role'] = profile.role
+        token['profile_picture_url'] = profile.foto_profil_url
+        token['profile_picture_thumb_url'] = profile.foto_profil_thumb_url
+        token['role'] = profile.role
 
         return token
     
@@ -67,17 +72,20 @@ class UpdateUserSerializer(serializers.ModelSerializer):
 
 class UpdateProfileSerializer(serializers.ModelSerializer):
     user = UpdateUserSerializer()
+    foto_profil_varian = VarianGambarField(source='foto_profil')
 
     class Meta:
         model = Profile
-        fields = ('user', 'foto_profil')
+        fields = ('user', 'foto_profil', 'foto_profil_varian')
 
     def update(self, instance, validated_data):
+        # Data user sudah divalidasi oleh field `user`; simpan hanya kolom yang berubah
         user_data = validated_data.pop('user', {})
-        user_serializer = UpdateUserSerializer(instance.user, data=user_data, partial=True)
-        if user_serializer.is_valid(raise_exception=True):
-            user_serializer.save()
-        
+        if user_data:
+            for attr, value in user_data.items():
+                setattr(instance.user, attr, value)
+            instance.user.save(update_fields=list(user_data))
+
         # Update profile, termasuk foto profil
         return super().update(instance, validated_data)
 
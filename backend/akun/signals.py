@@ -1,20 +1,48 @@
 # akun/signals.py
 
-from django.db.models.signals import post_save
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.models import User
 from django.dispatch import receiver
+from pengelolaSiswa import gambar
+from .authentication import lupakan_status
 from .models import Profile
 
 @receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        Profile.objects.create(user=instance)
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        # Data awal profile (mis. role dari RegisterSerializer) ikut di INSERT yang sama
+        Profile.objects.create(user=instance, **getattr(instance, '_profile_awal', {}))
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    # Coba simpan profile, tangani jika belum ada
+def save_user_profile(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Profile disimpan oleh pemiliknya sendiri (UpdateProfileSerializer); di sini
+    # hanya memastikan user lama punya profile, tanpa UPDATE profile setiap user
+    # disimpan. Penyimpanan sebagian (password, last_login) tidak perlu dicek.
+    if created or raw or update_fields is not None:
+        return
     try:
-        instance.profile.save()
+        instance.profile
     except Profile.DoesNotExist:
-        # Jika user lama belum punya profile, buatkan
-        Profile.objects.create(user=instance)
\ No newline at end of file
+        Profile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Profile)
+def buat_varian_foto(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Thumbnail untuk avatar di navbar/JWT dibuat di latar belakang
+    if raw or (update_fields is not None and 'foto_profil' not in update_fields):
+        return
+    gambar.perbarui_varian(instance)
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=Profile)
+def lupakan_status_token(sender, instance, **kwargs):
+    # Password, is_active/is_staff atau role berubah: status token di cache proses
+    # dibuang sekarang dan sekali lagi setelah commit, agar request lain yang
+    # sempat membaca data lama sebelum commit tidak menyimpannya sampai ttl habis
+    user_id = instance.pk if sender is User else instance.user_id
+    lupakan_status(user_id)
+    transaction.on_commit(partial(lupakan_status, user_id))
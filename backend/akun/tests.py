@@ -1,3 +1,131 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 
-# Create your tests here.
+from pengelolaSiswa.query_budget import QueryBudgetMixin
+
+from .authentication import UserToken, lupakan_status, status_user
+from .models import Profile
+from .serializers import MyTokenObtainPairSerializer
+
+
+def kredensial(user):
+    """
+    Header Authorization dengan token hasil login. Status user langsung
+    di-cache seperti setelah request pertama, sehingga budget query
+    mencerminkan request biasa (tanpa query User).
+    """
+    lupakan_status()
+    status_user(user.pk)
+    return {'HTTP_AUTHORIZATION': f'Bearer {MyTokenObtainPairSerializer.get_token(user).access_token}'}
+
+# Jumlah query maksimal per route (lihat pengelolaSiswa/query_budget.py)
+BUDGET_QUERY = {
+    # user + profile (klaim role/foto)
+    'token_obtain_pair': 2,
+    # cek user masih aktif
+    'token_refresh': 1,
+    # cek username unik, INSERT user (password sudah di-hash), INSERT profile (dengan role)
+    'auth_register': 3,
+    # profile (JOIN user) + UPDATE user + UPDATE profile
+    'profile_update': 3,
+    # user (untuk cek password lama) + UPDATE user
+    'change_password': 2,
+}
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AkunQueryBudgetTests(QueryBudgetMixin, TestCase):
+    budget_query = BUDGET_QUERY
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', password='rahasia123', first_name='Admin', email='admin@sekolah.id',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.refresh = RefreshToken.for_user(self.admin)
+        self.client.credentials(**kredensial(self.admin))
+
+    def test_token(self):
+        self.client.credentials()
+        response = self.assertBudgetQuery(
+            'token_obtain_pair', 'post', '/api/token/', {'username': 'admin', 'password': 'rahasia123'},
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_token_refresh(self):
+        self.client.credentials()
+        response = self.assertBudgetQuery('token_refresh', 'post', '/api/token/refresh/', {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, 200)
+
+    def test_register(self):
+        self.client.credentials()
+        response = self.assertBudgetQuery('auth_register', 'post', '/api/auth/register/', {
+            'username': 'bendahara', 'password': 'Rahasia!2345', 'password2': 'Rahasia!2345',
+            'email': 'bendahara@sekolah.id', 'role': 'BENDAHARA',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        user = User.objects.get(username='bendahara')
+        self.assertTrue(user.check_password('Rahasia!2345'))
+        self.assertEqual(user.profile.role, 'BENDAHARA')
+
+    def test_profile_update(self):
+        response = self.assertBudgetQuery(
+            'profile_update', 'patch', '/api/auth/profile/update/', {'user': {'first_name': 'Kepala'}}, format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(User.objects.get(pk=self.admin.pk).first_name, 'Kepala')
+
+    def test_change_password(self):
+        response = self.assertBudgetQuery('change_password', 'put', '/api/auth/change-password/', {
+            'old_password': 'rahasia123', 'new_password': 'Baru!23456', 'new_password2': 'Baru!23456',
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertTrue(User.objects.get(pk=self.admin.pk).check_password('Baru!23456'))
+
+    def test_simpan_user_tidak_menyimpan_ulang_profile(self):
+        user = User.objects.get(pk=self.admin.pk)
+        user.first_name = 'Ganti'
+        with self.assertNumQueries(2):
+            # UPDATE user + cek profile ada (tanpa UPDATE profile)
+            user.save()
+        self.assertTrue(Profile.objects.filter(user=self.admin).exists())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class JWTClaimAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(**kredensial(self.admin))
+
+    def test_user_dari_token_tanpa_query(self):
+        response = self.client.get('/api/notifikasi/unread_count/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.wsgi_request.user, UserToken)
+        self.assertEqual(response.wsgi_request.user.pk, self.admin.pk)
+
+    def test_token_ditolak_setelah_ganti_password(self):
+        response = self.client.put('/api/auth/change-password/', {
+            'old_password': 'rahasia123', 'new_password': 'Baru!23456', 'new_password2': 'Baru!23456',
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.client.get('/api/notifikasi/unread_count/').status_code, 401)
+
+    def test_user_nonaktif_ditolak(self):
+        self.admin.is_active = False
+        self.admin.save()
+        self.assertEqual(self.client.get('/api/notifikasi/unread_count/').status_code, 401)
+
+    def test_token_lama_tanpa_klaim_password(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+        response = self.client.get('/api/notifikasi/unread_count/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.wsgi_request.user, User)
@@ -6,6 +6,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from django.contrib.auth.models import User
 from rest_framework_simplejwt.views import TokenObtainPairView
+from .authentication import user_database
 from .serializers import (
     RegisterSerializer, MyTokenObtainPairSerializer, 
     UpdateProfileSerializer, ChangePasswordSerializer
@@ -36,7 +37,7 @@ class ChangePasswordView(generics.UpdateAPIView):
     permission_classes = (IsAuthenticated,)
     
     def update(self, request, *args, **kwargs):
-        user = self.request.user
+        user = user_database(self.request.user)
         serializer = ChangePasswordSerializer(data=request.data)
 
         if serializer.is_valid():
@@ -46,7 +47,7 @@ class ChangePasswordView(generics.UpdateAPIView):
             
             # Set password baru
             user.set_password(serializer.data.get("new_password"))
-            user.save()
+            user.save(update_fields=['password'])
             return Response({"status": "password set"}, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
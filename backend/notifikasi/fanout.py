@@ -0,0 +1,148 @@
+# notifikasi/fanout.py
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
+
+from pengelolaSiswa.worker import worker
+from .models import Notifikasi
+from . import unread
+from .pubsub import publish_notifikasi
+
+logger = logging.getLogger(__name__)
+
+KUNCI_ADMIN = 'notifikasi:admin_ids'
+ADMIN_CACHE_TIMEOUT = getattr(settings, 'NOTIFIKASI_ADMIN_CACHE_TIMEOUT', 300)
+
+KATEGORI_PENDAFTAR_BARU = 'pendaftar_baru'
+DEFAULT_DIGEST = {
+    'aktif': True,
+    # Pendaftaran dalam jendela ini digabung ke notifikasi digest yang sama
+    'jendela_menit': 10,
+    'tautan_pendaftar_baru': '/siswa?status=BARU',
+}
+
+
+def konfigurasi_digest():
+    return {**DEFAULT_DIGEST, **getattr(settings, 'NOTIFIKASI_DIGEST', {})}
+
+
+def admin_ids():
+    """
+    Daftar id penerima notifikasi admin (is_staff), disimpan di cache.
+    Diinvalidasi oleh signal User di notifikasi/signals.py.
+    """
+    ids = cache.get(KUNCI_ADMIN)
+    if ids is None:
+        ids = list(User.objects.filter(is_staff=True).values_list('pk', flat=True))
+        cache.set(KUNCI_ADMIN, ids, ADMIN_CACHE_TIMEOUT)
+    return ids
+
+
+def invalidasi_admin_ids():
+    cache.delete(KUNCI_ADMIN)
+
+
+def tulis_notifikasi_admin(title, content):
+    """Tulis satu notifikasi untuk setiap admin dengan satu bulk_create."""
+    objs = Notifikasi.objects.bulk_create([
+        Notifikasi(user_id=user_id, title=title, content=content) for user_id in admin_ids()
+    ])
+    unread.tambah(obj.user_id for obj in objs)
+    publish_notifikasi(objs)
+    logger.info("Notifikasi dibuat untuk %d admin.", len(objs))
+    return objs
+
+
+def tulis_digest_admin(kategori, title, content, template_digest, tautan=''):
+    """
+    Gabungkan notifikasi sejenis yang datang beruntun. Admin yang masih punya
+    notifikasi `kategori` belum dibaca yang jendelanya (`jendela_mulai` +
+    jendela_menit) belum lewat cukup diperbarui dengan satu UPDATE (jumlah + 1,
+    isi ditulis ulang); hanya admin lain yang mendapat baris baru. Jendela
+    tidak bergeser dan timestamp tidak diubah, jadi urutan daftar notifikasi
+    dan batas retensi tetap stabil selama pendaftaran terus berdatangan.
+    `template_digest` berisi '{jumlah}', mis. "{jumlah} pendaftar baru dalam
+    10 menit".
+
+    Dua digest yang ditulis bersamaan tidak boleh sama-sama membuat baris baru
+    untuk admin yang sama: baris User admin dikunci (SELECT ... FOR UPDATE)
+    sampai transaksi selesai. SQLite tidak punya FOR UPDATE; di sana UPDATE
+    dijalankan sebelum membaca digest sehingga kunci tulis database sudah
+    dipegang (transaksi lain menunggu sampai commit).
+    """
+    ids = admin_ids()
+    sekarang = timezone.now()
+    batas = sekarang - timedelta(minutes=konfigurasi_digest()['jendela_menit'])
+    sebelum, _, sesudah = template_digest.partition('{jumlah}')
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update:
+            list(User.objects.select_for_update().filter(pk__in=ids).order_by('pk').values_list('pk', flat=True))
+        digest = Notifikasi.objects.filter(
+            user_id__in=ids, kategori=kategori, is_read=False, jendela_mulai__gt=batas,
+        )
+        digest.update(
+            jumlah=F('jumlah') + 1,
+            content=Concat(
+                Value(sebelum), Cast(F('jumlah') + 1, CharField()), Value(sesudah),
+                output_field=CharField(),
+            ),
+        )
+        diperbarui = set(digest.values_list('user_id', flat=True))
+        objs = Notifikasi.objects.bulk_create([
+            Notifikasi(
+                user_id=user_id, title=title, content=content, kategori=kategori, tautan=tautan,
+                jendela_mulai=sekarang,
+            )
+            for user_id in ids if user_id not in diperbarui
+        ])
+
+    unread.tambah(obj.user_id for obj in objs)
+    publish_notifikasi(objs)
+    logger.info("Digest %s: %d diperbarui, %d dibuat.", kategori, len(diperbarui), len(objs))
+    if diperbarui:
+        publish_notifikasi(list(digest.filter(user_id__in=diperbarui)), diperbarui=True)
+    return objs
+
+
+def kirim_pendaftar_baru(nama_lengkap):
+    """Notifikasi pendaftar baru untuk admin, digabung menjadi digest jika aktif."""
+    title = "Pendaftar Baru!"
+    content = f"Siswa baru bernama {nama_lengkap} telah mendaftar."
+    cfg = konfigurasi_digest()
+    if not cfg['aktif']:
+        kirim_ke_admin(title, content)
+        return
+
+    template = f"{{jumlah}} pendaftar baru dalam {cfg['jendela_menit']} menit."
+    _jadwalkan(
+        tulis_digest_admin, KATEGORI_PENDAFTAR_BARU, title, content, template,
+        tautan=cfg['tautan_pendaftar_baru'],
+    )
+
+
+def _jadwalkan(fungsi, *args, **kwargs):
+    def jalankan():
+        if getattr(settings, 'NOTIFIKASI_FANOUT_ASYNC', False):
+            worker.submit(fungsi, *args, **kwargs)
+        else:
+            fungsi(*args, **kwargs)
+
+    transaction.on_commit(jalankan)
+
+
+def kirim_ke_admin(title, content):
+    """
+    Jadwalkan notifikasi untuk semua admin setelah transaksi berjalan di-commit.
+    Jika NOTIFIKASI_FANOUT_ASYNC aktif, penulisan diserahkan ke worker di dalam
+    proses sehingga request (mis. pendaftaran publik) tidak ikut menunggu.
+    """
+    _jadwalkan(tulis_notifikasi_admin, title, content)
@@ -0,0 +1,32 @@
+# notifikasi/management/commands/bersihkan_notifikasi.py
+
+from django.core.management.base import BaseCommand
+
+from notifikasi.retensi import bersihkan
+
+
+class Command(BaseCommand):
+    help = 'Hapus notifikasi lama yang sudah dibaca dan arsipkan sisanya (setting NOTIFIKASI_RETENSI)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hapus-dibaca-hari', type=int, help='Hapus notifikasi terbaca yang lebih tua dari N hari')
+        parser.add_argument('--arsip-hari', type=int, help='Arsipkan notifikasi yang lebih tua dari N hari')
+        parser.add_argument('--batch-size', type=int, help='Jumlah baris per transaksi')
+        parser.add_argument('--jeda', type=float, help='Jeda antar batch dalam detik')
+        parser.add_argument('--dry-run', action='store_true', help='Hanya hitung baris yang akan diproses')
+
+    def handle(self, *args, **options):
+        laporan = bersihkan(
+            dry_run=options['dry_run'],
+            hapus_dibaca_setelah_hari=options['hapus_dibaca_hari'],
+            arsip_setelah_hari=options['arsip_hari'],
+            batch_size=options['batch_size'],
+            jeda=options['jeda'],
+        )
+        self.stdout.write(f"  Dihapus    : {laporan['dihapus']} notifikasi")
+        self.stdout.write(f"  Diarsipkan : {laporan['diarsipkan']} notifikasi")
+        self.stdout.write(f"  Waktu      : {laporan['durasi_detik']} detik")
+        if laporan['dry_run']:
+            self.stdout.write(self.style.WARNING("Dry run: tidak ada data yang diubah."))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Retensi notifikasi selesai."))
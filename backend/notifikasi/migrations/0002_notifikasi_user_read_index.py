@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifikasi', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notifikasi',
+            index=models.Index(fields=['user', 'is_read', '-timestamp'], name='notif_user_read_ts_idx'),
+        ),
+    ]
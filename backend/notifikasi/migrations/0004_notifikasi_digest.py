@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifikasi', '0003_notifikasi_retensi'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notifikasi',
+            name='jumlah',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notifikasi',
+            name='kategori',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='notifikasi',
+            name='tautan',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
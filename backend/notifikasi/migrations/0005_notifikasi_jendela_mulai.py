@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+def isi_jendela_mulai(apps, schema_editor):
+    # Digest lama: anggap jendelanya dimulai pada timestamp terakhirnya
+    Notifikasi = apps.get_model('notifikasi', 'Notifikasi')
+    Notifikasi.objects.exclude(kategori='').update(jendela_mulai=models.F('timestamp'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifikasi', '0004_notifikasi_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notifikasi',
+            name='jendela_mulai',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(isi_jendela_mulai, migrations.RunPython.noop),
+    ]
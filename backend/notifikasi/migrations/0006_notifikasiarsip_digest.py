@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifikasi', '0005_notifikasi_jendela_mulai'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notifikasiarsip',
+            name='jumlah',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notifikasiarsip',
+            name='kategori',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='notifikasiarsip',
+            name='tautan',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -13,6 +13,14 @@ class Notifikasi(models.Model):
     
     # Status notifikasi
     is_read = models.BooleanField(default=False)
+
+    # Notifikasi digest (mis. pendaftar baru) digabung menjadi satu baris yang
+    # diperbarui selama jendela waktu masih berjalan; lihat notifikasi/fanout.py
+    kategori = models.CharField(max_length=50, blank=True, default='')
+    jumlah = models.PositiveIntegerField(default=1)
+    tautan = models.CharField(max_length=255, blank=True, default='')
+    # Awal jendela digest; tetap walaupun digest terus diperbarui
+    jendela_mulai = models.DateTimeField(null=True, blank=True)
     
     # Timestamp
     timestamp = models.DateTimeField(auto_now_add=True)
@@ -22,4 +30,33 @@ class Notifikasi(models.Model):
 
     class Meta:
         # Urutkan dari yang paling baru
-        ordering = ['-timestamp']
\ No newline at end of file
+        ordering = ['-timestamp']
+        indexes = [
+            # Daftar notifikasi per user dan hitungan yang belum dibaca
+            models.Index(fields=['user', 'is_read', '-timestamp'], name='notif_user_read_ts_idx'),
+            # Job retensi memilih notifikasi lama tanpa melihat user
+            models.Index(fields=['timestamp'], name='notif_timestamp_idx'),
+        ]
+
+
+class NotifikasiArsip(models.Model):
+    """
+    Notifikasi lama yang dipindahkan dari tabel Notifikasi oleh job retensi
+    (notifikasi/retensi.py). Tabel ini hanya ditulis secara batch dan jarang
+    dibaca, sehingga tidak ikut memperlambat daftar notifikasi aktif.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    title = models.CharField(max_length=255)
+    content = models.TextField()
+    is_read = models.BooleanField(default=False)
+    kategori = models.CharField(max_length=50, blank=True, default='')
+    jumlah = models.PositiveIntegerField(default=1)
+    tautan = models.CharField(max_length=255, blank=True, default='')
+    timestamp = models.DateTimeField()
+    diarsipkan_pada = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Arsip notifikasi untuk user {self.user_id}: {self.title}"
+
+    class Meta:
+        ordering = ['-timestamp']
@@ -0,0 +1,111 @@
+# notifikasi/pubsub.py
+
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Jumlah event yang boleh menumpuk per koneksi sebelum koneksi diputus;
+# client akan reconnect dan mengejar ketertinggalan lewat Last-Event-ID.
+QUEUE_MAXSIZE = 100
+
+
+class Subscription:
+    def __init__(self, user_id, loop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=QUEUE_MAXSIZE)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Client terlalu lambat: kosongkan antrian dan minta koneksi ditutup
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class InProcessBroker:
+    """
+    Pub/sub di dalam satu proses. Publisher bisa berjalan di thread mana saja
+    (view sync, worker), sedangkan subscriber adalah koneksi SSE async di event
+    loop ASGI. Event hanya sampai ke koneksi di proses yang sama, jadi jalankan
+    satu worker ASGI untuk endpoint stream, atau ganti broker ini lewat
+    setting NOTIFIKASI_PUBSUB_BROKER.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, event)
+            except RuntimeError:
+                # Event loop sudah ditutup; koneksi ini sudah mati
+                self.unsubscribe(subscription)
+
+    def jumlah_koneksi(self):
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'NOTIFIKASI_PUBSUB_BROKER', 'notifikasi.pubsub.InProcessBroker')
+                _broker = import_string(path)()
+    return _broker
+
+
+def set_broker(broker):
+    """Ganti broker aktif (mis. stand-in lokal di test). Mengembalikan broker sebelumnya."""
+    global _broker
+    with _broker_lock:
+        lama, _broker = _broker, broker
+    return lama
+
+
+def publish_notifikasi(objs, diperbarui=False):
+    """
+    Kirim notifikasi yang baru ditulis ke koneksi SSE milik penerimanya.
+    `diperbarui=True` untuk notifikasi digest yang sudah ada lalu diperbarui.
+    """
+    from .serializers import NotifikasiSerializer
+
+    broker = get_broker()
+    event = 'notifikasi_diperbarui' if diperbarui else 'notifikasi'
+    for obj in objs:
+        if obj.pk is None:
+            # Backend tanpa RETURNING di bulk_create; client menyusul lewat Last-Event-ID
+            continue
+        broker.publish(obj.user_id, {'event': event, 'data': dict(NotifikasiSerializer(obj).data)})
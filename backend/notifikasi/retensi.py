@@ -0,0 +1,98 @@
+# notifikasi/retensi.py
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notifikasi, NotifikasiArsip
+from . import unread
+
+DEFAULT_RETENSI = {
+    # Notifikasi yang sudah dibaca dihapus setelah sekian hari (None = tidak pernah)
+    'hapus_dibaca_setelah_hari': 30,
+    # Notifikasi lain (termasuk yang belum dibaca) dipindah ke arsip setelah sekian hari
+    'arsip_setelah_hari': 90,
+    # Jumlah baris per transaksi; batch kecil = lock tulis SQLite dilepas lebih cepat
+    'batch_size': 500,
+    # Jeda antar batch (detik) agar request lain sempat menulis
+    'jeda': 0.05,
+}
+
+
+def konfigurasi(**override):
+    hasil = {**DEFAULT_RETENSI, **getattr(settings, 'NOTIFIKASI_RETENSI', {})}
+    hasil.update({k: v for k, v in override.items() if v is not None})
+    return hasil
+
+
+# Kolom Notifikasi yang ikut disalin ke NotifikasiArsip
+KOLOM_ARSIP = ('user_id', 'title', 'content', 'is_read', 'kategori', 'jumlah', 'tautan', 'timestamp')
+
+
+def _batas(hari):
+    return timezone.now() - timedelta(days=hari)
+
+
+def _per_batch(queryset, batch_size, jeda, proses):
+    """
+    Ambil id secara berurutan (pakai index timestamp) sebanyak batch_size, lalu
+    proses dalam transaksi sendiri. Mengembalikan jumlah baris yang diproses.
+    """
+    total = 0
+    while True:
+        ids = list(queryset.order_by('timestamp', 'id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return total
+        with transaction.atomic():
+            total += proses(ids)
+        if len(ids) < batch_size:
+            return total
+        if jeda:
+            time.sleep(jeda)
+
+
+def _hapus(ids):
+    deleted, _ = Notifikasi.objects.filter(id__in=ids).delete()
+    return deleted
+
+
+def _arsipkan(ids):
+    rows = list(Notifikasi.objects.filter(id__in=ids).values(*KOLOM_ARSIP))
+    NotifikasiArsip.objects.bulk_create([NotifikasiArsip(**row) for row in rows])
+    Notifikasi.objects.filter(id__in=ids).delete()
+    # Notifikasi belum dibaca yang diarsip mengubah counter unread penerimanya
+    user_ids = {row['user_id'] for row in rows if not row['is_read']}
+    if user_ids:
+        transaction.on_commit(lambda: unread.invalidasi(user_ids))
+    return len(rows)
+
+
+def bersihkan(dry_run=False, **override):
+    """
+    Jalankan kebijakan retensi:
+      1. hapus notifikasi yang sudah dibaca dan lebih tua dari hapus_dibaca_setelah_hari,
+      2. pindahkan sisanya yang lebih tua dari arsip_setelah_hari ke NotifikasiArsip.
+
+    Setiap batch berjalan di transaksi sendiri, jadi lock tulis hanya dipegang
+    sebentar dan job aman dihentikan di tengah jalan lalu diulang.
+    """
+    cfg = konfigurasi(**override)
+    laporan = {'dry_run': dry_run, 'dihapus': 0, 'diarsipkan': 0}
+    mulai = time.monotonic()
+
+    if cfg['hapus_dibaca_setelah_hari'] is not None:
+        qs = Notifikasi.objects.filter(is_read=True, timestamp__lt=_batas(cfg['hapus_dibaca_setelah_hari']))
+        laporan['dihapus'] = qs.count() if dry_run else _per_batch(qs, cfg['batch_size'], cfg['jeda'], _hapus)
+
+    if cfg['arsip_setelah_hari'] is not None:
+        qs = Notifikasi.objects.filter(timestamp__lt=_batas(cfg['arsip_setelah_hari']))
+        if dry_run and cfg['hapus_dibaca_setelah_hari'] is not None:
+            # Baris yang sudah terhitung dihapus di langkah 1 tidak ikut diarsip
+            qs = qs.exclude(is_read=True, timestamp__lt=_batas(cfg['hapus_dibaca_setelah_hari']))
+        laporan['diarsipkan'] = qs.count() if dry_run else _per_batch(qs, cfg['batch_size'], cfg['jeda'], _arsipkan)
+
+    laporan['durasi_detik'] = round(time.monotonic() - mulai, 3)
+    return laporan
@@ -6,4 +6,4 @@ from .models import Notifikasi
 class NotifikasiSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notifikasi
-        fields = ['id', 'title', 'content', 'is_read', 'timestamp']
\ No newline at end of file
+        fields = ['id', 'title', 'content', 'is_read', 'timestamp', 'kategori', 'jumlah', 'tautan']
\ No newline at end of file
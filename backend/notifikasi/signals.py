@@ -0,0 +1,23 @@
+# notifikasi/signals.py
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .fanout import invalidasi_admin_ids
+
+# Field User yang memengaruhi daftar penerima notifikasi admin
+FIELD_PENERIMA = {'is_staff'}
+
+
+@receiver(post_save, sender=User)
+def perbarui_penerima_setelah_simpan(sender, instance, created, update_fields=None, **kwargs):
+    # Simpan yang hanya menyentuh field lain (mis. last_login saat login) tidak perlu invalidasi
+    if update_fields is not None and not FIELD_PENERIMA & set(update_fields):
+        return
+    invalidasi_admin_ids()
+
+
+@receiver(post_delete, sender=User)
+def perbarui_penerima_setelah_hapus(sender, instance, **kwargs):
+    invalidasi_admin_ids()
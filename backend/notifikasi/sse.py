@@ -0,0 +1,146 @@
+# notifikasi/sse.py
+
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import Notifikasi
+from .pubsub import get_broker
+from .serializers import NotifikasiSerializer
+
+HEARTBEAT_INTERVAL = getattr(settings, 'NOTIFIKASI_SSE_HEARTBEAT', 15)
+# Batas baris yang diputar ulang saat reconnect dengan Last-Event-ID
+REPLAY_MAX = 500
+# Masa berlaku tiket stream (detik); hanya diperiksa saat koneksi dibuka
+TIKET_MAX_AGE = getattr(settings, 'NOTIFIKASI_SSE_TIKET_MAX_AGE', 60)
+_SALT_TIKET = 'notifikasi.sse.tiket'
+
+
+def buat_tiket(user_id):
+    """
+    Tiket singkat pengganti access token di query string: EventSource tidak
+    bisa mengirim header Authorization, dan URL (termasuk query string) ikut
+    tercatat di log akses. Tiket hanya berlaku untuk endpoint stream dan
+    kedaluwarsa setelah TIKET_MAX_AGE detik.
+    """
+    return signing.dumps(user_id, salt=_SALT_TIKET)
+
+
+def _user_id_dari_tiket(tiket):
+    try:
+        return signing.loads(tiket, salt=_SALT_TIKET, max_age=TIKET_MAX_AGE)
+    except signing.BadSignature:  # termasuk SignatureExpired
+        return None
+
+
+def _user_id_dari_header(request):
+    jenis, _, token = request.headers.get('Authorization', '').partition(' ')
+    if jenis not in jwt_settings.AUTH_HEADER_TYPES or not token:
+        return None
+    try:
+        validated = AccessToken(token)
+    except TokenError:
+        return None
+    return validated.get(jwt_settings.USER_ID_CLAIM)
+
+
+async def _user_id_dari_request(request):
+    user_id = _user_id_dari_header(request)
+    if user_id is None and request.GET.get('tiket'):
+        user_id = _user_id_dari_tiket(request.GET['tiket'])
+    if user_id is None:
+        return None
+    # Klaim user_id di token berupa string; pakai pk dari database sebagai kunci broker
+    return await (
+        User.objects.filter(pk=user_id, is_active=True)
+        .values_list('pk', flat=True)
+        .afirst()
+    )
+
+
+def _event(data, event='notifikasi'):
+    payload = f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+    if event != 'notifikasi':
+        # Update digest tidak memajukan Last-Event-ID, supaya replay saat
+        # reconnect tetap berpatokan pada notifikasi baru terakhir
+        return payload
+    return f"id: {data['id']}\n{payload}"
+
+
+@sync_to_async
+def _notifikasi_terlewat(user_id, last_id):
+    rows = Notifikasi.objects.filter(user_id=user_id, id__gt=last_id).order_by('id')[:REPLAY_MAX]
+    return [dict(NotifikasiSerializer(row).data) for row in rows]
+
+
+async def notifikasi_stream(request):
+    """
+    Server-Sent Events: kirim notifikasi baru milik user yang login secara langsung.
+
+    Autentikasi memakai access token SimpleJWT di header Authorization, atau
+    `?tiket=` dari POST /api/notifikasi/tiket_stream/ untuk EventSource di
+    browser. Tiket hanya diperiksa saat koneksi dibuka; jika EventSource
+    tertutup (mis. reconnect ditolak 401), client meminta tiket baru.
+    Reconnect dengan header Last-Event-ID (otomatis oleh EventSource) hanya
+    memutar ulang notifikasi yang terlewat (maksimal REPLAY_MAX).
+
+    Endpoint ini harus dijalankan di server ASGI (uvicorn/daphne): setiap
+    koneksi idle hanya berupa coroutine yang menunggu antrian, tanpa thread
+    maupun koneksi database.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'Stream notifikasi membutuhkan server ASGI.'}, status=501)
+
+    user_id = await _user_id_dari_request(request)
+    if user_id is None:
+        return JsonResponse({'detail': 'Token/tiket tidak valid atau sudah kedaluwarsa.'}, status=401)
+
+    last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        last_id = None
+
+    async def stream():
+        broker = get_broker()
+        # Subscribe dulu sebelum replay supaya tidak ada notifikasi yang jatuh di antaranya
+        subscription = broker.subscribe(user_id)
+        try:
+            yield "retry: 5000\n\n"
+            terakhir = last_id or 0
+            if last_id is not None:
+                for data in await _notifikasi_terlewat(user_id, last_id):
+                    terakhir = max(terakhir, data['id'])
+                    yield _event(data)
+
+            while True:
+                try:
+                    pesan = await asyncio.wait_for(subscription.get(), timeout=HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if pesan is None:
+                    # Antrian meluap; tutup agar client reconnect dengan Last-Event-ID
+                    break
+                data = pesan['data']
+                if pesan['event'] == 'notifikasi':
+                    if data['id'] <= terakhir:
+                        continue
+                    terakhir = data['id']
+                yield _event(data, pesan['event'])
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # jangan di-buffer oleh nginx
+    return response
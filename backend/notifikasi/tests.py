@@ -1,3 +1,421 @@
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from akun.tests import kredensial
+from pengelolaSiswa.query_budget import QueryBudgetMixin, RekamQuery
+from siswa.models import Siswa
+
+from . import fanout, retensi, sse, unread
+from .models import Notifikasi, NotifikasiArsip
+from .pubsub import InProcessBroker, QUEUE_MAXSIZE, set_broker
+
+# Jumlah query maksimal per route (lihat pengelolaSiswa/query_budget.py)
+BUDGET_QUERY = {
+    # COUNT + halaman; mode cursor tanpa COUNT (user dari token, tanpa query)
+    'notifikasi-list': {None: 2, 10: 1, 100: 1},
+    'notifikasi-detail': 1,
+    # hitung ulang counter (hanya saat cache kosong)
+    'notifikasi-unread-count': 1,
+    'notifikasi-mark-as-read': 1,
+    'notifikasi-mark-all-as-read': 1,
+    'notifikasi-tiket-stream': 0,
+    # Stream hanya berjalan di ASGI; test client WSGI mendapat 501 tanpa query
+    'notifikasi-stream': 0,
+}
+
+
+class NotifikasiQueryBudgetTests(QueryBudgetMixin, TestCase):
+    budget_query = BUDGET_QUERY
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+        cls.notifikasi = Notifikasi.objects.create(user=cls.admin, title='Pendaftar Baru!', content='Halo')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(**kredensial(self.admin))
+
+    def isi_notifikasi(self, jumlah):
+        # Counter belum dibaca dihitung ulang dari database untuk setiap ukuran
+        cache.clear()
+        kurang = jumlah - Notifikasi.objects.filter(user=self.admin).count()
+        Notifikasi.objects.bulk_create([
+            Notifikasi(user=self.admin, title='Pendaftar Baru!', content=f'Notifikasi {i}', is_read=i % 2 == 0)
+            for i in range(kurang)
+        ])
+
+    def test_list(self):
+        self.assertQueryKonstan('notifikasi-list', 'get', '/api/notifikasi/', self.isi_notifikasi)
+
+    def test_list_cursor_per_page_size(self):
+        for page_size in (10, 100):
+            with self.subTest(page_size=page_size):
+                self.assertQueryKonstan(
+                    'notifikasi-list', 'get', '/api/notifikasi/', self.isi_notifikasi,
+                    {'pagination': 'cursor', 'page_size': page_size}, page_size=page_size,
+                )
+
+    def test_detail(self):
+        self.assertBudgetQuery('notifikasi-detail', 'get', f'/api/notifikasi/{self.notifikasi.pk}/')
+
+    def test_unread_count(self):
+        self.assertQueryKonstan('notifikasi-unread-count', 'get', '/api/notifikasi/unread_count/', self.isi_notifikasi)
+
+    def test_mark_as_read(self):
+        self.assertBudgetQuery('notifikasi-mark-as-read', 'post', f'/api/notifikasi/{self.notifikasi.pk}/mark_as_read/')
+
+    def test_mark_all_as_read(self):
+        self.assertQueryKonstan(
+            'notifikasi-mark-all-as-read', 'post', '/api/notifikasi/mark_all_as_read/', self.isi_notifikasi,
+        )
+
+    def test_stream(self):
+        self.assertBudgetQuery('notifikasi-stream', 'get', '/api/notifikasi/stream/')
+
+    def test_digest_admin_tidak_per_admin(self):
+        """
+        Fanout digest ke 10 maupun 100 admin memakai jumlah query yang sama.
+        (Di atas ~120 admin bulk_create dipecah per batch karena batas parameter SQLite.)
+        """
+        hasil = []
+        for jumlah in (10, 100):
+            kurang = jumlah - User.objects.filter(is_staff=True).count()
+            User.objects.bulk_create([User(username=f'staf-{i}', is_staff=True) for i in range(jumlah - kurang, jumlah)])
+            fanout.invalidasi_admin_ids()
+            with RekamQuery() as rekam:
+                fanout.tulis_digest_admin('uji', 'Judul', 'Isi', '{jumlah} baru')
+            hasil.append(rekam)
+            Notifikasi.objects.filter(kategori='uji').update(is_read=True)
+        self.assertEqual(len(hasil[0]), len(hasil[1]), hasil[1].laporan())
+
+
+class DigestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_digest_diperbarui_tanpa_menggeser_jendela(self):
+        fanout.tulis_digest_admin('uji', 'Judul', 'Isi', '{jumlah} baru')
+        # Digest dibuat 9 menit lalu: masih di dalam jendela 10 menit
+        lama = timezone.now() - timedelta(minutes=9)
+        Notifikasi.objects.filter(kategori='uji').update(timestamp=lama, jendela_mulai=lama)
+
+        self.assertEqual(fanout.tulis_digest_admin('uji', 'Judul', 'Isi', '{jumlah} baru'), [])
+        digest = Notifikasi.objects.get(kategori='uji')
+        self.assertEqual((digest.jumlah, digest.content), (2, '2 baru'))
+        self.assertEqual((digest.timestamp, digest.jendela_mulai), (lama, lama))
+
+    def test_digest_di_luar_jendela_membuat_baris_baru(self):
+        fanout.tulis_digest_admin('uji', 'Judul', 'Isi', '{jumlah} baru')
+        lama = timezone.now() - timedelta(minutes=11)
+        Notifikasi.objects.filter(kategori='uji').update(timestamp=lama, jendela_mulai=lama)
+        fanout.tulis_digest_admin('uji', 'Judul', 'Isi', '{jumlah} baru')
+        self.assertEqual(Notifikasi.objects.filter(kategori='uji', user=self.admin).count(), 2)
+
+    def test_pendaftaran_beruntun_lebih_lama_dari_jendela(self):
+        # Satu pendaftar setiap 4 menit selama 20 menit, jendela 10 menit
+        mulai = timezone.now()
+        for menit in range(0, 21, 4):
+            with mock.patch.object(fanout.timezone, 'now', return_value=mulai + timedelta(minutes=menit)):
+                fanout.tulis_digest_admin('uji', 'Judul', 'Isi', '{jumlah} baru')
+
+        digest = list(
+            Notifikasi.objects.filter(kategori='uji').order_by('jendela_mulai')
+            .values_list('jendela_mulai', 'jumlah', 'content')
+        )
+        self.assertEqual(digest, [
+            (mulai, 3, '3 baru'),
+            (mulai + timedelta(minutes=12), 3, '3 baru'),
+        ])
+
+
+class FanoutPendaftarTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_ids = [
+            User.objects.create_user(username=f'admin-{i}', password='rahasia123', is_staff=True).pk for i in range(3)
+        ]
+        User.objects.create_user(username='guru', password='rahasia123')
+
+    def setUp(self):
+        cache.clear()
+
+    def daftar(self):
+        """Satu pendaftaran; mengembalikan query INSERT notifikasi yang dijalankan setelah commit."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            Siswa.objects.create(
+                nama_lengkap='Dewi Anggraini', nisn='0011111111', tempat_lahir='Garut',
+                tanggal_lahir=date(2009, 2, 3), nik='3205010302090001', jenis_kelamin='P',
+                alamat='Jl. Cimanuk', no_telepon='0812', asal_sekolah='SMP 1 Garut',
+                alamat_asal_sekolah='Jl. Garut', nama_ayah='Asep', nama_ibu='Euis', no_telepon_ortu='0813',
+            )
+        # Belum ada notifikasi sebelum transaksi pendaftaran di-commit
+        self.assertFalse(Notifikasi.objects.exists())
+        with CaptureQueriesContext(connection) as ctx:
+            for callback in callbacks:
+                callback()
+        tabel = Notifikasi._meta.db_table
+        return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith(f'INSERT INTO "{tabel}"')]
+
+    def assertSatuNotifikasiPerAdmin(self, insert):
+        self.assertEqual(len(insert), 1, insert)
+        self.assertEqual(sorted(Notifikasi.objects.values_list('user_id', flat=True)), self.admin_ids)
+
+    def test_satu_bulk_create_untuk_semua_admin(self):
+        self.assertSatuNotifikasiPerAdmin(self.daftar())
+
+    @override_settings(NOTIFIKASI_DIGEST={'aktif': False})
+    def test_tanpa_digest(self):
+        self.assertSatuNotifikasiPerAdmin(self.daftar())
+
+
+class UnreadCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(**kredensial(self.admin))
+
+    def jumlah(self, queries=0):
+        with self.assertNumQueries(queries):
+            return self.client.get('/api/notifikasi/unread_count/').data['unread_count']
+
+    def test_notifikasi_baru_menaikkan_counter(self):
+        self.assertEqual(self.jumlah(queries=1), 0)
+        fanout.tulis_notifikasi_admin('Judul', 'Isi')
+        fanout.tulis_notifikasi_admin('Judul', 'Isi')
+        self.assertEqual(self.jumlah(), 2)
+
+    def test_mark_as_read_menurunkan_counter(self):
+        [pertama] = fanout.tulis_notifikasi_admin('Judul', 'Isi')
+        [kedua] = fanout.tulis_notifikasi_admin('Judul', 'Isi')
+        self.assertEqual(self.jumlah(queries=1), 2)
+        self.client.post(f'/api/notifikasi/{pertama.pk}/mark_as_read/')
+        # Menandai ulang notifikasi yang sudah dibaca tidak mengurangi lagi
+        self.client.post(f'/api/notifikasi/{pertama.pk}/mark_as_read/')
+        self.assertEqual(self.jumlah(), 1)
+        self.client.post('/api/notifikasi/mark_all_as_read/')
+        self.assertEqual(self.jumlah(), 0)
+        self.assertTrue(Notifikasi.objects.get(pk=kedua.pk).is_read)
+
+    def test_counter_direkonsiliasi_setelah_kedaluwarsa(self):
+        self.assertEqual(self.jumlah(queries=1), 0)
+        # Perubahan yang tidak melewati counter (mis. dari proses lain)
+        Notifikasi.objects.create(user=self.admin, title='Judul', content='Isi')
+        self.assertEqual(self.jumlah(), 0)
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=time.time() + unread._timeout() + 1):
+            self.assertEqual(self.jumlah(queries=1), 1)
+
+    def test_timeout_per_proses(self):
+        self.assertEqual(unread._timeout(), unread.UNREAD_CACHE_TIMEOUT_PER_PROSES)
+
+    def test_invalidasi(self):
+        self.assertEqual(self.jumlah(queries=1), 0)
+        Notifikasi.objects.create(user=self.admin, title='Judul', content='Isi')
+        unread.invalidasi([self.admin.pk])
+        self.assertEqual(self.jumlah(queries=1), 1)
+
+
+class StreamNotifikasiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+        cls.lain = User.objects.create_user(username='lain', password='rahasia123', is_staff=True)
+        cls.auth = kredensial(cls.admin)['HTTP_AUTHORIZATION']
+
+    def setUp(self):
+        cache.clear()
+        broker_lama = set_broker(InProcessBroker())
+        self.addCleanup(set_broker, broker_lama)
+
+    @asynccontextmanager
+    async def stream(self, query=None, **headers):
+        response = await self.async_client.get('/api/notifikasi/stream/', query, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = response.streaming_content.__aiter__()
+        try:
+            self.assertEqual(await self.baca(events), 'retry: 5000\n\n')
+            yield events
+        finally:
+            # Menutup generator sama dengan client memutus koneksi (unsubscribe)
+            await events.aclose()
+
+    async def baca(self, events):
+        potongan = await asyncio.wait_for(events.__anext__(), timeout=5)
+        return potongan.decode() if isinstance(potongan, bytes) else potongan
+
+    def parse(self, potongan):
+        baris = dict(line.split(': ', 1) for line in potongan.strip().splitlines())
+        return baris.get('id'), baris['event'], json.loads(baris['data'])
+
+    async def test_replay_last_event_id(self):
+        objs = await Notifikasi.objects.abulk_create([
+            Notifikasi(user=self.admin, title='Judul', content=f'Isi {i}') for i in range(5)
+        ])
+        await Notifikasi.objects.acreate(user=self.lain, title='Judul', content='Milik user lain')
+        async with self.stream(Authorization=self.auth, **{'Last-Event-ID': str(objs[1].pk)}) as events:
+            for obj in objs[2:]:
+                self.assertEqual(self.parse(await self.baca(events))[:2], (str(obj.pk), 'notifikasi'))
+
+    async def test_replay_dibatasi(self):
+        objs = await Notifikasi.objects.abulk_create([
+            Notifikasi(user=self.admin, title='Judul', content=f'Isi {i}') for i in range(sse.REPLAY_MAX + 10)
+        ])
+        async with self.stream(Authorization=self.auth, **{'Last-Event-ID': '0'}) as events:
+            diputar = [self.parse(await self.baca(events))[0] for _ in range(sse.REPLAY_MAX)]
+            self.assertEqual(diputar, [str(obj.pk) for obj in objs[:sse.REPLAY_MAX]])
+
+            # Setelah batas replay, stream menunggu event baru dari broker
+            await sync_to_async(fanout.tulis_notifikasi_admin)('Baru', 'Isi baru')
+            id_, _, data = self.parse(await self.baca(events))
+        self.assertEqual(data['title'], 'Baru')
+        self.assertGreater(int(id_), objs[-1].pk)
+
+    async def test_broker_hanya_mengirim_ke_pemilik(self):
+        async with self.stream(Authorization=self.auth) as events:
+            # Digest ditulis untuk kedua admin; stream ini hanya menerima miliknya
+            await sync_to_async(fanout.tulis_digest_admin)('uji', 'Digest', 'Isi', '{jumlah} baru')
+            id_, event, data = self.parse(await self.baca(events))
+            milik_admin = await Notifikasi.objects.aget(user=self.admin, kategori='uji')
+            self.assertEqual((id_, event, data['title']), (str(milik_admin.pk), 'notifikasi', 'Digest'))
+
+            # Update digest dikirim tanpa id agar tidak memajukan Last-Event-ID
+            await sync_to_async(fanout.tulis_digest_admin)('uji', 'Digest', 'Isi', '{jumlah} baru')
+            id_, event, data = self.parse(await self.baca(events))
+        self.assertEqual((id_, event, data['id'], data['content']), (None, 'notifikasi_diperbarui', milik_admin.pk, '2 baru'))
+
+    async def test_tiket(self):
+        response = await self.async_client.post('/api/notifikasi/tiket_stream/', headers={'Authorization': self.auth})
+        tiket = response.data['tiket']
+        async with self.stream({'tiket': tiket}):
+            pass
+
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + sse.TIKET_MAX_AGE + 1):
+            response = await self.async_client.get('/api/notifikasi/stream/', {'tiket': tiket})
+        self.assertEqual(response.status_code, 401)
+        for query in ({'tiket': tiket + 'x'}, {'token': self.auth.split()[1]}, {}):
+            response = await self.async_client.get('/api/notifikasi/stream/', query)
+            self.assertEqual(response.status_code, 401, query)
+
+
+class BrokerTests(TestCase):
+    async def test_publish_dari_thread_lain(self):
+        broker = InProcessBroker()
+        milik_admin = broker.subscribe(1)
+        milik_lain = broker.subscribe(2)
+        await sync_to_async(broker.publish, thread_sensitive=False)(1, {'event': 'notifikasi', 'data': {'id': 7}})
+        self.assertEqual(await asyncio.wait_for(milik_admin.get(), timeout=5), {'event': 'notifikasi', 'data': {'id': 7}})
+        self.assertTrue(milik_lain.queue.empty())
+
+        broker.unsubscribe(milik_admin)
+        broker.unsubscribe(milik_lain)
+        self.assertEqual(broker.jumlah_koneksi(), 0)
+
+    async def test_antrian_penuh_menutup_koneksi(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe(1)
+        for i in range(QUEUE_MAXSIZE + 1):
+            broker.publish(1, {'event': 'notifikasi', 'data': {'id': i}})
+        await asyncio.sleep(0)
+        # Client lambat: antrian dikosongkan dan diganti sinyal tutup (None)
+        self.assertIsNone(await asyncio.wait_for(subscription.get(), timeout=5))
+
+
+class RetensiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+        cls.lain = User.objects.create_user(username='lain', password='rahasia123', is_staff=True)
+        # (user, sudah dibaca, umur dalam hari)
+        isi = [
+            (cls.admin, True, 40), (cls.admin, True, 45), (cls.lain, True, 40), (cls.admin, True, 100),
+            (cls.admin, False, 100), (cls.admin, False, 120), (cls.lain, False, 95),
+            (cls.admin, True, 10), (cls.admin, False, 50),
+        ]
+        sekarang = timezone.now()
+        for i, (user, is_read, umur) in enumerate(isi):
+            notifikasi = Notifikasi.objects.create(user=user, title=f'Notifikasi {i}', content='Halo', is_read=is_read)
+            Notifikasi.objects.filter(pk=notifikasi.pk).update(timestamp=sekarang - timedelta(days=umur))
+        Notifikasi.objects.filter(title='Notifikasi 5').update(
+            kategori=fanout.KATEGORI_PENDAFTAR_BARU, jumlah=3, tautan='/siswa?status=BARU',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_hapus_dan_arsip_per_batch(self):
+        hapus = mock.patch.object(retensi, '_hapus', wraps=retensi._hapus)
+        arsipkan = mock.patch.object(retensi, '_arsipkan', wraps=retensi._arsipkan)
+        with hapus as hapus, arsipkan as arsipkan, mock.patch.object(retensi.time, 'sleep') as sleep:
+            laporan = retensi.bersihkan(batch_size=2, jeda=0.5)
+
+        self.assertEqual((laporan['dihapus'], laporan['diarsipkan']), (4, 3))
+        # Setiap batch diproses di transaksinya sendiri, dengan jeda hanya setelah batch penuh
+        self.assertEqual([len(c.args[0]) for c in hapus.call_args_list], [2, 2])
+        self.assertEqual([len(c.args[0]) for c in arsipkan.call_args_list], [2, 1])
+        self.assertEqual(sleep.call_count, 3)
+
+        self.assertEqual(sorted(Notifikasi.objects.values_list('title', flat=True)), ['Notifikasi 7', 'Notifikasi 8'])
+        self.assertEqual(
+            sorted(NotifikasiArsip.objects.values_list('user__username', 'title', 'is_read')),
+            [('admin', 'Notifikasi 4', False), ('admin', 'Notifikasi 5', False), ('lain', 'Notifikasi 6', False)],
+        )
+        arsip = NotifikasiArsip.objects.get(title='Notifikasi 5')
+        self.assertEqual((timezone.now() - arsip.timestamp).days, 120)
+        # Metadata digest dan tautan ikut diarsip
+        self.assertEqual(
+            (arsip.kategori, arsip.jumlah, arsip.tautan), (fanout.KATEGORI_PENDAFTAR_BARU, 3, '/siswa?status=BARU'),
+        )
+
+    def test_counter_unread_diinvalidasi(self):
+        self.assertEqual(unread.jumlah_belum_dibaca(self.admin.pk), 3)
+        self.assertEqual(unread.jumlah_belum_dibaca(self.lain.pk), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            retensi.bersihkan(jeda=0)
+
+        self.assertEqual(unread.jumlah_belum_dibaca(self.admin.pk), 1)
+        self.assertEqual(unread.jumlah_belum_dibaca(self.lain.pk), 0)
+
+    def test_dry_run(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            laporan = retensi.bersihkan(dry_run=True)
+        self.assertEqual((laporan['dihapus'], laporan['diarsipkan']), (4, 3))
+        self.assertEqual(callbacks, [])
+        self.assertEqual(Notifikasi.objects.count(), 9)
+        self.assertFalse(NotifikasiArsip.objects.exists())
+
+        # Jumlah dry run sama dengan hasil sebenarnya
+        self.assertEqual(retensi.bersihkan(jeda=0) | {'dry_run': True, 'durasi_detik': laporan['durasi_detik']}, laporan)
+
+    def test_override_dan_nonaktif(self):
+        with override_settings(NOTIFIKASI_RETENSI={'hapus_dibaca_setelah_hari': None}):
+            laporan = retensi.bersihkan(arsip_setelah_hari=42, jeda=0)
+        # Tanpa langkah hapus, notifikasi terbaca yang tua ikut diarsip
+        self.assertEqual((laporan['dihapus'], laporan['diarsipkan']), (0, 6))
+        self.assertEqual(
+            sorted(Notifikasi.objects.values_list('title', flat=True)), ['Notifikasi 0', 'Notifikasi 2', 'Notifikasi 7'],
+        )
@@ -0,0 +1,61 @@
+# notifikasi/unread.py
+
+from django.conf import settings
+from django.core.cache import cache
+
+from pengelolaSiswa.cache import timeout_cache
+from .models import Notifikasi
+
+# Counter di cache kedaluwarsa setelah sekian detik lalu dihitung ulang dari
+# database; ini sekaligus rekonsiliasi berkala bila ada update yang terlewat.
+UNREAD_CACHE_TIMEOUT = getattr(settings, 'NOTIFIKASI_UNREAD_CACHE_TIMEOUT', 60)
+# Dengan LocMemCache setiap worker punya counter sendiri dan hanya melihat
+# notifikasi/tanda baca yang terjadi di proses itu, jadi counter dihitung ulang
+# lebih sering; lihat pengelolaSiswa/cache.py.
+UNREAD_CACHE_TIMEOUT_PER_PROSES = getattr(settings, 'NOTIFIKASI_UNREAD_CACHE_TIMEOUT_PER_PROSES', 10)
+
+
+def _timeout():
+    return timeout_cache(UNREAD_CACHE_TIMEOUT, UNREAD_CACHE_TIMEOUT_PER_PROSES)
+
+
+def _kunci(user_id):
+    return f'notifikasi:unread:{user_id}'
+
+
+def hitung_dari_db(user_id):
+    return Notifikasi.objects.filter(user_id=user_id, is_read=False).count()
+
+
+def jumlah_belum_dibaca(user_id):
+    jumlah = cache.get(_kunci(user_id))
+    if jumlah is None:
+        jumlah = hitung_dari_db(user_id)
+        cache.set(_kunci(user_id), jumlah, _timeout())
+    return jumlah
+
+
+def tambah(user_ids, jumlah=1):
+    """Naikkan counter setelah notifikasi dibuat. Counter yang belum ada dibiarkan
+    kosong; nilainya akan dihitung dari database saat pertama kali dibaca."""
+    for user_id in set(user_ids):
+        try:
+            cache.incr(_kunci(user_id), jumlah)
+        except ValueError:
+            pass
+
+
+def kurangi(user_id, jumlah=1):
+    try:
+        if cache.decr(_kunci(user_id), jumlah) < 0:
+            cache.delete(_kunci(user_id))
+    except ValueError:
+        pass
+
+
+def reset(user_id):
+    cache.set(_kunci(user_id), 0, _timeout())
+
+
+def invalidasi(user_ids):
+    cache.delete_many([_kunci(user_id) for user_id in set(user_ids)])
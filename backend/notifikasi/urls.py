@@ -3,10 +3,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import NotifikasiViewSet
+from .sse import notifikasi_stream
 
 router = DefaultRouter()
 router.register(r'', NotifikasiViewSet, basename='notifikasi')
 
 urlpatterns = [
+    # Harus di atas router agar 'stream/' tidak dianggap sebagai pk notifikasi
+    path('stream/', notifikasi_stream, name='notifikasi-stream'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
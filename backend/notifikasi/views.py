@@ -3,9 +3,13 @@
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from .models import Notifikasi
 from .serializers import NotifikasiSerializer
+from . import unread
+from .sse import TIKET_MAX_AGE, buat_tiket
+from pengelolaSiswa.pagination import NotifikasiPagination
 
 class NotifikasiViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -14,19 +18,36 @@ class NotifikasiViewSet(viewsets.ReadOnlyModelViewSet):
     """
     serializer_class = NotifikasiSerializer
     permission_classes = [IsAuthenticated]
+    # `?pagination=cursor` mengaktifkan keyset pagination (-timestamp, -id)
+    pagination_class = NotifikasiPagination
 
     def get_queryset(self):
         # Filter notifikasi hanya untuk user yang sedang membuat request
-        return Notifikasi.objects.filter(user=self.request.user)
+        return Notifikasi.objects.filter(user_id=self.request.user.pk)
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """
+        Jumlah notifikasi yang belum dibaca, untuk badge lonceng di frontend.
+        Diambil dari counter di cache, bukan dari daftar notifikasi.
+        """
+        return Response({'unread_count': unread.jumlah_belum_dibaca(request.user.pk)})
 
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
         """
         Action untuk menandai notifikasi sebagai sudah dibaca.
         """
-        notifikasi = self.get_object()
-        notifikasi.is_read = True
-        notifikasi.save()
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound()
+        # Cukup satu UPDATE kolom is_read, tanpa memuat dan menyimpan seluruh baris
+        diubah = self.get_queryset().filter(pk=pk, is_read=False).update(is_read=True)
+        if diubah:
+            unread.kurangi(request.user.pk, diubah)
+        elif not self.get_queryset().filter(pk=pk).exists():
+            raise NotFound()
         return Response({'status': 'notifikasi ditandai terbaca'})
 
     @action(detail=False, methods=['post'])
@@ -34,5 +55,14 @@ class NotifikasiViewSet(viewsets.ReadOnlyModelViewSet):
         """
         Action untuk menandai semua notifikasi sebagai sudah dibaca.
         """
-        self.get_queryset().update(is_read=True)
-        return Response({'status': 'semua notifikasi ditandai terbaca'})
\ No newline at end of file
+        self.get_queryset().filter(is_read=False).update(is_read=True)
+        unread.reset(request.user.pk)
+        return Response({'status': 'semua notifikasi ditandai terbaca'})
+
+    @action(detail=False, methods=['post'])
+    def tiket_stream(self, request):
+        """
+        Tiket singkat untuk membuka /api/notifikasi/stream/?tiket=... dari
+        EventSource, yang tidak bisa mengirim header Authorization.
+        """
+        return Response({'tiket': buat_tiket(request.user.pk), 'berlaku_detik': TIKET_MAX_AGE})
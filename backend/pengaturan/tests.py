@@ -1,3 +1,49 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from akun.tests import kredensial
+from pengelolaSiswa.query_budget import QueryBudgetMixin
+
+from .models import PengaturanPendaftaran
+
+# Jumlah query maksimal per route (lihat pengelolaSiswa/query_budget.py)
+BUDGET_QUERY = {
+    # COUNT + halaman (user dari token, tanpa query)
+    'pengaturan-pendaftaran-list': 2,
+    # SELECT (+ UPDATE untuk PATCH)
+    'pengaturan-pendaftaran-detail': 2,
+    # publik: satu get_or_create
+    'pengaturan-pendaftaran-status': 1,
+}
+
+
+class PengaturanQueryBudgetTests(QueryBudgetMixin, TestCase):
+    budget_query = BUDGET_QUERY
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+        PengaturanPendaftaran.load()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(**kredensial(self.admin))
+
+    def test_list(self):
+        self.assertBudgetQuery('pengaturan-pendaftaran-list', 'get', '/api/pengaturan/pendaftaran/')
+
+    def test_detail(self):
+        self.assertBudgetQuery('pengaturan-pendaftaran-detail', 'get', '/api/pengaturan/pendaftaran/1/')
+
+    def test_ubah_status(self):
+        response = self.assertBudgetQuery(
+            'pengaturan-pendaftaran-detail', 'patch', '/api/pengaturan/pendaftaran/1/', {'is_open': True}, format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertTrue(PengaturanPendaftaran.load().is_open)
+
+    def test_status_publik(self):
+        self.client.credentials()
+        response = self.assertBudgetQuery('pengaturan-pendaftaran-status', 'get', '/api/pengaturan/pendaftaran/status/')
+        self.assertEqual(response.data, {'is_open': False})
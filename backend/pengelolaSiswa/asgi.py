@@ -3,6 +3,13 @@
 import os
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'nama_proyek.settings')
+# Jalankan dengan server ASGI (mis. `uvicorn pengelolaSiswa.asgi:application`)
+# agar endpoint stream notifikasi (SSE) bisa menahan banyak koneksi idle.
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pengelolaSiswa.settings')
 
-application = get_asgi_application()
\ No newline at end of file
+application = get_asgi_application()
+
+# Hanya proses server yang mencatat metrik /metrics (lihat pengelolaSiswa/metrik.py)
+from pengelolaSiswa import metrik  # noqa: E402
+
+metrik.mulai_server()
@@ -0,0 +1,23 @@
+# pengelolaSiswa/cache.py
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def cache_per_proses(alias='default'):
+    """True jika cache hanya ada di memori proses ini (LocMemCache), sehingga
+    invalidasi dan counter tidak terlihat oleh worker lain."""
+    return isinstance(caches[alias], LocMemCache)
+
+
+def timeout_cache(timeout, timeout_per_proses):
+    """
+    Timeout untuk data yang selalu diinvalidasi setelah ada perubahan. Dengan
+    cache per proses, invalidasi hanya sampai ke proses yang melakukan
+    perubahan; worker lain baru melihatnya setelah data kedaluwarsa, jadi
+    timeout dibatasi `timeout_per_proses` (batas atas data basi). Dengan
+    cache bersama (Redis, Memcached, database) `timeout` dipakai utuh.
+    """
+    if cache_per_proses():
+        return min(timeout, timeout_per_proses)
+    return timeout
@@ -0,0 +1,181 @@
+# pengelolaSiswa/gambar.py
+
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from rest_framework import serializers
+
+from .worker import worker
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow sudah wajib untuk ImageField, tapi jangan gagal saat import
+    Image = ImageOps = None
+
+# Sisi terpanjang (px) tiap varian. thumb dipotong persegi untuk avatar.
+UKURAN_VARIAN = getattr(settings, 'GAMBAR_VARIAN', {'thumb': 96, 'medium': 480})
+VARIAN_PERSEGI = {'thumb'}
+FORMAT_VARIAN = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+PREFIX = 'varian'
+# buat_varian menulis varian berurutan; yang terakhir ada berarti semuanya sudah ada
+VARIAN_TERAKHIR = (list(UKURAN_VARIAN)[-1], list(FORMAT_VARIAN)[-1])
+
+
+def nama_varian(nama, ukuran, ekstensi):
+    """
+    Nama file varian bersifat deterministik dari nama file asli, mis.
+    foto_profil/budi.jpg -> varian/foto_profil/budi.thumb.webp, sehingga URL
+    bisa dibangun tanpa query atau kolom tambahan.
+    """
+    dasar, _ = os.path.splitext(nama)
+    return f'{PREFIX}/{dasar}.{ukuran}.{ekstensi}'
+
+
+def varian_tersedia(nama, storage=default_storage):
+    return bool(nama) and storage.exists(nama_varian(nama, *VARIAN_TERAKHIR))
+
+
+def url_varian(nama, request=None, storage=default_storage):
+    """
+    {'thumb': {'webp': url, 'jpg': url}, 'medium': {...}} untuk satu file gambar.
+    Selama varian belum ada (masih dibuat di latar belakang, atau file bawaan
+    seperti default.jpg) semua entri berisi URL file asli.
+    """
+    if not nama:
+        return None
+    tersedia = varian_tersedia(nama, storage)
+    hasil = {}
+    for ukuran in UKURAN_VARIAN:
+        hasil[ukuran] = {}
+        for ekstensi in FORMAT_VARIAN:
+            url = storage.url(nama_varian(nama, ukuran, ekstensi) if tersedia else nama)
+            hasil[ukuran][ekstensi] = request.build_absolute_uri(url) if request is not None else url
+    return hasil
+
+
+def berkas_varian(fieldfile, varian):
+    """
+    FieldFile untuk varian `<ukuran>.<ekstensi>` (mis. 'thumb.webp') dari
+    sebuah ImageField, atau `fieldfile` itu sendiri bila varian belum dibuat.
+    ValueError jika nama varian tidak dikenal.
+    """
+    ukuran, _, ekstensi = varian.partition('.')
+    if ukuran not in UKURAN_VARIAN or ekstensi not in FORMAT_VARIAN:
+        raise ValueError(f'Varian tidak dikenal: {varian}')
+    if not fieldfile:
+        return fieldfile
+    nama = nama_varian(fieldfile.name, ukuran, ekstensi)
+    if not fieldfile.storage.exists(nama):
+        return fieldfile
+    return fieldfile.field.attr_class(fieldfile.instance, fieldfile.field, nama)
+
+
+def _ubah_ukuran(gambar, ukuran, sisi):
+    if ukuran in VARIAN_PERSEGI:
+        return ImageOps.fit(gambar, (sisi, sisi), Image.Resampling.LANCZOS)
+    salinan = gambar.copy()
+    salinan.thumbnail((sisi, sisi), Image.Resampling.LANCZOS)
+    return salinan
+
+
+def buat_varian(nama, paksa=False, storage=default_storage):
+    """
+    Buat semua varian (ukuran x format) untuk satu file gambar di storage.
+    Mengembalikan jumlah file varian yang ditulis. Varian yang sudah ada
+    dilewati kecuali `paksa=True`.
+    """
+    if Image is None or not nama:
+        return 0
+    target = [
+        (ukuran, sisi, ekstensi)
+        for ukuran, sisi in UKURAN_VARIAN.items()
+        for ekstensi in FORMAT_VARIAN
+        if paksa or not storage.exists(nama_varian(nama, ukuran, ekstensi))
+    ]
+    if not target:
+        return 0
+
+    with storage.open(nama, 'rb') as berkas:
+        gambar = Image.open(berkas)
+        # Foto dari kamera HP sering hanya diputar lewat tag EXIF
+        gambar = ImageOps.exif_transpose(gambar).convert('RGB')
+
+    ditulis = 0
+    for ukuran, sisi, ekstensi in target:
+        format_pil, opsi = FORMAT_VARIAN[ekstensi]
+        buffer = io.BytesIO()
+        _ubah_ukuran(gambar, ukuran, sisi).save(buffer, format_pil, **opsi)
+        tujuan = nama_varian(nama, ukuran, ekstensi)
+        # storage.save menambah sufiks acak bila nama sudah dipakai; hapus dulu
+        # supaya nama varian tetap deterministik
+        storage.delete(tujuan)
+        storage.save(tujuan, ContentFile(buffer.getvalue()))
+        ditulis += 1
+    return ditulis
+
+
+def jadwalkan_varian(nama):
+    """Buat varian di worker latar belakang setelah transaksi di-commit."""
+    if nama:
+        transaction.on_commit(lambda: worker.submit(buat_varian, nama))
+
+
+def hapus_varian(nama, storage=default_storage):
+    """Hapus semua file varian milik `nama` (file aslinya tidak disentuh)."""
+    for ukuran in UKURAN_VARIAN:
+        for ekstensi in FORMAT_VARIAN:
+            storage.delete(nama_varian(nama, ukuran, ekstensi))
+
+
+def perbarui_varian(instance, nama_field='foto_profil'):
+    """
+    Untuk receiver post_save: jadwalkan varian foto baru dan, jika foto
+    diganti, hapus varian foto lama setelah commit. Nama file saat dimuat
+    dibaca dari `instance._foto_awal` (diisi di `from_db` model). Varian lama
+    dibiarkan bila file tersebut masih dipakai baris lain (mis. default.jpg).
+    """
+    nama = getattr(instance, nama_field).name
+    awal = getattr(instance, '_foto_awal', None)
+    instance._foto_awal = nama
+    if perlu_varian(nama):
+        jadwalkan_varian(nama)
+    if awal and awal != nama:
+        manager = type(instance)._default_manager
+
+        def hapus_jika_yatim():
+            if not manager.filter(**{nama_field: awal}).exists():
+                worker.submit(hapus_varian, awal)
+
+        transaction.on_commit(hapus_jika_yatim)
+
+
+def perlu_varian(nama, storage=default_storage):
+    """True jika file gambar ada tetapi belum punya varian (cukup dicek dari satu varian)."""
+    if not nama:
+        return False
+    ukuran = next(iter(UKURAN_VARIAN))
+    ekstensi = next(iter(FORMAT_VARIAN))
+    return not storage.exists(nama_varian(nama, ukuran, ekstensi)) and storage.exists(nama)
+
+
+class VarianGambarField(serializers.Field):
+    """
+    Field read-only berisi URL varian untuk sebuah ImageField, mis.
+    `foto_profil_varian = VarianGambarField(source='foto_profil')`.
+    Menerima FieldFile maupun nama file (baris dari QuerySet.values()).
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        nama = getattr(value, 'name', value)
+        return url_varian(nama, self.context.get('request'))
@@ -0,0 +1,275 @@
+# pengelolaSiswa/instrumentasi.py
+
+import contextvars
+import logging
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import ExitStack
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INSTRUMENTASI = {
+    'aktif': False,
+    # Tambahkan header Server-Timing (terlihat di tab Network DevTools)
+    'server_timing': True,
+    # Request / query di atas batas ini (ms) ditulis ke log beserta parameternya
+    'request_lambat_ms': 500,
+    'query_lambat_ms': 100,
+    # Jumlah durasi terakhir yang disimpan per endpoint untuk persentil
+    'jendela_histogram': 1000,
+}
+
+# Batas bucket histogram (ms); bucket terakhir menampung sisanya
+BUCKET_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_pengukuran = contextvars.ContextVar('pengukuran_request', default=None)
+_BASE_DIR = str(Path(settings.BASE_DIR).resolve())
+_MODUL_INI = str(Path(__file__).resolve())
+
+
+def konfigurasi():
+    return {**DEFAULT_INSTRUMENTASI, **getattr(settings, 'PERF_INSTRUMENTATION', {})}
+
+
+class Pengukuran:
+    """Waktu (ms) dan jumlah query milik satu request."""
+
+    __slots__ = ('sql_count', 'sql_ms', 'view_ms', 'serializer_ms', 'auth_ms', '_aktif')
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.view_ms = 0.0
+        self.serializer_ms = 0.0
+        self.auth_ms = 0.0
+        # Bagian yang sedang diukur, agar serializer bersarang tidak dihitung dua kali
+        self._aktif = set()
+
+
+def pengukuran_saat_ini():
+    """Pengukuran request yang sedang berjalan, atau None di luar request / saat nonaktif."""
+    return _pengukuran.get()
+
+
+class HistogramBergulir:
+    """Durasi N request terakhir satu endpoint, plus bucket kumulatif sejak proses mulai."""
+
+    def __init__(self, jendela):
+        self.sampel = deque(maxlen=jendela)
+        self.bucket = [0] * (len(BUCKET_MS) + 1)
+        self.jumlah = 0
+        self.total_ms = 0.0
+
+    def catat(self, durasi_ms):
+        self.sampel.append(durasi_ms)
+        self.jumlah += 1
+        self.total_ms += durasi_ms
+        for i, batas in enumerate(BUCKET_MS):
+            if durasi_ms <= batas:
+                self.bucket[i] += 1
+                break
+        else:
+            self.bucket[-1] += 1
+
+    def ringkasan(self):
+        urut = sorted(self.sampel)
+
+        def persentil(p):
+            return round(urut[min(int(len(urut) * p / 100), len(urut) - 1)], 2) if urut else None
+
+        return {
+            'jumlah': self.jumlah,
+            'rata_rata_ms': round(self.total_ms / self.jumlah, 2) if self.jumlah else None,
+            'p50_ms': persentil(50),
+            'p95_ms': persentil(95),
+            'p99_ms': persentil(99),
+            'bucket': dict(zip([f'<={b}ms' for b in BUCKET_MS] + ['lebih'], self.bucket)),
+        }
+
+
+_histogram = {}
+_histogram_lock = threading.Lock()
+
+
+def catat_endpoint(endpoint, durasi_ms, jendela=DEFAULT_INSTRUMENTASI['jendela_histogram']):
+    with _histogram_lock:
+        histogram = _histogram.get(endpoint)
+        if histogram is None:
+            histogram = _histogram[endpoint] = HistogramBergulir(jendela)
+        histogram.catat(durasi_ms)
+
+
+def ringkasan_endpoint():
+    """
+    {'GET api/siswa/': {'jumlah': .., 'p95_ms': .., ...}} untuk proses ini;
+    dibaca lewat GET /api/instrumentasi/ (pengelolaSiswa/views.py).
+    """
+    with _histogram_lock:
+        return {endpoint: h.ringkasan() for endpoint, h in sorted(_histogram.items())}
+
+
+def reset_histogram():
+    with _histogram_lock:
+        _histogram.clear()
+
+
+def _lokasi_pemanggil():
+    """Frame kode proyek terdalam (bukan Django/DRF/modul ini) yang memicu query."""
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(_BASE_DIR) and frame.filename != _MODUL_INI:
+            return f'{frame.filename[len(_BASE_DIR) + 1:]}:{frame.lineno} in {frame.name}'
+    return '?'
+
+
+def _ukur_bagian(fungsi, atribut):
+    """Bungkus fungsi agar durasinya ditambahkan ke Pengukuran.<atribut>."""
+
+    @wraps(fungsi)
+    def pembungkus(*args, **kwargs):
+        ukur = _pengukuran.get()
+        if ukur is None or atribut in ukur._aktif:
+            return fungsi(*args, **kwargs)
+        ukur._aktif.add(atribut)
+        mulai = time.perf_counter()
+        try:
+            return fungsi(*args, **kwargs)
+        finally:
+            setattr(ukur, atribut, getattr(ukur, atribut) + (time.perf_counter() - mulai) * 1000)
+            ukur._aktif.discard(atribut)
+
+    pembungkus._instrumentasi = True
+    return pembungkus
+
+
+def _pasang_pengukur_drf():
+    """
+    DRF tidak punya hook untuk waktu serializer dan autentikasi, jadi method
+    terkait dibungkus sekali saat middleware aktif. Di luar request yang
+    diukur, pembungkus langsung memanggil method asli.
+    """
+    from rest_framework import serializers
+    from rest_framework.views import APIView
+
+    target = [
+        (serializers.Serializer, 'to_representation', 'serializer_ms'),
+        (serializers.ListSerializer, 'to_representation', 'serializer_ms'),
+        (APIView, 'perform_authentication', 'auth_ms'),
+    ]
+    for kelas, nama, atribut in target:
+        fungsi = getattr(kelas, nama)
+        if not getattr(fungsi, '_instrumentasi', False):
+            setattr(kelas, nama, _ukur_bagian(fungsi, atribut))
+
+
+class InstrumentasiMiddleware:
+    """
+    Mengukur setiap request: jumlah dan waktu SQL (lewat execute wrapper),
+    waktu view, serializer, autentikasi JWT dan render. Hasilnya dikirim di
+    header Server-Timing, dicatat ke histogram per endpoint, dan request /
+    query yang lambat ditulis ke log.
+
+    Diaktifkan lewat PERF_INSTRUMENTATION['aktif']; jika nonaktif, middleware
+    dilepas Django saat start (MiddlewareNotUsed) sehingga tidak ada biaya.
+    Letakkan paling atas di MIDDLEWARE agar total waktu mencakup middleware lain.
+
+    Sengaja hanya sync: execute_wrapper terpasang di koneksi milik thread yang
+    menjalankan middleware. Di ASGI, Django menjalankan rantai middleware sync
+    dan view sync di thread yang sama (thread_sensitive), sehingga query tetap
+    terhitung; versi async akan berjalan di thread event loop dan tidak melihat
+    query view sync. Biayanya satu perpindahan thread per request, termasuk
+    untuk view async (stream SSE). Untuk stream, waktu yang diukur hanya
+    sampai header dikirim; isi stream dialirkan oleh handler ASGI.
+    """
+
+    def __init__(self, get_response):
+        config = konfigurasi()
+        if not config['aktif']:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.server_timing = config['server_timing']
+        self.request_lambat_ms = config['request_lambat_ms']
+        self.query_lambat_ms = config['query_lambat_ms']
+        self.jendela = config['jendela_histogram']
+        _pasang_pengukur_drf()
+
+    def __call__(self, request):
+        ukur = Pengukuran()
+        token = _pengukuran.set(ukur)
+        request._instrumentasi_view_mulai = request._instrumentasi_view_selesai = None
+        mulai = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(self._bungkus_query))
+                response = self.get_response(request)
+        finally:
+            _pengukuran.reset(token)
+        selesai = time.perf_counter()
+        total_ms = (selesai - mulai) * 1000
+
+        view_mulai = request._instrumentasi_view_mulai
+        view_selesai = request._instrumentasi_view_selesai or selesai
+        render_ms = (selesai - view_selesai) * 1000
+        if view_mulai is not None:
+            ukur.view_ms = (view_selesai - view_mulai) * 1000
+
+        endpoint = self._endpoint(request)
+        catat_endpoint(endpoint, total_ms, self.jendela)
+
+        if self.server_timing:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={ukur.sql_ms:.1f};desc="{ukur.sql_count} query"',
+                f'auth;dur={ukur.auth_ms:.1f}',
+                f'view;dur={ukur.view_ms:.1f}',
+                f'ser;dur={ukur.serializer_ms:.1f}',
+                f'render;dur={render_ms:.1f}',
+                f'total;dur={total_ms:.1f}',
+            ])
+
+        if total_ms >= self.request_lambat_ms:
+            logger.warning(
+                "Request lambat %s %s: %.1fms (status %s, %d query %.1fms, auth %.1fms, "
+                "view %.1fms, serializer %.1fms, render %.1fms)",
+                request.method, request.get_full_path(), total_ms, response.status_code,
+                ukur.sql_count, ukur.sql_ms, ukur.auth_ms, ukur.view_ms, ukur.serializer_ms, render_ms,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._instrumentasi_view_mulai = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Response DRF dirender setelah view selesai; waktu render dihitung terpisah
+        request._instrumentasi_view_selesai = time.perf_counter()
+        return response
+
+    @staticmethod
+    def _endpoint(request):
+        match = getattr(request, 'resolver_match', None)
+        # Pola route (api/siswa/<pk>/) agar semua id masuk satu histogram
+        route = match.route.lstrip('^').replace('$', '') if match is not None else 'tidak-dikenal'
+        return f'{request.method} {route}'
+
+    def _bungkus_query(self, execute, sql, params, many, context):
+        mulai = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            durasi_ms = (time.perf_counter() - mulai) * 1000
+            ukur = _pengukuran.get()
+            if ukur is not None:
+                ukur.sql_count += 1
+                ukur.sql_ms += durasi_ms
+            if durasi_ms >= self.query_lambat_ms:
+                logger.warning(
+                    "Query lambat %.1fms di %s: %s; params=%r",
+                    durasi_ms, _lokasi_pemanggil(), sql, params,
+                )
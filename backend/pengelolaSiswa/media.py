@@ -0,0 +1,201 @@
+# pengelolaSiswa/media.py
+
+import mimetypes
+import os
+import re
+import time
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.core.signing import Signer
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.permissions import BasePermission
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+# None = stream lewat Django (FileResponse), 'x-sendfile' (Apache/lighttpd)
+# atau 'x-accel-redirect' (nginx, butuh location `internal` ke MEDIA_ROOT)
+SENDFILE_BACKEND = getattr(settings, 'MEDIA_SENDFILE_BACKEND', None)
+ACCEL_REDIRECT_PREFIX = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+# Browser boleh menyimpan file di cache privat, tetapi wajib revalidasi (304 jika tidak berubah)
+CACHE_CONTROL = 'private, max-age=0, must-revalidate'
+UKURAN_BLOK = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Masa berlaku minimal URL bertanda (detik). Kedaluwarsa dibulatkan ke kelipatan
+# nilai ini sehingga URL sebuah file tetap sama selama satu periode dan tetap
+# bisa di-cache browser.
+MASA_BERLAKU_TAUTAN = getattr(settings, 'MEDIA_MASA_BERLAKU_TAUTAN', 600)
+_signer = Signer(salt='pengelolaSiswa.media.tautan')
+
+
+def _tanda_tangan(path, kedaluwarsa):
+    return _signer.signature(f'{path}:{kedaluwarsa}')
+
+
+def url_bertanda(path, request=None):
+    """
+    URL berbatas waktu untuk `path` (mis. /api/siswa/1/berkas/dok_kk/) yang
+    bisa dipakai langsung di <img>/<a> tanpa header Authorization. Yang
+    ditandatangani hanya path ini, bukan token login, sehingga URL yang
+    tercatat di log akses tidak memberi akses ke endpoint lain.
+    """
+    kedaluwarsa = (int(time.time()) // MASA_BERLAKU_TAUTAN + 2) * MASA_BERLAKU_TAUTAN
+    url = f"{path}?{urlencode({'exp': kedaluwarsa, 'ttd': _tanda_tangan(path, kedaluwarsa)})}"
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def tautan_valid(path, kedaluwarsa, tanda_tangan):
+    try:
+        kedaluwarsa = int(kedaluwarsa)
+    except (TypeError, ValueError):
+        return False
+    if kedaluwarsa < time.time() or not tanda_tangan:
+        return False
+    return constant_time_compare(tanda_tangan, _tanda_tangan(path, kedaluwarsa))
+
+
+class TautanBertanda(BasePermission):
+    """Izinkan request yang membawa ?exp=&ttd= valid untuk path ini (lihat url_bertanda)."""
+
+    def has_permission(self, request, view):
+        return tautan_valid(request.path, request.query_params.get('exp'), request.query_params.get('ttd'))
+
+
+class PassthroughRenderer(BaseRenderer):
+    """
+    Renderer `*/*` agar DRF tidak menolak Accept: application/pdf, image/* dsb.
+    View mengembalikan HttpResponse file langsung; renderer ini hanya dipakai
+    untuk respon error, yang tetap dikirim sebagai JSON.
+    """
+    media_type = '*/*'
+    format = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = 'application/json'
+        return JSONRenderer().render(data)
+
+
+def _etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _parse_range(header, ukuran):
+    """
+    (mulai, akhir) inklusif untuk satu rentang `bytes=a-b`, None jika header
+    tidak dipakai (tidak ada / multi-range), atau ValueError jika tidak bisa dipenuhi.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    awal, akhir = match.groups()
+    if not awal and not akhir:
+        return None
+    if not awal:
+        # bytes=-N: N byte terakhir
+        panjang = int(akhir)
+        if panjang == 0:
+            raise ValueError()
+        return max(ukuran - panjang, 0), ukuran - 1
+    mulai = int(awal)
+    selesai = min(int(akhir), ukuran - 1) if akhir else ukuran - 1
+    if mulai >= ukuran or mulai > selesai:
+        raise ValueError()
+    return mulai, selesai
+
+
+def _if_range_cocok(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('W/'):
+        # If-Range hanya boleh memakai perbandingan kuat (RFC 9110 13.1.5)
+        return False
+    if if_range.startswith('"'):
+        return if_range == etag
+    tanggal = parse_http_date_safe(if_range)
+    return tanggal is not None and tanggal >= int(last_modified)
+
+
+def _baca_potongan(path, mulai, panjang):
+    with open(path, 'rb') as berkas:
+        berkas.seek(mulai)
+        while panjang > 0:
+            blok = berkas.read(min(UKURAN_BLOK, panjang))
+            if not blok:
+                break
+            panjang -= len(blok)
+            yield blok
+
+
+def serve_berkas(request, fieldfile, as_attachment=False, nama=None):
+    """
+    Kirim file dari FileField setelah pemanggil memeriksa izin akses.
+    `nama` adalah nama file untuk browser (default: nama file di storage).
+
+    Mendukung ETag/Last-Modified (304), Range (206/416), dan pengalihan
+    transfer ke web server lewat X-Sendfile / X-Accel-Redirect.
+    """
+    if not fieldfile:
+        raise Http404('File tidak ada.')
+    try:
+        path = fieldfile.path
+        stat = os.stat(path)
+    except (NotImplementedError, FileNotFoundError, ValueError):
+        raise Http404('File tidak ditemukan.')
+
+    etag = _etag(stat)
+    nama = nama or os.path.basename(fieldfile.name)
+    content_type = mimetypes.guess_type(nama)[0] or 'application/octet-stream'
+    disposition = 'attachment' if as_attachment else 'inline'
+
+    def header_umum(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Cache-Control'] = CACHE_CONTROL
+        response['Accept-Ranges'] = 'bytes'
+        response['Content-Disposition'] = f"{disposition}; filename*=UTF-8''{quote(nama)}"
+        response['X-Content-Type-Options'] = 'nosniff'
+        return response
+
+    # 304 / 412 untuk request kondisional
+    kondisional = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if kondisional is not None:
+        return header_umum(kondisional)
+
+    if SENDFILE_BACKEND == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+        return header_umum(response)
+    if SENDFILE_BACKEND == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = ACCEL_REDIRECT_PREFIX + quote(fieldfile.name)
+        return header_umum(response)
+
+    ukuran = stat.st_size
+    rentang = None
+    if request.method == 'GET' and _if_range_cocok(request, etag, stat.st_mtime):
+        try:
+            rentang = _parse_range(request.headers.get('Range'), ukuran)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{ukuran}'
+            return header_umum(response)
+
+    if rentang is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+        return header_umum(response)
+
+    mulai, selesai = rentang
+    panjang = selesai - mulai + 1
+    response = StreamingHttpResponse(_baca_potongan(path, mulai, panjang), status=206, content_type=content_type)
+    response['Content-Length'] = str(panjang)
+    response['Content-Range'] = f'bytes {mulai}-{selesai}/{ukuran}'
+    return header_umum(response)
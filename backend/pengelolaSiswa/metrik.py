@@ -0,0 +1,379 @@
+# pengelolaSiswa/metrik.py
+
+import atexit
+import glob
+import ipaddress
+import json
+import os
+import threading
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import OperationalError, connections
+from django.http import HttpResponse
+
+from .instrumentasi import BUCKET_MS
+from .worker import worker
+
+DEFAULT_METRIK = {
+    'aktif': True,
+    # Direktori bersama semua worker gunicorn; tiap proses menulis file sendiri
+    'direktori': Path(settings.BASE_DIR) / 'metrik',
+    # Jeda minimal antar penulisan file proses (detik)
+    'interval_flush': 5,
+    # Jika diisi, /metrics hanya bisa dibaca dengan header Authorization: Bearer <token>.
+    # Jika kosong, hanya alamat loopback/jaringan privat yang boleh membaca.
+    'token': None,
+}
+
+BUCKET_DETIK = tuple(b / 1000 for b in BUCKET_MS)
+
+# nama -> (tipe, keterangan)
+INFO = {
+    'pengelola_http_requests_total': ('counter', 'Jumlah request per route DRF, method dan status.'),
+    'pengelola_http_request_duration_seconds': ('histogram', 'Latensi request per route DRF.'),
+    'pengelola_db_queries_total': ('counter', 'Jumlah query SQL per route DRF.'),
+    'pengelola_db_query_duration_seconds': ('histogram', 'Durasi satu query SQL.'),
+    'pengelola_sqlite_lock_errors_total': ('counter', 'Query gagal karena database SQLite terkunci/busy.'),
+    'pengelola_sqlite_lock_wait_seconds': ('histogram', 'Lama query menunggu lock SQLite sebelum gagal "database is locked".'),
+    'pengelola_statistik_cache_total': ('counter', 'Hasil pembacaan cache statistik (hit/miss/tunggu).'),
+    'pengelola_pendaftaran_siswa_total': ('counter', 'Siswa baru yang tersimpan (pendaftaran).'),
+    'pengelola_worker_antrian': ('gauge', 'Tugas yang menunggu di antrian worker dalam proses.'),
+    'pengelola_worker_berjalan': ('gauge', 'Tugas worker dalam proses yang sedang dijalankan.'),
+}
+
+
+def nilai_gauge():
+    """Gauge proses ini, dibaca saat flush (nama -> nilai)."""
+    return {
+        'pengelola_worker_antrian': worker.jumlah_antrian(),
+        'pengelola_worker_berjalan': worker.sedang_berjalan,
+    }
+
+
+def konfigurasi():
+    return {**DEFAULT_METRIK, **getattr(settings, 'METRIK', {})}
+
+
+class PenyimpanMetrik:
+    """
+    Counter dan histogram milik satu proses. Isinya ditulis berkala ke
+    <direktori>/metrik-<pid>.json; /metrics menggabungkan semua file tersebut
+    sehingga angka mencakup semua worker tanpa layanan eksternal. Setiap
+    proses hanya menulis filenya sendiri (tulis ke file sementara lalu
+    os.replace), jadi tidak perlu lock antar proses.
+    """
+
+    def __init__(self, direktori, interval_flush):
+        self.direktori = Path(direktori)
+        self.interval_flush = interval_flush
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._counter = {}
+        self._histogram = {}
+        self._flush_terakhir = 0.0
+
+    def _cek_fork(self):
+        # Worker gunicorn (--preload) mewarisi isi memori master; jangan dihitung dua kali
+        if self._pid != os.getpid():
+            self._reset()
+
+    def tambah(self, nama, nilai=1, **label):
+        kunci = (nama, tuple(sorted(label.items())))
+        with self._lock:
+            self._cek_fork()
+            self._counter[kunci] = self._counter.get(kunci, 0) + nilai
+
+    def amati(self, nama, nilai, **label):
+        kunci = (nama, tuple(sorted(label.items())))
+        with self._lock:
+            self._cek_fork()
+            data = self._histogram.get(kunci)
+            if data is None:
+                # [bucket..., +Inf, sum]
+                data = self._histogram[kunci] = [0] * (len(BUCKET_DETIK) + 1) + [0.0]
+            for i, batas in enumerate(BUCKET_DETIK):
+                if nilai <= batas:
+                    data[i] += 1
+                    break
+            else:
+                data[len(BUCKET_DETIK)] += 1
+            data[-1] += nilai
+
+    @property
+    def path(self):
+        return self.direktori / f'metrik-{os.getpid()}.json'
+
+    def flush(self, paksa=False):
+        with self._lock:
+            self._cek_fork()
+            sekarang = time.monotonic()
+            if not paksa and sekarang - self._flush_terakhir < self.interval_flush:
+                return
+            self._flush_terakhir = sekarang
+            isi = {
+                'counter': [[nama, list(label), nilai] for (nama, label), nilai in self._counter.items()],
+                'histogram': [[nama, list(label), data] for (nama, label), data in self._histogram.items()],
+                'gauge': [[nama, [], nilai] for nama, nilai in nilai_gauge().items()],
+            }
+        self.direktori.mkdir(parents=True, exist_ok=True)
+        sementara = self.path.with_suffix('.tmp')
+        sementara.write_text(json.dumps(isi))
+        os.replace(sementara, self.path)
+
+    def bersihkan(self):
+        """
+        Hapus file milik proses yang sudah tidak berjalan (sisa server
+        sebelumnya), supaya angkanya tidak ikut dijumlahkan selamanya.
+        """
+        for path in glob.glob(str(self.direktori / 'metrik-*.*')):
+            pid = _pid_file(path)
+            if pid is not None and pid != os.getpid() and not _proses_hidup(pid):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def gabungkan(self):
+        """
+        Jumlahkan file semua proses. Counter dan histogram ikut menghitung
+        proses yang sudah berhenti; gauge hanya dari proses yang masih hidup.
+        """
+        counter, histogram, gauge = {}, {}, {}
+        for path in glob.glob(str(self.direktori / 'metrik-*.json')):
+            try:
+                with open(path) as berkas:
+                    isi = json.load(berkas)
+            except (OSError, ValueError):
+                continue
+            pid = _pid_file(path)
+            if pid is not None and (pid == os.getpid() or _proses_hidup(pid)):
+                for nama, label, nilai in isi.get('gauge', []):
+                    kunci = (nama, tuple(map(tuple, label)))
+                    gauge[kunci] = gauge.get(kunci, 0) + nilai
+            for nama, label, nilai in isi.get('counter', []):
+                kunci = (nama, tuple(map(tuple, label)))
+                counter[kunci] = counter.get(kunci, 0) + nilai
+            for nama, label, data in isi.get('histogram', []):
+                kunci = (nama, tuple(map(tuple, label)))
+                lama = histogram.get(kunci)
+                histogram[kunci] = data if lama is None else [a + b for a, b in zip(lama, data)]
+        return counter, histogram, gauge
+
+
+def _pid_file(path):
+    try:
+        return int(Path(path).name.split('-', 1)[1].split('.', 1)[0])
+    except ValueError:
+        return None
+
+
+def _proses_hidup(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_penyimpan = None
+_config = konfigurasi()
+# Hanya proses server (wsgi.py/asgi.py) yang mencatat metrik. Test runner dan
+# management command (seed_siswa, bench, ...) tidak menulis file apa pun,
+# jadi angkanya tidak tercampur ke /metrics produksi.
+_proses_server = False
+
+
+def mulai_server():
+    """Dipanggil oleh wsgi.py/asgi.py: aktifkan pencatatan dan buang file proses yang sudah mati."""
+    global _proses_server
+    if not _config['aktif']:
+        return
+    _proses_server = True
+    penyimpan().bersihkan()
+
+
+def penyimpan():
+    global _penyimpan
+    if _penyimpan is None:
+        _penyimpan = PenyimpanMetrik(_config['direktori'], _config['interval_flush'])
+        if _proses_server:
+            atexit.register(_penyimpan.flush, paksa=True)
+    return _penyimpan
+
+
+def tambah(nama, nilai=1, **label):
+    """Naikkan counter; hanya di proses server dengan METRIK['aktif'] = True."""
+    if _proses_server:
+        penyimpan().tambah(nama, nilai, **label)
+
+
+def amati(nama, nilai, **label):
+    if _proses_server:
+        penyimpan().amati(nama, nilai, **label)
+
+
+# --- Format teks Prometheus ---
+
+def _escape(nilai):
+    return str(nilai).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label(pasangan):
+    if not pasangan:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pasangan) + '}'
+
+
+def _angka(nilai):
+    return repr(float(nilai)) if isinstance(nilai, float) else str(nilai)
+
+
+def render_prometheus(counter, histogram, gauge=None):
+    baris = []
+    for nama, (tipe, keterangan) in INFO.items():
+        baris.append(f'# HELP {nama} {keterangan}')
+        baris.append(f'# TYPE {nama} {tipe}')
+        if tipe in ('counter', 'gauge'):
+            nilai_tipe = counter if tipe == 'counter' else (gauge or {})
+            for (n, label), nilai in sorted(nilai_tipe.items()):
+                if n == nama:
+                    baris.append(f'{nama}{_label(label)} {_angka(nilai)}')
+            continue
+        for (n, label), data in sorted(histogram.items()):
+            if n != nama:
+                continue
+            kumulatif = 0
+            for batas, jumlah in zip([*map(repr, BUCKET_DETIK), '+Inf'], data[:-1]):
+                kumulatif += jumlah
+                baris.append(f'{nama}_bucket{_label(label + (("le", batas),))} {kumulatif}')
+            baris.append(f'{nama}_sum{_label(label)} {_angka(data[-1])}')
+            baris.append(f'{nama}_count{_label(label)} {kumulatif}')
+
+    # Rasio dihitung dari counter gabungan semua proses (cache LocMem per proses)
+    cache = {dict(label).get('hasil'): nilai for (n, label), nilai in counter.items()
+             if n == 'pengelola_statistik_cache_total'}
+    total = cache.get('hit', 0) + cache.get('miss', 0)
+    baris.append('# HELP pengelola_statistik_cache_hit_ratio Rasio hit cache statistik sejak proses mulai.')
+    baris.append('# TYPE pengelola_statistik_cache_hit_ratio gauge')
+    baris.append(f'pengelola_statistik_cache_hit_ratio {cache.get("hit", 0) / total if total else 0.0!r}')
+    return '\n'.join(baris) + '\n'
+
+
+def _ip_internal(request):
+    try:
+        alamat = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return alamat.is_loopback or alamat.is_private
+
+
+def metrics_view(request):
+    """
+    GET /metrics dalam format teks Prometheus (gabungan semua worker).
+    Tanpa METRIK['token'] hanya bisa dibaca dari loopback/jaringan privat;
+    di belakang reverse proxy semua request terlihat dari IP proxy, jadi
+    isi token untuk deployment seperti itu.
+    """
+    config = konfigurasi()
+    token = config['token']
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    elif not _ip_internal(request):
+        return HttpResponse('Forbidden\n', status=403, content_type='text/plain')
+    if not config['aktif']:
+        return HttpResponse('Metrik tidak aktif.\n', status=404, content_type='text/plain')
+    store = penyimpan()
+    if _proses_server:
+        store.flush(paksa=True)
+    return HttpResponse(
+        render_prometheus(*store.gabungkan()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+# --- Middleware ---
+
+def nama_route(request):
+    """
+    Nama route DRF untuk label, mis. SiswaViewSet.list, SiswaViewSet.berkas,
+    statistik_siswa (@api_view) atau MyTokenObtainPairView.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'tidak-dikenal'
+    fungsi = match.func
+    kelas = getattr(fungsi, 'cls', None)
+    if kelas is None:
+        return match.view_name or fungsi.__name__
+    aksi = getattr(fungsi, 'actions', None)
+    if aksi:
+        return f'{kelas.__name__}.{aksi.get(request.method.lower(), request.method.lower())}'
+    # @api_view memberi nama kelas pembungkus sesuai nama fungsinya
+    return kelas.__name__
+
+
+class MetrikMiddleware:
+    """
+    Mencatat jumlah dan latensi request per route, jumlah/durasi query dan
+    error SQLite terkunci untuk /metrics. Nonaktif lewat METRIK['aktif'].
+
+    Hanya sync, dengan alasan yang sama seperti InstrumentasiMiddleware
+    (execute_wrapper per thread); durasi stream SSE hanya sampai header.
+    """
+
+    def __init__(self, get_response):
+        if not _config['aktif']:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.store = penyimpan()
+
+    def __call__(self, request):
+        if not _proses_server:
+            return self.get_response(request)
+        jumlah_query = [0]
+        mulai = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(self._bungkus_query(jumlah_query)))
+            response = self.get_response(request)
+        durasi = time.perf_counter() - mulai
+
+        route = nama_route(request)
+        self.store.tambah('pengelola_http_requests_total', route=route, method=request.method,
+                          status=response.status_code)
+        self.store.amati('pengelola_http_request_duration_seconds', durasi, route=route)
+        if jumlah_query[0]:
+            self.store.tambah('pengelola_db_queries_total', jumlah_query[0], route=route)
+        self.store.flush()
+        return response
+
+    def _bungkus_query(self, jumlah_query):
+        store = self.store
+
+        def bungkus(execute, sql, params, many, context):
+            jumlah_query[0] += 1
+            mulai = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            except OperationalError as exc:
+                pesan = str(exc).lower()
+                if 'locked' in pesan or 'busy' in pesan:
+                    # Driver sqlite3 menunggu di busy handler sampai timeout
+                    # koneksi habis; durasi query ini adalah lama menunggu lock.
+                    store.tambah('pengelola_sqlite_lock_errors_total')
+                    store.amati('pengelola_sqlite_lock_wait_seconds', time.perf_counter() - mulai)
+                raise
+            finally:
+                store.amati('pengelola_db_query_duration_seconds', time.perf_counter() - mulai)
+
+        return bungkus
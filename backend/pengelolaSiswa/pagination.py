@@ -0,0 +1,221 @@
+# pengelolaSiswa/pagination.py
+
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination berbasis keyset (cursor) tanpa COUNT(*) dan OFFSET.
+
+    Posisi halaman disimpan sebagai nilai kolom `ordering` dari baris terakhir
+    (misalnya `created_at` dan `id`), sehingga halaman ke-5000 sama murahnya
+    dengan halaman pertama selama ada index yang cocok dengan urutannya.
+    Token cursor bersifat opaque (base64 JSON) bagi frontend; token yang
+    rusak atau diubah menghasilkan 400.
+
+    Semua kolom `ordering` sengaja searah (-created_at, -id), bukan
+    (-created_at, id): index pada created_at menyimpan rowid di akhir entri,
+    jadi SQLite cukup membaca index itu mundur tanpa mengurutkan ulang baris
+    yang created_at-nya sama, dan kondisi keyset tetap satu arah.
+
+    Urutan queryset sebelumnya diganti dengan `ordering`, termasuk ranking
+    relevansi dari `?search=` (siswa/search.py): di mode cursor hasil
+    pencarian diurutkan terbaru dulu, bukan paling relevan dulu.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor tidak valid.'
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+
+    def cursor_tidak_valid(self):
+        return ValidationError({self.cursor_query_param: [self.invalid_cursor_message]})
+
+    # --- Token cursor ---
+
+    def encode_cursor(self, position, reverse=False):
+        payload = {'p': position, 'r': 1 if reverse else 0}
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        token = base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            payload = json.loads(raw.decode('utf-8'))
+            position = payload['p']
+            reverse = bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, binascii.Error, UnicodeDecodeError):
+            raise self.cursor_tidak_valid()
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise self.cursor_tidak_valid()
+        return position, reverse
+
+    # --- Keyset ---
+
+    def _fields(self, queryset):
+        fields = []
+        for order in self.ordering:
+            name = order.lstrip('-')
+            field = queryset.model._meta.pk if name == 'pk' else queryset.model._meta.get_field(name)
+            fields.append((name, field, order.startswith('-')))
+        return fields
+
+    def _row_value(self, row, name):
+        if isinstance(row, dict):
+            return row[name]
+        return getattr(row, name)
+
+    def _position_from_row(self, row, fields):
+        position = []
+        for name, field, _ in fields:
+            value = self._row_value(row, name)
+            position.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return position
+
+    def _keyset_filter(self, fields, position, reverse):
+        """
+        Bangun kondisi leksikografis (a, b, ...) > / < posisi cursor,
+        misalnya: created_at < X OR (created_at = X AND id < Y).
+        """
+        try:
+            values = [field.to_python(value) for (_, field, _), value in zip(fields, position)]
+        except Exception:
+            raise self.cursor_tidak_valid()
+
+        condition = Q()
+        equal = Q()
+        for (name, _, descending), value in zip(fields, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        fields = self._fields(queryset)
+        position, reverse = self.decode_cursor(request)
+
+        if reverse:
+            ordering = [o[1:] if o.startswith('-') else f'-{o}' for o in self.ordering]
+        else:
+            ordering = list(self.ordering)
+
+        # order_by() di sini sekaligus membuang urutan lain (misalnya ranking pencarian)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._keyset_filter(fields, position, reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.next_position = self._position_from_row(rows[-1], fields) if rows else None
+        self.previous_position = self._position_from_row(rows[0], fields) if rows else None
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class OptInKeysetPagination(PageNumberPagination):
+    """
+    PageNumberPagination biasa, kecuali client meminta mode cursor lewat
+    `?pagination=cursor` (atau sudah membawa `?cursor=`). Frontend lama yang
+    memakai `?page=` tetap mendapat respon dengan `count` seperti sebelumnya.
+    """
+    mode_query_param = 'pagination'
+    keyset_ordering = ('-created_at', '-id')
+
+    def use_keyset(self, request):
+        params = request.query_params
+        return (
+            params.get(self.mode_query_param) == 'cursor'
+            or KeysetPagination.cursor_query_param in params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = KeysetPagination(self.keyset_ordering)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class SiswaPagination(OptInKeysetPagination):
+    keyset_ordering = ('-created_at', '-id')
+
+
+class NotifikasiPagination(OptInKeysetPagination):
+    keyset_ordering = ('-timestamp', '-id')
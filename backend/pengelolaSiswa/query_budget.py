@@ -0,0 +1,163 @@
+# pengelolaSiswa/query_budget.py
+
+import re
+import time
+import traceback
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver
+
+_BASE_DIR = str(Path(settings.BASE_DIR).resolve())
+# Frame yang selalu ada di setiap query (runner, middleware pengukur) tidak ditampilkan
+_FRAME_DIABAIKAN = {
+    str(Path(__file__).resolve()),
+    str(Path(_BASE_DIR) / 'manage.py'),
+    str(Path(__file__).resolve().with_name('metrik.py')),
+    str(Path(__file__).resolve().with_name('instrumentasi.py')),
+}
+# Daftar placeholder panjang (IN (...), VALUES bulk_create) diringkas di laporan
+_VALUES_BERULANG = re.compile(r'(\([^()]*\), ){5,}')
+_PARAM_BERULANG = re.compile(r'(%s, ){10,}')
+# Route di luar API yang tidak diberi budget
+PREFIX_DIABAIKAN = ('admin/', '^media/')
+
+
+class RekamQuery:
+    """
+    Seperti CaptureQueriesContext, tetapi juga menyimpan parameter dan
+    traceback (hanya frame kode proyek) untuk setiap query sehingga laporan
+    pelanggaran budget langsung menunjukkan baris yang memicu query.
+    """
+
+    def __init__(self, using=None):
+        self.aliases = [using] if using else list(connections)
+        self.queries = []
+
+    def __enter__(self):
+        self._konteks = [connections[alias].execute_wrapper(self._rekam) for alias in self.aliases]
+        for konteks in self._konteks:
+            konteks.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        for konteks in reversed(self._konteks):
+            konteks.__exit__(*exc_info)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def _rekam(self, execute, sql, params, many, context):
+        mulai = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'params': params,
+                'durasi_ms': (time.perf_counter() - mulai) * 1000,
+                'stack': [
+                    frame for frame in traceback.extract_stack()[:-1]
+                    if frame.filename.startswith(_BASE_DIR) and frame.filename not in _FRAME_DIABAIKAN
+                ],
+            })
+
+    def laporan(self):
+        baris = []
+        for nomor, query in enumerate(self.queries, 1):
+            sql = _VALUES_BERULANG.sub(lambda m: f"... {m.group(0).count('(')} baris ..., ", query['sql'])
+            sql = _PARAM_BERULANG.sub(lambda m: f"... {m.group(0).count('%s')} parameter ..., ", sql)
+            baris.append(f"{nomor}. {sql}")
+            baris.append(f"   params={query['params']!r} ({query['durasi_ms']:.2f}ms)")
+            for frame in query['stack']:
+                baris.append(f"     {frame.filename[len(_BASE_DIR) + 1:]}:{frame.lineno} in {frame.name}")
+                if frame.line:
+                    baris.append(f"       {frame.line}")
+        return '\n'.join(baris)
+
+
+def rute_api():
+    """Nama semua route (url_name) di pengelolaSiswa/urls.py, tanpa admin/media."""
+
+    def jalan(patterns, prefix=''):
+        for pattern in patterns:
+            path = prefix + str(pattern.pattern)
+            if path.startswith(PREFIX_DIABAIKAN):
+                continue
+            if isinstance(pattern, URLResolver):
+                yield from jalan(pattern.url_patterns, path)
+            elif isinstance(pattern, URLPattern):
+                yield pattern.name or path
+
+    return set(jalan(get_resolver().url_patterns))
+
+
+class QueryBudgetMixin:
+    """
+    Mixin TestCase untuk membatasi jumlah query per endpoint.
+
+    `budget_query` memetakan url_name (atau (url_name, METHOD) bila method
+    lain pada route yang sama butuh budget berbeda) ke jumlah query maksimal,
+    atau ke dict {page_size: jumlah} untuk endpoint daftar. Jika budget
+    terlampaui, test gagal dengan daftar SQL lengkap beserta traceback pemicunya.
+    """
+
+    budget_query = {}
+
+    def _budget(self, nama, method, page_size=None):
+        budget = self.budget_query.get((nama, method.upper()), self.budget_query.get(nama))
+        if budget is None:
+            raise KeyError(f'Tidak ada budget query untuk {nama} ({method.upper()})')
+        if isinstance(budget, dict):
+            return budget[page_size]
+        return budget
+
+    def rekam_request(self, nama, method, url, data=None, **extra):
+        with RekamQuery() as rekam:
+            response = getattr(self.client, method)(url, data, **extra)
+        self.assertNotEqual(response.status_code, 500, getattr(response, 'content', b'')[:500])
+        match = response.resolver_match
+        self.assertEqual(match.url_name if match else None, nama, f'{url} bukan route {nama}')
+        if getattr(response, 'streaming', False):
+            # Isi respon streaming (ekspor CSV, series statistik) dibaca di dalam rekaman
+            with rekam:
+                b''.join(response.streaming_content)
+        return response, rekam
+
+    def assertBudgetQuery(self, nama, method, url, data=None, page_size=None, **extra):
+        budget = self._budget(nama, method, page_size)
+        response, rekam = self.rekam_request(nama, method, url, data, **extra)
+        if len(rekam) > budget:
+            self.fail(
+                f'{method.upper()} {url} ({nama}) menjalankan {len(rekam)} query, budget {budget}:\n'
+                f'{rekam.laporan()}'
+            )
+        return response
+
+    def assertQueryKonstan(self, nama, method, url, isi_data, data=None, ukuran=(10, 1000), page_size=None, **extra):
+        """
+        Jalankan request yang sama setelah `isi_data(n)` untuk setiap n di
+        `ukuran`; jumlah query tidak boleh bertambah seiring jumlah baris
+        (N+1) dan tidak melebihi budget. `data` boleh berupa fungsi `data(n)`,
+        mis. untuk file impor berisi n baris.
+        """
+        budget = self._budget(nama, method, page_size)
+        hasil = []
+        for jumlah in ukuran:
+            isi_data(jumlah)
+            isi = data(jumlah) if callable(data) else data
+            _, rekam = self.rekam_request(nama, method, url, isi, **extra)
+            hasil.append((jumlah, rekam))
+
+        (n_awal, awal), (n_akhir, akhir) = hasil[0], hasil[-1]
+        if len(akhir) > len(awal):
+            self.fail(
+                f'{method.upper()} {url} ({nama}): jumlah query naik dari {len(awal)} ({n_awal} baris) '
+                f'menjadi {len(akhir)} ({n_akhir} baris), kemungkinan N+1:\n{akhir.laporan()}'
+            )
+        if len(akhir) > budget:
+            self.fail(
+                f'{method.upper()} {url} ({nama}) menjalankan {len(akhir)} query, budget {budget}:\n'
+                f'{akhir.laporan()}'
+            )
@@ -7,6 +7,23 @@ import os
 BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Foto/dokumen siswa diunduh lewat /api/siswa/<id>/berkas/<field>/ (login atau URL
+# bertanda dari serializer, berlaku minimal MEDIA_MASA_BERLAKU_TAUTAN detik).
+# Hanya folder di MEDIA_PUBLIK yang boleh dilayani langsung dari MEDIA_URL
+# (juga di produksi); folder lain di MEDIA_ROOT jangan diekspos. Aktifkan salah satu:
+#   'x-accel-redirect' -> nginx: location /protected-media/ { internal; alias <MEDIA_ROOT>/; }
+#   'x-sendfile'       -> Apache mod_xsendfile / lighttpd
+MEDIA_SENDFILE_BACKEND = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+MEDIA_MASA_BERLAKU_TAUTAN = 600
+MEDIA_PUBLIK = ('foto_profil_admin/', 'varian/foto_profil_admin/')
+# File sementara unggah bertahap (/api/unggah/), dipindah ke MEDIA_ROOT setelah dipakai
+UNGGAH_TEMP_DIR = BASE_DIR / 'tmp_uploads'
+UNGGAH_MAKS_UKURAN = 20 * 1024 * 1024
+UNGGAH_MAKS_CHUNK = 5 * 1024 * 1024
+UNGGAH_KEDALUWARSA_JAM = 24
+# Varian foto profil (sisi terpanjang dalam px), disimpan di MEDIA_ROOT/varian/
+GAMBAR_VARIAN = {'thumb': 96, 'medium': 480}
 
 
 # Quick-start development settings - unsuitable for production
@@ -73,7 +90,13 @@ INSTALLED_APPS = [
     'django_filters',
 ]
 
+# Middleware instrumentasi/metrik hanya sync (lihat docstring masing-masing): di
+# ASGI rantai middleware berjalan di satu thread executor, view async tetap bisa
+# mengalirkan stream SSE tanpa menahan thread.
 MIDDLEWARE = [
+    # Harus paling atas; tidak aktif (dan tanpa biaya) kecuali PERF_INSTRUMENTATION['aktif']
+    'pengelolaSiswa.instrumentasi.InstrumentasiMiddleware',
+    'pengelolaSiswa.metrik.MetrikMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware', # <-- [FIX 2] Pindahkan ke posisi ini
@@ -91,7 +114,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT tanpa query User per request (lihat AUTH_TOKEN)
+        'akun.authentication.JWTClaimAuthentication',
     )
 }
 
@@ -126,6 +150,85 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LocMemCache hanya berlaku per proses; untuk beberapa worker gunicorn gunakan
+# backend bersama (mis. FileBasedCache atau Redis) agar invalidasi terlihat di semua worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pengelola-siswa',
+    }
+}
+
+# Cache respon /api/statistik-siswa/ (detik). LocMemCache hanya milik satu
+# proses: perubahan dari worker lain baru terlihat setelah
+# STATISTIK_CACHE_TIMEOUT_PER_PROSES. Pakai cache bersama (Redis/Memcached)
+# untuk beberapa worker agar invalidasi langsung berlaku di semua proses.
+STATISTIK_CACHE_TIMEOUT = 300
+STATISTIK_CACHE_TIMEOUT_PER_PROSES = 30
+STATISTIK_CACHE_LOCK_TIMEOUT = 10
+
+# Notifikasi admin ditulis oleh worker di dalam proses (pengelolaSiswa/worker.py)
+# agar respon pendaftaran tidak menunggu penulisan notifikasi.
+NOTIFIKASI_FANOUT_ASYNC = False
+# Lama daftar id admin penerima notifikasi disimpan di cache (detik)
+NOTIFIKASI_ADMIN_CACHE_TIMEOUT = 300
+# Counter notifikasi belum dibaca per user; setelah kedaluwarsa dihitung ulang dari database.
+# Dengan LocMemCache (per proses) dipakai NOTIFIKASI_UNREAD_CACHE_TIMEOUT_PER_PROSES.
+NOTIFIKASI_UNREAD_CACHE_TIMEOUT = 60
+NOTIFIKASI_UNREAD_CACHE_TIMEOUT_PER_PROSES = 10
+# Stream notifikasi (SSE, /api/notifikasi/stream/): broker pub/sub dan interval heartbeat (detik)
+NOTIFIKASI_PUBSUB_BROKER = 'notifikasi.pubsub.InProcessBroker'
+NOTIFIKASI_SSE_HEARTBEAT = 15
+# Masa berlaku tiket EventSource (?tiket=, dari /api/notifikasi/tiket_stream/), detik
+NOTIFIKASI_SSE_TIKET_MAX_AGE = 60
+# Pendaftar baru yang masuk dalam jendela ini digabung menjadi satu notifikasi per admin
+NOTIFIKASI_DIGEST = {
+    'aktif': True,
+    'jendela_menit': 10,
+    'tautan_pendaftar_baru': '/siswa?status=BARU',
+}
+# Retensi notifikasi (python manage.py bersihkan_notifikasi, jalankan harian lewat cron)
+NOTIFIKASI_RETENSI = {
+    'hapus_dibaca_setelah_hari': 30,
+    'arsip_setelah_hari': 90,
+    'batch_size': 500,
+    'jeda': 0.05,
+}
+
+# Instrumentasi performa per request (pengelolaSiswa/instrumentasi.py): header
+# Server-Timing, log request/query lambat dan histogram latensi per endpoint
+# (per worker, dibaca admin lewat GET /api/instrumentasi/).
+PERF_INSTRUMENTATION = {
+    'aktif': False,
+    'server_timing': True,
+    'request_lambat_ms': 500,
+    'query_lambat_ms': 100,
+    'jendela_histogram': 1000,
+}
+# Metrik Prometheus di /metrics (pengelolaSiswa/metrik.py). Hanya proses server
+# (wsgi.py/asgi.py) yang mencatat; test dan management command tidak. Tiap worker
+# gunicorn menulis file sendiri di 'direktori' (harus sama untuk semua worker),
+# yang digabung saat scrape; file proses yang sudah mati dibuang saat server mulai.
+# Tanpa 'token' /metrics hanya terbuka untuk loopback/jaringan privat; isi token
+# (Authorization: Bearer) bila aplikasi berada di belakang reverse proxy.
+METRIK = {
+    'aktif': True,
+    'direktori': BASE_DIR / 'metrik',
+    'interval_flush': 5,
+    'token': os.environ.get('METRIK_TOKEN') or None,
+}
+# Autentikasi JWT tanpa query User (akun/authentication.py). Status user (aktif,
+# staff, role, password) di-cache per proses selama 'ttl_status' detik; perubahan
+# dari worker lain baru terlihat setelah itu.
+AUTH_TOKEN = {
+    'tanpa_query': True,
+    'ttl_status': 30,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
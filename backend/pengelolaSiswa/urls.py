@@ -1,5 +1,7 @@
 # file: nama_proyek/urls.py
 
+import os
+
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
@@ -8,6 +10,8 @@ from django.conf.urls.static import static
 # [PENTING] Pastikan Anda import view KUSTOM dari aplikasi 'akun'
 from akun.views import MyTokenObtainPairView 
 from rest_framework_simplejwt.views import TokenRefreshView
+from pengelolaSiswa.metrik import metrics_view
+from pengelolaSiswa.views import instrumentasi_endpoint
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -20,7 +24,14 @@ urlpatterns = [
     path('api/token/', MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
 
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+
+    # Metrik Prometheus (gabungan semua worker)
+    path('metrics', metrics_view, name='metrics'),
+    # Histogram latensi per endpoint dari middleware instrumentasi (admin, per worker)
+    path('api/instrumentasi/', instrumentasi_endpoint, name='instrumentasi'),
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # Hanya folder publik; foto/dokumen siswa selalu lewat /api/siswa/<id>/berkas/<field>/
+    for prefix in settings.MEDIA_PUBLIK:
+        urlpatterns += static(settings.MEDIA_URL + prefix, document_root=os.path.join(settings.MEDIA_ROOT, prefix))
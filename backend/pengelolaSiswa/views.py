@@ -0,0 +1,30 @@
+# pengelolaSiswa/views.py
+
+import os
+
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from . import instrumentasi
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def instrumentasi_endpoint(request):
+    """
+    GET /api/instrumentasi/: histogram latensi per endpoint (jumlah, rata-rata,
+    p50/p95/p99, bucket) dari PERF_INSTRUMENTATION. Histogram disimpan per
+    proses, jadi isinya milik worker yang melayani request ini (lihat `pid`);
+    angka gabungan semua worker ada di /metrics. DELETE mengosongkan histogram
+    worker tersebut, mis. sebelum mengukur ulang setelah perubahan.
+    """
+    if request.method == 'DELETE':
+        instrumentasi.reset_histogram()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response({
+        'aktif': instrumentasi.konfigurasi()['aktif'],
+        'pid': os.getpid(),
+        'endpoint': instrumentasi.ringkasan_endpoint(),
+    })
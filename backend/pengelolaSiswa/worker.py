@@ -0,0 +1,76 @@
+# pengelolaSiswa/worker.py
+
+import atexit
+import logging
+import queue
+import threading
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# Batas waktu menunggu antrian kosong saat proses berhenti (detik)
+SHUTDOWN_TIMEOUT = 5
+
+
+class InProcessWorker:
+    """
+    Antrian tugas sederhana di dalam proses (satu thread daemon).
+    Dipakai untuk pekerjaan sampingan yang tidak perlu ditunggu oleh request,
+    misalnya menulis notifikasi. Tugas hilang jika proses mati mendadak,
+    jadi jangan dipakai untuk pekerjaan yang wajib selesai.
+    """
+
+    def __init__(self, name='pengelola-siswa-worker'):
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        # Jumlah tugas yang sedang dijalankan (0 atau 1 dengan satu thread)
+        self.sedang_berjalan = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        self._ensure_started()
+        self._queue.put((fn, args, kwargs))
+
+    def jumlah_antrian(self):
+        """Perkiraan jumlah tugas yang menunggu (belum diambil thread worker)."""
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+            fn, args, kwargs = item
+            self.sedang_berjalan += 1
+            close_old_connections()
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                logger.exception("Tugas worker %s gagal", getattr(fn, '__name__', fn))
+            finally:
+                close_old_connections()
+                self.sedang_berjalan -= 1
+                self._queue.task_done()
+
+    def join(self):
+        """Tunggu sampai semua tugas di antrian selesai (dipakai di test/command)."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stop(self, timeout=SHUTDOWN_TIMEOUT):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+
+worker = InProcessWorker()
+atexit.register(worker.stop)
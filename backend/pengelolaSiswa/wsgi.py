@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pengelolaSiswa.settings')
 
 application = get_wsgi_application()
+
+# Hanya proses server yang mencatat metrik /metrics (lihat pengelolaSiswa/metrik.py)
+from pengelolaSiswa import metrik  # noqa: E402
+
+metrik.mulai_server()
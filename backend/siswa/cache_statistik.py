@@ -0,0 +1,148 @@
+# siswa/cache_statistik.py
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from pengelolaSiswa import metrik
+from pengelolaSiswa.cache import timeout_cache
+
+# Lama data statistik disimpan di cache (detik). Invalidasi tetap terjadi
+# segera setelah ada perubahan Siswa; timeout hanya batas atas.
+CACHE_TIMEOUT = getattr(settings, 'STATISTIK_CACHE_TIMEOUT', 300)
+# Generasi kunci ikut disimpan di cache. Dengan LocMemCache (per proses)
+# invalidasi tidak sampai ke worker lain, sehingga data di sana bisa basi
+# paling lama sekian detik; lihat pengelolaSiswa/cache.py.
+CACHE_TIMEOUT_PER_PROSES = getattr(settings, 'STATISTIK_CACHE_TIMEOUT_PER_PROSES', 30)
+# Lama maksimal satu request menghitung ulang sementara request lain menunggu
+LOCK_TIMEOUT = getattr(settings, 'STATISTIK_CACHE_LOCK_TIMEOUT', 10)
+POLL_INTERVAL = 0.05
+
+PREFIX = 'statistik'
+KUNCI_GLOBAL = f'{PREFIX}:gen'
+COUNTERS = ('hit', 'miss', 'tunggu')
+
+
+# --- Generasi (versi) kunci ---
+# Setiap kunci data menyertakan nomor generasi. Invalidasi cukup menaikkan
+# generasi, sehingga hasil hitungan yang selesai setelah invalidasi
+# (race dengan write) tersimpan di kunci lama dan tidak pernah dibaca lagi.
+
+def _kunci_gen_periode(tahun_ajaran, semester):
+    return f'{PREFIX}:gen:{tahun_ajaran}:{semester}'
+
+
+def _kunci_gen_bulan(bulan):
+    return f'{PREFIX}:gen:bulan:{bulan:%Y-%m}'
+
+
+def _ambil_generasi(*kunci):
+    nilai = cache.get_many(kunci)
+    hasil = []
+    for k in kunci:
+        if k not in nilai:
+            # Generasi yang hilang (evicted) diganti nilai baru berbasis waktu,
+            # jadi data lama dengan generasi sebelumnya tidak ikut terbaca.
+            cache.add(k, int(time.time() * 1000), None)
+            nilai[k] = cache.get(k)
+        hasil.append(nilai[k])
+    return hasil
+
+
+def _naikkan_generasi(kunci):
+    try:
+        cache.incr(kunci)
+    except ValueError:
+        cache.add(kunci, int(time.time() * 1000), None)
+
+
+# --- Counter hit/miss ---
+
+def _catat(nama):
+    # Counter di cache LocMem hanya milik proses ini; /metrics menjumlahkan semua worker
+    metrik.tambah('pengelola_statistik_cache_total', hasil=nama)
+    kunci = f'{PREFIX}:counter:{nama}'
+    try:
+        cache.incr(kunci)
+    except ValueError:
+        cache.add(kunci, 0, None)
+        cache.incr(kunci)
+
+
+def ringkasan_counter():
+    nilai = cache.get_many([f'{PREFIX}:counter:{nama}' for nama in COUNTERS])
+    hasil = {nama: nilai.get(f'{PREFIX}:counter:{nama}', 0) for nama in COUNTERS}
+    total = hasil['hit'] + hasil['miss']
+    hasil['hit_ratio'] = round(hasil['hit'] / total, 4) if total else None
+    return hasil
+
+
+# --- Ambil dengan proteksi stampede ---
+
+def _ambil_atau_hitung(kunci, hitung):
+    """
+    Kembalikan (nilai, status_cache). Jika cache kosong, hanya satu request yang
+    menghitung ulang (lock lewat cache.add); request lain menunggu hasilnya.
+    """
+    nilai = cache.get(kunci)
+    if nilai is not None:
+        _catat('hit')
+        return nilai, 'HIT'
+
+    kunci_lock = f'{kunci}:lock'
+    if not cache.add(kunci_lock, 1, LOCK_TIMEOUT):
+        batas = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < batas:
+            time.sleep(POLL_INTERVAL)
+            nilai = cache.get(kunci)
+            if nilai is not None:
+                _catat('tunggu')
+                return nilai, 'HIT'
+        # Pemegang lock terlalu lama (atau mati); hitung sendiri
+
+    try:
+        nilai = hitung()
+        cache.set(kunci, nilai, timeout_cache(CACHE_TIMEOUT, CACHE_TIMEOUT_PER_PROSES))
+    finally:
+        cache.delete(kunci_lock)
+    _catat('miss')
+    return nilai, 'MISS'
+
+
+def ambil_statistik(tahun_ajaran, semester, hitung):
+    gen_global, gen_periode = _ambil_generasi(KUNCI_GLOBAL, _kunci_gen_periode(tahun_ajaran, semester))
+    kunci = f'{PREFIX}:data:{tahun_ajaran}:{semester}:{gen_global}:{gen_periode}'
+    return _ambil_atau_hitung(kunci, hitung)
+
+
+def ambil_jumlah_bulan(bulan, hitung):
+    gen_global, gen_bulan = _ambil_generasi(KUNCI_GLOBAL, _kunci_gen_bulan(bulan))
+    kunci = f'{PREFIX}:bulan:{bulan:%Y-%m}:{gen_global}:{gen_bulan}'
+    return _ambil_atau_hitung(kunci, hitung)
+
+
+# --- Invalidasi ---
+
+def periode_bulan(bulan):
+    """Tahun ajaran dan semester tempat bulan tersebut berada."""
+    if bulan.month >= 7:
+        return f'{bulan.year}/{bulan.year + 1}', 'Ganjil'
+    return f'{bulan.year - 1}/{bulan.year}', 'Genap'
+
+
+def invalidasi_bucket(*daftar_kunci):
+    """
+    Invalidasi hanya entri yang terpengaruh oleh bucket rollup
+    (bulan, kelas, jenis_kelamin, status) yang berubah.
+    """
+    for bulan in {kunci[0] for kunci in daftar_kunci if kunci is not None}:
+        tahun_ajaran, semester = periode_bulan(bulan)
+        _naikkan_generasi(_kunci_gen_periode(tahun_ajaran, semester))
+        _naikkan_generasi(_kunci_gen_periode(tahun_ajaran, 'Semua'))
+        _naikkan_generasi(_kunci_gen_bulan(bulan))
+
+
+def invalidasi_semua():
+    """Untuk operasi massal yang menyentuh banyak bucket sekaligus."""
+    _naikkan_generasi(KUNCI_GLOBAL)
@@ -0,0 +1,83 @@
+# siswa/exporter.py
+
+import csv
+import tempfile
+
+from .models import Siswa
+
+try:
+    import openpyxl
+except ImportError:  # XLSX opsional; CSV tetap bisa dipakai
+    openpyxl = None
+
+# Semua kolom Siswa bisa diekspor; field file diekspor sebagai path di storage
+KOLOM_EKSPOR = [field.attname for field in Siswa._meta.concrete_fields]
+CHUNK_SIZE = 2000
+
+
+class KolomTidakDikenal(Exception):
+    pass
+
+
+def pilih_kolom(parameter):
+    """Ubah `?kolom=nama_lengkap,nisn` menjadi daftar kolom yang valid."""
+    if not parameter:
+        return list(KOLOM_EKSPOR)
+    kolom = [nama.strip() for nama in parameter.split(',') if nama.strip()]
+    tidak_dikenal = [nama for nama in kolom if nama not in KOLOM_EKSPOR]
+    if tidak_dikenal:
+        raise KolomTidakDikenal(', '.join(tidak_dikenal))
+    return kolom
+
+
+def _nilai(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def baris(queryset, kolom):
+    """
+    Iterasi baris sebagai tuple dengan QuerySet.iterator(): database dibaca
+    per chunk sehingga memori tetap konstan berapa pun jumlah siswa.
+    """
+    for row in queryset.values_list(*kolom).iterator(chunk_size=CHUNK_SIZE):
+        yield [_nilai(value) for value in row]
+
+
+class _Echo:
+    """Objek mirip file yang langsung mengembalikan apa yang ditulis csv.writer."""
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, kolom):
+    writer = csv.writer(_Echo())
+    yield '\ufeff'  # BOM agar Excel membaca UTF-8 dengan benar
+    yield writer.writerow(kolom)
+    for row in baris(queryset, kolom):
+        yield writer.writerow(row)
+
+
+def tulis_xlsx(queryset, kolom):
+    """
+    Tulis XLSX dengan workbook write-only openpyxl (baris langsung di-flush
+    ke disk) ke file sementara, lalu kembalikan file tersebut untuk di-stream.
+
+    Berbeda dengan CSV, XLSX tidak bisa dialirkan sambil dibaca dari database:
+    file ZIP baru lengkap setelah semua baris ditulis. Memori tetap konstan,
+    tetapi byte pertama baru terkirim setelah seluruh workbook selesai di disk.
+    """
+    if openpyxl is None:
+        raise RuntimeError('Ekspor XLSX membutuhkan paket openpyxl.')
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Siswa')
+    sheet.append(kolom)
+    for row in baris(queryset, kolom):
+        sheet.append(row)
+    berkas = tempfile.TemporaryFile()
+    workbook.save(berkas)
+    berkas.seek(0)
+    return berkas
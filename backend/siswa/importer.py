@@ -0,0 +1,148 @@
+# siswa/importer.py
+
+import csv
+import io
+import os
+from datetime import date, datetime
+from itertools import islice
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from notifikasi.fanout import kirim_ke_admin
+from .models import Siswa
+from .serializers import FILE_FIELDS, UPLOAD_FIELDS, SiswaSerializer
+from . import cache_statistik, statistik
+
+try:
+    import openpyxl
+except ImportError:  # XLSX opsional; CSV tetap bisa dipakai
+    openpyxl = None
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_BATCH_SIZE = 500
+# Batas jumlah error yang dikembalikan di laporan, supaya respon tetap kecil
+MAKS_ERROR = 1000
+
+
+class FormatFileTidakDidukung(Exception):
+    pass
+
+
+def kolom_impor():
+    """Kolom yang bisa diisi dari file: semua field Siswa kecuali id, created_at dan file."""
+    serializer = SiswaSerializer()
+    return [
+        name for name, field in serializer.fields.items()
+        if not field.read_only and name not in FILE_FIELDS and name not in UPLOAD_FIELDS
+    ]
+
+
+def _nilai_sel(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        # NISN/NIK sering terbaca sebagai angka oleh Excel
+        return str(int(value))
+    return str(value).strip()
+
+
+def _baca_csv(berkas):
+    teks = io.TextIOWrapper(berkas, encoding='utf-8-sig', newline='')
+    try:
+        for row in csv.DictReader(teks):
+            yield {(k or '').strip(): (v or '').strip() for k, v in row.items()}
+    finally:
+        # Jangan ikut menutup berkas milik pemanggil
+        teks.detach()
+
+
+def _baca_xlsx(berkas):
+    if openpyxl is None:
+        raise FormatFileTidakDidukung('Impor XLSX membutuhkan paket openpyxl.')
+    workbook = openpyxl.load_workbook(berkas, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_nilai_sel(h) for h in next(rows, ())]
+        for values in rows:
+            if values is None or all(v is None for v in values):
+                continue
+            yield dict(zip(header, (_nilai_sel(v) for v in values)))
+    finally:
+        workbook.close()
+
+
+def baca_baris(berkas, nama_file):
+    """Stream baris file CSV/XLSX sebagai dict, satu per satu."""
+    ext = os.path.splitext(nama_file or '')[1].lower()
+    if ext in ('.xlsx', '.xlsm'):
+        return _baca_xlsx(berkas)
+    if ext in ('.csv', '.txt', ''):
+        return _baca_csv(berkas)
+    raise FormatFileTidakDidukung(f'Format file {ext} tidak didukung, gunakan CSV atau XLSX.')
+
+
+def _potong(iterable, ukuran):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, ukuran))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _kirim_notifikasi_ringkasan(nama_file, berhasil, gagal):
+    title = "Impor Siswa Selesai"
+    content = f"{berhasil} siswa baru diimpor dari {nama_file}."
+    if gagal:
+        content += f" {gagal} baris gagal divalidasi."
+    kirim_ke_admin(title, content)
+
+
+def impor_siswa(berkas, nama_file, chunk_size=DEFAULT_CHUNK_SIZE, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    Impor siswa dari file CSV/XLSX.
+
+    Baris dibaca secara streaming, divalidasi per chunk dengan aturan yang sama
+    seperti SiswaSerializer, lalu disimpan dengan bulk_create (per batch) di
+    dalam satu transaksi per chunk. Signal per baris tidak dijalankan; rollup
+    statistik, cache dan notifikasi diperbarui sekali per chunk/impor.
+    """
+    serializer = SiswaSerializer()
+    kolom = kolom_impor()
+    laporan = {'nama_file': nama_file, 'dry_run': dry_run, 'total': 0, 'berhasil': 0, 'gagal': 0, 'errors': []}
+
+    baris = enumerate(baca_baris(berkas, nama_file), start=2)  # baris 1 = header
+    for chunk in _potong(baris, chunk_size):
+        objs = []
+        for nomor, row in chunk:
+            laporan['total'] += 1
+            data = {k: v for k, v in row.items() if k in kolom and v != ''}
+            try:
+                validated = serializer.run_validation(data)
+            except ValidationError as exc:
+                laporan['gagal'] += 1
+                if len(laporan['errors']) < MAKS_ERROR:
+                    laporan['errors'].append({'baris': nomor, 'errors': exc.detail})
+                continue
+            objs.append(Siswa(**validated))
+
+        if not objs or dry_run:
+            laporan['berhasil'] += len(objs)
+            continue
+
+        with transaction.atomic():
+            Siswa.objects.bulk_create(objs, batch_size=batch_size)
+            statistik.catat_siswa_baru(objs)
+            kunci = {obj.kunci_statistik() for obj in objs}
+            transaction.on_commit(lambda kunci=kunci: cache_statistik.invalidasi_bucket(*kunci))
+        laporan['berhasil'] += len(objs)
+
+    laporan['errors_terpotong'] = laporan['gagal'] > len(laporan['errors'])
+    if laporan['berhasil'] and not dry_run:
+        _kirim_notifikasi_ringkasan(nama_file, laporan['berhasil'], laporan['gagal'])
+    return laporan
@@ -0,0 +1,273 @@
+# siswa/management/commands/bench.py
+
+import io
+import json
+import platform
+import resource
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from akun.authentication import lupakan_status
+from akun.serializers import MyTokenObtainPairSerializer
+from notifikasi.models import Notifikasi
+from siswa.models import Siswa
+from siswa.search import fts_supported, jumlah_terindeks, rebuild_fts_index
+
+BENCH_DIR = Path(settings.BASE_DIR) / 'bench'
+USERNAME = 'bench-admin'
+PASSWORD = 'bench-rahasia-123'
+# Metrik yang dibandingkan dengan baseline; regresi jika naik lebih dari threshold
+METRIK_BANDING = ('p95_ms', 'queries')
+
+
+def _skenario():
+    """(nama, method, path, data, perlu_login, jumlah_request_maksimal)"""
+    nomor = iter(range(10**9))
+
+    def data_pendaftaran():
+        n = next(nomor)
+        return {
+            'nama_lengkap': f'Pendaftar Bench {n}', 'nisn': f'8{n:09d}', 'tempat_lahir': 'Bandung',
+            'tanggal_lahir': '2009-01-01', 'nik': f'3200{n:012d}', 'jenis_kelamin': 'L',
+            'alamat': 'Jl. Bench', 'no_telepon': '0812', 'asal_sekolah': 'SMP Bench',
+            'alamat_asal_sekolah': 'Jl. Bench', 'nama_ayah': 'Ayah', 'nama_ibu': 'Ibu', 'no_telepon_ortu': '0813',
+        }
+
+    cari = iter(['Budi', 'Sari', 'Putri', 'Agus', 'Dewi', 'Hendra', 'Wati', 'Joko'] * 10**6)
+    return [
+        ('siswa_list', 'get', '/api/siswa/', lambda: {}, True, None),
+        ('siswa_list_ringkas', 'get', '/api/siswa/', lambda: {'ringkas': 1}, True, None),
+        ('siswa_list_cursor', 'get', '/api/siswa/', lambda: {'pagination': 'cursor'}, True, None),
+        ('siswa_search_nama', 'get', '/api/siswa/', lambda: {'search': next(cari)}, True, None),
+        ('siswa_search_nisn', 'get', '/api/siswa/', lambda: {'search': '9000'}, True, None),
+        ('siswa_filter', 'get', '/api/siswa/', lambda: {'kelas': 'XI', 'status': 'AKTIF'}, True, None),
+        ('statistik', 'get', '/api/statistik-siswa/', lambda: {}, True, None),
+        ('notifikasi_list', 'get', '/api/notifikasi/', lambda: {}, True, None),
+        # Hashing password sengaja mahal; cukup beberapa request
+        ('token', 'post', '/api/token/', lambda: {'username': USERNAME, 'password': PASSWORD}, False, 10),
+        ('registrasi', 'post', '/api/siswa/', data_pendaftaran, False, None),
+    ]
+
+
+def _persentil(nilai, p):
+    if len(nilai) == 1:
+        return nilai[0]
+    return statistics.quantiles(nilai, n=100, method='inclusive')[p - 1]
+
+
+@contextmanager
+def _database(path):
+    """Arahkan koneksi default ke file SQLite lain selama benchmark."""
+    conn = connections['default']
+    conn.close()
+    semula = conn.settings_dict['NAME']
+    conn.settings_dict['NAME'] = str(path)
+    try:
+        yield
+    finally:
+        conn.close()
+        conn.settings_dict['NAME'] = semula
+
+
+class Command(BaseCommand):
+    help = 'Benchmark endpoint API pada database terpisah berisi 1k/100k/1M siswa'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,100000,1000000', help='Jumlah siswa per dataset, dipisah koma')
+        parser.add_argument('--requests', type=int, default=50, help='Jumlah request terukur per skenario')
+        parser.add_argument('--warmup', type=int, default=3, help='Request pemanasan per skenario (tidak diukur)')
+        parser.add_argument('--skenario', default='', help='Hanya jalankan skenario tertentu, dipisah koma')
+        parser.add_argument('--db-dir', default=None, help='Simpan database dataset di sini agar bisa dipakai ulang')
+        parser.add_argument('--output', default=str(BENCH_DIR / 'hasil.json'), help='File JSON hasil benchmark')
+        parser.add_argument('--baseline', default=str(BENCH_DIR / 'baseline.json'), help='File JSON baseline')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Batas kenaikan relatif (0.2 = 20%%)')
+        parser.add_argument(
+            '--simpan-baseline', action='store_true',
+            help='Tulis hasil ini sebagai baseline baru (wajib jika baseline belum ada)',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Benchmark ini menyiapkan database SQLite terpisah per dataset.')
+        try:
+            sizes = [int(s) for s in options['sizes'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError('--sizes harus berupa angka, mis. 1000,100000')
+        pilihan = {s.strip() for s in options['skenario'].split(',') if s.strip()}
+        skenario = [s for s in _skenario() if not pilihan or s[0] in pilihan]
+        if not skenario:
+            raise CommandError(f"Skenario tidak dikenal: {options['skenario']}")
+
+        hasil = {
+            'meta': {
+                'waktu': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'requests': options['requests'],
+            },
+            'hasil': {},
+        }
+
+        setup_test_environment()
+        tmp = None
+        try:
+            if options['db_dir']:
+                db_dir = Path(options['db_dir'])
+                db_dir.mkdir(parents=True, exist_ok=True)
+            else:
+                tmp = tempfile.TemporaryDirectory(prefix='bench-')
+                db_dir = Path(tmp.name)
+            for size in sizes:
+                with _database(db_dir / f'bench-{size}.sqlite3'):
+                    self._siapkan_dataset(size)
+                    hasil['hasil'][str(size)] = self._jalankan(size, skenario, options)
+        finally:
+            teardown_test_environment()
+            if tmp is not None:
+                tmp.cleanup()
+
+        hasil['meta']['max_rss_kib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        output = Path(options['output'])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(hasil, indent=2))
+        self.stdout.write(f"Hasil ditulis ke {output}")
+
+        baseline = Path(options['baseline'])
+        if options['simpan_baseline']:
+            baseline.parent.mkdir(parents=True, exist_ok=True)
+            baseline.write_text(json.dumps(hasil, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Baseline disimpan ke {baseline}"))
+        elif not baseline.exists():
+            # Tanpa baseline gerbang regresi tidak berjalan; jangan diam-diam dianggap lulus
+            self.stderr.write(self.style.WARNING(
+                f"Baseline {baseline} tidak ditemukan. Jalankan dengan --simpan-baseline untuk membuatnya."
+            ))
+            raise CommandError("❌ Tidak bisa memeriksa regresi tanpa baseline.")
+        else:
+            self._bandingkan(hasil, json.loads(baseline.read_text()), options['threshold'])
+
+    # --- Dataset ---
+
+    def _siapkan_dataset(self, size):
+        call_command('migrate', verbosity=0)
+        sudah_ada = Siswa.objects.count()
+        if sudah_ada < size:
+            self.stdout.write(f"Menyiapkan dataset {size} siswa (sudah ada {sudah_ada})...")
+            call_command('seed_siswa', count=size - sudah_ada, stdout=io.StringIO())
+        # Skenario pencarian harus berjalan di index FTS yang terisi; database dari
+        # --db-dir lama bisa saja dibuat saat trigger FTS belum ada
+        if fts_supported() and jumlah_terindeks() != Siswa.objects.count():
+            self.stdout.write("Index pencarian tidak sinkron, dibangun ulang...")
+            rebuild_fts_index()
+
+        user, dibuat = User.objects.get_or_create(username=USERNAME, defaults={'is_staff': True})
+        if dibuat:
+            user.set_password(PASSWORD)
+            user.save()
+            # Notifikasi sebanding dengan dataset agar daftar notifikasi ikut terukur
+            Notifikasi.objects.bulk_create([
+                Notifikasi(user=user, title='Pendaftar Baru!', content=f'Notifikasi bench {i}', is_read=i % 3 == 0)
+                for i in range(min(max(size // 10, 50), 100_000))
+            ], batch_size=2000)
+        cache.clear()
+        # Status token di cache proses berasal dari database ukuran sebelumnya
+        lupakan_status()
+        self._token = str(MyTokenObtainPairSerializer.get_token(user).access_token)
+
+    # --- Pengukuran ---
+
+    def _request(self, client, method, path, data, perlu_login):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {self._token}'} if perlu_login else {}
+        if method == 'get':
+            return client.get(path, data, **headers)
+        return client.post(path, data, content_type='application/json', **headers)
+
+    def _jalankan(self, size, skenario, options):
+        client = Client()
+        hasil = {}
+        self.stdout.write(f"\nDataset {size} siswa")
+        self.stdout.write(f"  {'skenario':<22}{'p50':>9}{'p95':>9}{'p99':>9}{'query':>7}{'peak KiB':>10}")
+        for nama, method, path, data, perlu_login, maksimal in skenario:
+            jumlah = min(options['requests'], maksimal or options['requests'])
+            for _ in range(options['warmup']):
+                self._request(client, method, path, data(), perlu_login)
+
+            latensi = []
+            query = []
+            status_code = None
+            for _ in range(jumlah):
+                with CaptureQueriesContext(connection) as ctx:
+                    mulai = time.perf_counter()
+                    response = self._request(client, method, path, data(), perlu_login)
+                    latensi.append((time.perf_counter() - mulai) * 1000)
+                query.append(len(ctx.captured_queries))
+                status_code = response.status_code
+
+            # Memori diukur terpisah karena tracemalloc memperlambat request
+            tracemalloc.start()
+            self._request(client, method, path, data(), perlu_login)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            hasil[nama] = {
+                'status': status_code,
+                'requests': jumlah,
+                'p50_ms': round(_persentil(latensi, 50), 3),
+                'p95_ms': round(_persentil(latensi, 95), 3),
+                'p99_ms': round(_persentil(latensi, 99), 3),
+                'mean_ms': round(statistics.fmean(latensi), 3),
+                'queries': max(query),
+                'peak_kib': round(peak / 1024, 1),
+            }
+            r = hasil[nama]
+            gaya = self.style.ERROR if status_code >= 400 else (lambda teks: teks)
+            self.stdout.write(gaya(
+                f"  {nama:<22}{r['p50_ms']:>8.1f}ms{r['p95_ms']:>7.1f}ms{r['p99_ms']:>7.1f}ms"
+                f"{r['queries']:>7}{r['peak_kib']:>10.1f}"
+                + (f"  (HTTP {status_code})" if status_code >= 400 else '')
+            ))
+        return hasil
+
+    # --- Baseline ---
+
+    def _bandingkan(self, hasil, baseline, threshold):
+        regresi = []
+        tanpa_baseline = []
+        for size, per_skenario in hasil['hasil'].items():
+            for nama, metrik in per_skenario.items():
+                dasar = baseline.get('hasil', {}).get(size, {}).get(nama)
+                if not dasar:
+                    tanpa_baseline.append(f"{size} {nama}")
+                    continue
+                for kunci in METRIK_BANDING:
+                    lama, baru = dasar.get(kunci), metrik.get(kunci)
+                    if lama is None or baru is None:
+                        continue
+                    if baru > lama * (1 + threshold) and baru - lama > (1 if kunci == 'queries' else 0.5):
+                        regresi.append(f"{size} {nama} {kunci}: {lama} -> {baru}")
+
+        if tanpa_baseline:
+            self.stderr.write(self.style.WARNING(
+                f"Tidak ada di baseline (tidak dibandingkan): {', '.join(tanpa_baseline)}"
+            ))
+        if len(tanpa_baseline) == sum(len(per_skenario) for per_skenario in hasil['hasil'].values()):
+            raise CommandError("❌ Tidak ada dataset/skenario yang bisa dibandingkan dengan baseline.")
+        if regresi:
+            for baris in regresi:
+                self.stderr.write(f"  {baris}")
+            raise CommandError(f"❌ {len(regresi)} regresi melebihi {threshold:.0%} dibanding baseline.")
+        self.stdout.write(self.style.SUCCESS(f"✅ Tidak ada regresi dibanding baseline (threshold {threshold:.0%})."))
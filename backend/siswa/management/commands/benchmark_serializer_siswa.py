@@ -0,0 +1,97 @@
+# siswa/management/commands/benchmark_serializer_siswa.py
+
+import random
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from siswa.models import Siswa
+from siswa.serializers import SiswaSerializer, SiswaListSerializer, serialize_values
+
+KOLOM_RINGKAS = ['id', 'nama_lengkap', 'nisn', 'kelas', 'status', 'jenis_kelamin']
+
+
+class Command(BaseCommand):
+    help = 'Membandingkan biaya serialisasi per baris untuk satu halaman daftar siswa'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Jumlah baris dalam satu halaman')
+        parser.add_argument('--repeat', type=int, default=5, help='Jumlah pengulangan, diambil yang tercepat')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+
+        # Data dibuat di dalam transaksi lalu di-rollback, database tidak berubah
+        with transaction.atomic():
+            self._buat_data(rows)
+            hasil = self._jalankan(rows, repeat)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Benchmark serialisasi {rows} baris (terbaik dari {repeat}x):")
+        baseline = hasil[0][1]
+        for nama, durasi in hasil:
+            per_baris = durasi / rows * 1_000_000
+            self.stdout.write(
+                f"  {nama:<45} {durasi * 1000:8.1f} ms  {per_baris:7.1f} µs/baris  "
+                f"({baseline / durasi:4.1f}x)"
+            )
+
+    def _buat_data(self, rows):
+        dokumen = 'dokumen/kk/dummy.pdf'
+        Siswa.objects.bulk_create([
+            Siswa(
+                nama_lengkap=f'Siswa Benchmark {i}',
+                nisn=f'{9_000_000_000 + i}',
+                tempat_lahir='Bandung',
+                tanggal_lahir=date(2008, 1, 1),
+                nik=f'{3_273_000_000_000_000 + i}',
+                jenis_kelamin=random.choice(['L', 'P']),
+                alamat='Jl. Benchmark',
+                no_telepon='0812000000',
+                asal_sekolah='SMP Benchmark',
+                alamat_asal_sekolah='Jl. Benchmark',
+                nama_ayah='Ayah',
+                nama_ibu='Ibu',
+                no_telepon_ortu='0812000001',
+                kelas=random.choice(['X', 'XI', 'XII']),
+                foto_profil='foto_profil/dummy.jpg',
+                dok_kk=dokumen, dok_akte=dokumen, dok_ijazah=dokumen, dok_ktp_ortu=dokumen,
+            )
+            for i in range(rows)
+        ], batch_size=500)
+
+    def _ukur(self, fungsi, repeat):
+        terbaik = None
+        for _ in range(repeat):
+            mulai = time.perf_counter()
+            fungsi()
+            durasi = time.perf_counter() - mulai
+            terbaik = durasi if terbaik is None else min(terbaik, durasi)
+        return terbaik
+
+    def _jalankan(self, rows, repeat):
+        factory = APIRequestFactory()
+        request = Request(factory.get('/api/siswa/'))
+        request_ringkas = Request(factory.get('/api/siswa/', {'fields': ','.join(KOLOM_RINGKAS)}))
+        queryset = Siswa.objects.order_by('-created_at', '-id')[:rows]
+
+        def penuh():
+            SiswaSerializer(list(queryset), many=True, context={'request': request}).data
+
+        def ringkas_instance():
+            SiswaListSerializer(list(queryset), many=True, context={'request': request}).data
+
+        def ringkas_values():
+            serializer = SiswaListSerializer(context={'request': request_ringkas})
+            serialize_values(serializer, list(queryset.values(*KOLOM_RINGKAS)))
+
+        return [
+            ('SiswaSerializer (__all__, instance)', self._ukur(penuh, repeat)),
+            ('SiswaListSerializer (?ringkas=1, instance)', self._ukur(ringkas_instance, repeat)),
+            ('values() fast path (?fields=...)', self._ukur(ringkas_values, repeat)),
+        ]
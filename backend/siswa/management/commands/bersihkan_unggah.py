@@ -0,0 +1,23 @@
+# siswa/management/commands/bersihkan_unggah.py
+
+from django.core.management.base import BaseCommand
+
+from siswa.storage import TENGGANG_BLOB_YATIM, bersihkan_blob_yatim
+from siswa.unggah import KEDALUWARSA, bersihkan_file_yatim, bersihkan_kedaluwarsa
+
+
+class Command(BaseCommand):
+    help = (
+        'Hapus sesi unggah bertahap yang kedaluwarsa beserta file sementaranya, '
+        'dan blob dokumen yang tidak direferensikan siswa mana pun'
+    )
+
+    def handle(self, *args, **options):
+        jumlah = bersihkan_kedaluwarsa()
+        yatim = bersihkan_file_yatim()
+        blob = bersihkan_blob_yatim()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {jumlah} sesi unggah yang tidak aktif lebih dari {KEDALUWARSA} dihapus, "
+            f"{yatim} file sementara yang tidak terpakai dibuang, "
+            f"{blob} blob dokumen tanpa referensi (lebih dari {TENGGANG_BLOB_YATIM}) dihapus."
+        ))
@@ -0,0 +1,53 @@
+# siswa/management/commands/buat_varian_gambar.py
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from akun.models import Profile
+from pengelolaSiswa.gambar import buat_varian
+from siswa.models import Siswa
+
+
+def _proses(argumen):
+    nama, paksa = argumen
+    try:
+        return nama, buat_varian(nama, paksa=paksa), None
+    except Exception as exc:
+        return nama, 0, f'{type(exc).__name__}: {exc}'
+
+
+class Command(BaseCommand):
+    help = 'Buat varian thumbnail/medium (WebP & JPEG) untuk foto profil siswa dan akun yang sudah ada'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Jumlah proses paralel')
+        parser.add_argument('--paksa', action='store_true', help='Tulis ulang varian yang sudah ada')
+
+    def handle(self, *args, **options):
+        nama_file = sorted(
+            set(Siswa.objects.exclude(foto_profil='').exclude(foto_profil=None).values_list('foto_profil', flat=True))
+            | set(Profile.objects.exclude(foto_profil='').exclude(foto_profil=None).values_list('foto_profil', flat=True))
+        )
+        self.stdout.write(f"Memproses {len(nama_file)} foto dengan {options['workers']} proses...")
+
+        # Proses anak hanya membaca/menulis storage; jangan wariskan koneksi database
+        connections.close_all()
+        mulai = time.monotonic()
+        ditulis = gagal = 0
+        with ProcessPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            tugas = ((nama, options['paksa']) for nama in nama_file)
+            for nama, jumlah, error in executor.map(_proses, tugas, chunksize=16):
+                ditulis += jumlah
+                if error:
+                    gagal += 1
+                    self.stderr.write(f"  ❌ {nama}: {error}")
+        durasi = time.monotonic() - mulai
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {ditulis} file varian ditulis dari {len(nama_file)} foto "
+            f"({gagal} gagal) dalam {durasi:.1f} detik."
+        ))
@@ -0,0 +1,101 @@
+# siswa/management/commands/dedup_dokumen.py
+
+import hashlib
+import os
+import shutil
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from siswa.models import DokumenBlob, Siswa
+from siswa.storage import BLOB_DIR, DOKUMEN_FIELDS, dokumen_storage, hitung_ulang_referensi, nama_blob
+
+
+def _hash_file(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as berkas:
+        for blok in iter(lambda: berkas.read(1024 * 1024), b''):
+            sha.update(blok)
+    return sha.hexdigest()
+
+
+def _format_byte(jumlah):
+    for satuan in ('B', 'KB', 'MB', 'GB'):
+        if abs(jumlah) < 1024 or satuan == 'GB':
+            return f'{jumlah:.1f} {satuan}' if satuan != 'B' else f'{jumlah} B'
+        jumlah /= 1024
+
+
+class Command(BaseCommand):
+    help = 'Pindahkan dokumen siswa lama ke storage content-addressed dan hapus file duplikat'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Hanya hitung, tidak mengubah file/database')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        storage = dokumen_storage()
+
+        # 1. Hash setiap path lama (sekali per path unik) dan siapkan blob-nya
+        peta = {}            # path lama -> path blob
+        ukuran_lama = 0      # total byte file lama yang akan dihapus
+        ukuran_blob_baru = 0
+        blob_ada = set()
+        # Isi yang sama selalu diarahkan ke satu blob, apa pun ekstensinya
+        blob_per_hash = dict(DokumenBlob.objects.values_list('sha256', 'nama'))
+        hilang = 0
+        rows = list(Siswa.objects.values_list('id', *DOKUMEN_FIELDS))
+        for row in rows:
+            for nama in row[1:]:
+                if not nama or nama.startswith(f'{BLOB_DIR}/') or nama in peta:
+                    continue
+                path = storage.path(nama)
+                if not os.path.exists(path):
+                    hilang += 1
+                    continue
+                sha256 = _hash_file(path)
+                blob = blob_per_hash.setdefault(sha256, nama_blob(sha256, nama))
+                peta[nama] = blob
+                ukuran_lama += os.path.getsize(path)
+                if blob in blob_ada or storage.exists(blob):
+                    blob_ada.add(blob)
+                    continue
+                blob_ada.add(blob)
+                ukuran_blob_baru += os.path.getsize(path)
+                if not dry_run:
+                    os.makedirs(os.path.dirname(storage.path(blob)), exist_ok=True)
+                    try:
+                        # Hardlink: blob baru tidak memakan ruang tambahan
+                        os.link(path, storage.path(blob))
+                    except OSError:
+                        shutil.copy2(path, storage.path(blob))
+
+        # 2. Arahkan data siswa ke blob, lalu hapus file lama setelah commit
+        diubah = []
+        for row in rows:
+            perubahan = {
+                name: peta[nama] for name, nama in zip(DOKUMEN_FIELDS, row[1:]) if nama in peta
+            }
+            if perubahan:
+                diubah.append((row[0], perubahan))
+
+        if not dry_run:
+            with transaction.atomic():
+                for siswa_id, perubahan in diubah:
+                    # update() tidak memicu signal Siswa, referensi dihitung ulang di bawah
+                    Siswa.objects.filter(pk=siswa_id).update(**perubahan)
+                hitung_ulang_referensi()
+            for nama in peta:
+                storage.delete(nama)
+
+        dihemat = ukuran_lama - ukuran_blob_baru
+        self.stdout.write(f"  File lama diproses   : {len(peta)}")
+        self.stdout.write(f"  Blob unik            : {len(blob_ada)}")
+        self.stdout.write(f"  Siswa diperbarui     : {len(diubah)}")
+        if hilang:
+            self.stdout.write(self.style.WARNING(f"  File tidak ditemukan : {hilang}"))
+        self.stdout.write(f"  Ruang dihemat        : {_format_byte(dihemat)} ({dihemat} byte)")
+        if dry_run:
+            self.stdout.write(self.style.WARNING("Dry run: tidak ada data yang diubah."))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Deduplikasi dokumen selesai."))
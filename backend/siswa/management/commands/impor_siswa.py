@@ -0,0 +1,43 @@
+# siswa/management/commands/impor_siswa.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from siswa.importer import DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_SIZE, FormatFileTidakDidukung, impor_siswa
+
+
+class Command(BaseCommand):
+    help = 'Impor massal data siswa dari file CSV/XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path file CSV atau XLSX')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Jumlah baris per chunk validasi/transaksi')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Jumlah baris per INSERT bulk_create')
+        parser.add_argument('--dry-run', action='store_true', help='Hanya validasi, tanpa menyimpan data')
+
+    def handle(self, *args, **options):
+        mulai = time.monotonic()
+        try:
+            with open(options['path'], 'rb') as berkas:
+                laporan = impor_siswa(
+                    berkas, options['path'],
+                    chunk_size=options['chunk_size'], batch_size=options['batch_size'],
+                    dry_run=options['dry_run'],
+                )
+        except (OSError, FormatFileTidakDidukung) as exc:
+            raise CommandError(str(exc))
+
+        for error in laporan['errors']:
+            pesan = '; '.join(
+                f"{field}: {' '.join(str(e) for e in errors)}" for field, errors in error['errors'].items()
+            )
+            self.stdout.write(self.style.WARNING(f"  Baris {error['baris']}: {pesan}"))
+        if laporan['errors_terpotong']:
+            self.stdout.write(self.style.WARNING("  (daftar error dipotong)"))
+
+        aksi = 'lolos validasi' if laporan['dry_run'] else 'diimpor'
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {laporan['berhasil']} dari {laporan['total']} baris {aksi}, "
+            f"{laporan['gagal']} gagal ({time.monotonic() - mulai:.2f} detik)."
+        ))
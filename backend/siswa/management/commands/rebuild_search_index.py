@@ -0,0 +1,33 @@
+# siswa/management/commands/rebuild_search_index.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from siswa.search import drop_fts_schema, fts_supported, rebuild_fts_index
+
+
+class Command(BaseCommand):
+    help = 'Membangun ulang index pencarian FTS5 (trigram) untuk data siswa'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recreate', action='store_true',
+            help='Hapus virtual table dan trigger lalu buat ulang dari awal',
+        )
+
+    def handle(self, *args, **options):
+        if not fts_supported(connection):
+            raise CommandError('Database ini tidak mendukung FTS5 dengan tokenizer trigram.')
+
+        mulai = time.monotonic()
+        with transaction.atomic():
+            if options['recreate']:
+                drop_fts_schema(connection)
+            jumlah = rebuild_fts_index(connection)
+        durasi = time.monotonic() - mulai
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Index pencarian siswa dibangun ulang: {jumlah} baris dalam {durasi:.2f} detik."
+        ))
@@ -0,0 +1,37 @@
+# siswa/management/commands/rebuild_statistik.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from siswa import statistik
+
+
+class Command(BaseCommand):
+    help = 'Membangun ulang tabel rollup statistik siswa dan memeriksa konsistensinya'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Hanya bandingkan rollup dengan agregasi langsung, tanpa membangun ulang',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            mulai = time.monotonic()
+            jumlah_bucket = statistik.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Rollup statistik dibangun ulang: {jumlah_bucket} bucket "
+                f"dalam {time.monotonic() - mulai:.2f} detik."
+            ))
+
+        selisih = statistik.periksa_konsistensi()
+        if selisih:
+            for (bulan, kelas, jenis_kelamin, status), rollup, sebenarnya in selisih:
+                self.stdout.write(
+                    f"  {bulan:%Y-%m} {kelas}/{jenis_kelamin}/{status}: "
+                    f"rollup={rollup}, sebenarnya={sebenarnya}"
+                )
+            raise CommandError(f"Rollup statistik tidak konsisten pada {len(selisih)} bucket.")
+
+        self.stdout.write(self.style.SUCCESS("✅ Rollup statistik konsisten dengan data siswa."))
@@ -1,50 +1,252 @@
 # siswa/management/commands/seed_siswa.py
 
+import os
 import random
-from django.core.management.base import BaseCommand
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Max, Q
+from django.db.models.signals import post_save, pre_save
+from django.utils import timezone
 from faker import Faker
+
+from notifikasi.fanout import kirim_ke_admin
+from siswa import cache_statistik, statistik
 from siswa.models import Siswa
 
+# Bobot sebaran data agar statistik terlihat realistis
+BOBOT_KELAS = {'X': 40, 'XI': 32, 'XII': 28}
+BOBOT_STATUS = {'BARU': 15, 'AKTIF': 65, 'LULUS': 12, 'PINDAH': 5, 'DROPOUT': 3}
+# Sebagian besar pendaftaran terjadi di awal tahun ajaran (Juli-Agustus)
+PROPORSI_MUSIM_PENDAFTARAN = 0.7
+
+# NISN/NIK dummy dibentuk dari nomor urut yang sama: '9' + 9 digit dan '3273' + 12 digit
+POLA_NISN_SEED = r'^9[0-9]{9}$'
+
+
+def _nisn(nomor):
+    return f"9{nomor:09d}"
+
+
+def _nik(nomor):
+    return f"3273{nomor:012d}"
+
+# Faker lambat untuk nilai seperti alamat; setiap proses membuat kumpulan nilai
+# sekali di awal lalu baris-baris diambil acak dari kumpulan tersebut.
+UKURAN_KUMPULAN = 2000
+_kumpulan = None
+
+
+def _init_worker(seed):
+    global _kumpulan
+    fake = Faker('id_ID')
+    fake.seed_instance(seed)
+    _kumpulan = {
+        'nama_l': [fake.first_name_male() for _ in range(UKURAN_KUMPULAN)],
+        'nama_p': [fake.first_name_female() for _ in range(UKURAN_KUMPULAN)],
+        'nama_belakang': [fake.last_name() for _ in range(UKURAN_KUMPULAN)],
+        'kota': [fake.city() for _ in range(UKURAN_KUMPULAN // 4)],
+        'alamat': [fake.address() for _ in range(UKURAN_KUMPULAN)],
+        'telepon': [fake.phone_number() for _ in range(UKURAN_KUMPULAN)],
+    }
+
+
+def _waktu_daftar(rng, tahun_mulai, tahun_akhir, batas):
+    """Waktu acak di dalam tahun ajaran tahun_mulai/.. s.d. tahun_akhir/.., tidak melewati `batas`."""
+    tahun = rng.randint(tahun_mulai, tahun_akhir)
+    if rng.random() < PROPORSI_MUSIM_PENDAFTARAN:
+        awal, akhir = datetime(tahun, 7, 1), datetime(tahun, 9, 1)
+    else:
+        awal, akhir = datetime(tahun, 7, 1), datetime(tahun + 1, 7, 1)
+    akhir = min(akhir, batas)
+    detik = rng.randrange(max(int((akhir - awal).total_seconds()), 1))
+    return timezone.make_aware(awal + timedelta(seconds=detik))
+
+
+def _buat_baris(argumen):
+    """Dijalankan di proses anak: hasilkan satu potongan baris sebagai dict."""
+    mulai, jumlah, tahun_mulai, tahun_akhir, batas, seed = argumen
+    k = _kumpulan
+    # Seed per potongan: hasil sama untuk --seed yang sama, berapa pun jumlah proses
+    rng = random.Random(seed + mulai)
+    kelas = list(BOBOT_KELAS)
+    bobot_kelas = list(BOBOT_KELAS.values())
+    status = list(BOBOT_STATUS)
+    bobot_status = list(BOBOT_STATUS.values())
+
+    rows = []
+    for nomor in range(mulai, mulai + jumlah):
+        jenis_kelamin = rng.choice('LP')
+        nama_depan = rng.choice(k['nama_l'] if jenis_kelamin == 'L' else k['nama_p'])
+        rows.append(dict(
+            created_at=_waktu_daftar(rng, tahun_mulai, tahun_akhir, batas),
+            nama_lengkap=f"{nama_depan} {rng.choice(k['nama_belakang'])}",
+            # NISN/NIK unik dari nomor urut, tanpa fake.unique yang tidak bisa dibagi antar proses
+            nisn=_nisn(nomor),
+            tempat_lahir=rng.choice(k['kota']),
+            tanggal_lahir=date(rng.randint(2005, 2010), rng.randint(1, 12), rng.randint(1, 28)),
+            nik=_nik(nomor),
+            jenis_kelamin=jenis_kelamin,
+            alamat=rng.choice(k['alamat']),
+            no_telepon=rng.choice(k['telepon']),
+            asal_sekolah=f"SMP Negeri {rng.randint(1, 50)} {rng.choice(k['kota'])}",
+            alamat_asal_sekolah=rng.choice(k['alamat']),
+            nama_ayah=f"{rng.choice(k['nama_l'])} {rng.choice(k['nama_belakang'])}",
+            nama_ibu=f"{rng.choice(k['nama_p'])} {rng.choice(k['nama_belakang'])}",
+            no_telepon_ortu=rng.choice(k['telepon']),
+            kelas=rng.choices(kelas, bobot_kelas)[0],
+            status=rng.choices(status, bobot_status)[0],
+        ))
+    return rows
+
+
+def _nomor_awal():
+    """
+    Nomor urut setelah NISN dummy terbesar yang sudah ada. Id tidak bisa
+    dipakai: siswa asli/impor juga memakai id, dan baris yang dihapus
+    membuat id terbesar lebih kecil dari nomor yang sudah terpakai.
+    """
+    terbesar = Siswa.objects.filter(nisn__regex=POLA_NISN_SEED).aggregate(terbesar=Max('nisn'))['terbesar']
+    return int(terbesar[1:]) + 1 if terbesar else 1
+
+
+def _tanpa_bentrok(rows, nomor_pertama):
+    """
+    Buang baris yang NISN atau NIK-nya sudah dipakai siswa lain (mis. NIK asli
+    berawalan 3273). Nomor dalam satu potongan berurutan, jadi cukup satu
+    query rentang per kolom yang memakai index nisn/nik.
+    """
+    nomor_terakhir = nomor_pertama + len(rows) - 1
+    terpakai = set()
+    for nisn, nik in Siswa.objects.filter(
+        Q(nisn__range=(_nisn(nomor_pertama), _nisn(nomor_terakhir)))
+        | Q(nik__range=(_nik(nomor_pertama), _nik(nomor_terakhir)))
+    ).values_list('nisn', 'nik'):
+        terpakai.update((nisn, nik))
+    return [row for row in rows if row['nisn'] not in terpakai and row['nik'] not in terpakai]
+
+
+def _simpan(objs, using, dengan_signal=False):
+    """
+    Insert banyak siswa seperti bulk_create(), tetapi created_at dipakai apa
+    adanya (tersebar di beberapa tahun ajaran). bulk_create() selalu memanggil
+    pre_save field sehingga auto_now_add menimpanya dengan waktu insert; insert
+    `raw` (jalur yang dipakai loaddata) melewati pre_save tanpa mengubah field
+    model yang juga dipakai thread lain.
+    """
+    meta = Siswa._meta
+    fields = [field for field in meta.concrete_fields if not field.primary_key]
+    ukuran = max(connections[using].ops.bulk_batch_size(fields, objs), 1)
+    if dengan_signal:
+        for obj in objs:
+            pre_save.send(sender=Siswa, instance=obj, raw=False, using=using, update_fields=None)
+    for mulai in range(0, len(objs), ukuran):
+        potongan = objs[mulai:mulai + ukuran]
+        rows = Siswa._base_manager._insert(
+            potongan, fields=fields, returning_fields=meta.db_returning_fields, using=using, raw=True,
+        )
+        for obj, row in zip(potongan, rows):
+            for field, nilai in zip(meta.db_returning_fields, row):
+                setattr(obj, field.attname, nilai)
+            obj._state.adding = False
+            obj._state.db = using
+    if dengan_signal:
+        for obj in objs:
+            post_save.send(sender=Siswa, instance=obj, created=True, raw=False, using=using, update_fields=None)
+
+
+def _tahun_ajaran(nilai):
+    try:
+        awal, akhir = (int(bagian) for bagian in nilai.split('/'))
+    except ValueError:
+        raise CommandError(f"Format tahun ajaran tidak valid: {nilai} (contoh: 2022/2023)")
+    if akhir != awal + 1:
+        raise CommandError(f"Tahun ajaran tidak valid: {nilai}")
+    return awal
+
+
 class Command(BaseCommand):
     help = 'Membuat data siswa dummy dalam jumlah banyak'
 
     def add_arguments(self, parser):
         # Menambahkan argumen opsional untuk menentukan jumlah data
         parser.add_argument('--count', type=int, help='Jumlah siswa dummy yang akan dibuat', default=1)
+        parser.add_argument('--batch-size', type=int, default=5000, help='Jumlah baris per transaksi insert')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Jumlah proses pembuat data Faker')
+        parser.add_argument('--dari', default=None, help='Tahun ajaran pertama, mis. 2021/2022 (default: 2 tahun lalu)')
+        parser.add_argument('--sampai', default=None, help='Tahun ajaran terakhir (default: tahun ajaran berjalan)')
+        parser.add_argument('--seed', type=int, default=0, help='Seed acak agar data bisa dibuat ulang sama persis')
+        parser.add_argument(
+            '--dengan-signal', action='store_true',
+            help='Kirim pre_save/post_save per siswa (notifikasi pendaftar, rollup statistik, metrik); jauh lebih lambat',
+        )
+        parser.add_argument(
+            '--kirim-notifikasi', action='store_true',
+            help='Kirim satu notifikasi ringkasan ke admin (per baris tidak pernah dikirim)',
+        )
 
     def handle(self, *args, **options):
         count = options['count']
-        fake = Faker('id_ID') # Menggunakan Faker dengan lokal Indonesia
-
-        self.stdout.write(self.style.SUCCESS(f"Membuat {count} data siswa dummy..."))
-
-        for i in range(count):
-            # Pilih kelas secara acak
-            kelas_choice = random.choice(['X', 'XI', 'XII'])
-            
-            # Buat nama depan dan belakang
-            first_name = fake.first_name()
-            last_name = fake.last_name()
-            full_name = f"{first_name} {last_name}"
-
-            # Buat objek Siswa baru
-            Siswa.objects.create(
-                nama_lengkap=full_name,
-                nisn=fake.unique.numerify(text='##########'),
-                tempat_lahir=fake.city(),
-                tanggal_lahir=fake.date_of_birth(minimum_age=15, maximum_age=18),
-                nik=fake.unique.numerify(text='################'),
-                jenis_kelamin=random.choice(['L', 'P']),
-                alamat=fake.address(),
-                no_telepon=fake.phone_number(),
-                asal_sekolah=f"SMP Negeri {random.randint(1, 50)} {fake.city()}",
-                alamat_asal_sekolah=fake.address(),
-                nama_ayah=f"{fake.first_name_male()} {fake.last_name()}",
-                nama_ibu=f"{fake.first_name_female()} {fake.last_name()}",
-                no_telepon_ortu=fake.phone_number(),
-                kelas=kelas_choice,
-                status='BARU', # Otomatis statusnya 'Murid Baru'
+        batch_size = max(options['batch_size'], 1)
+        sekarang = timezone.localtime()
+        tahun_berjalan = sekarang.year if sekarang.month >= 7 else sekarang.year - 1
+        tahun_akhir = _tahun_ajaran(options['sampai']) if options['sampai'] else tahun_berjalan
+        tahun_mulai = _tahun_ajaran(options['dari']) if options['dari'] else tahun_akhir - 2
+        if tahun_akhir > tahun_berjalan:
+            raise CommandError(
+                f"--sampai tidak boleh setelah tahun ajaran berjalan ({tahun_berjalan}/{tahun_berjalan + 1})"
             )
-            self.stdout.write(f"Siswa '{full_name}' berhasil dibuat. ({i + 1}/{count})")
+        if tahun_mulai > tahun_akhir:
+            raise CommandError("--dari harus sebelum --sampai")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Membuat {count} data siswa dummy untuk tahun ajaran "
+            f"{tahun_mulai}/{tahun_mulai + 1} s.d. {tahun_akhir}/{tahun_akhir + 1}..."
+        ))
+
+        # Nomor urut dimulai setelah NISN dummy terbesar agar tidak bentrok dengan seed sebelumnya
+        nomor_awal = _nomor_awal()
+        # Tahun ajaran berjalan hanya diisi sampai hari ini, tidak ada pendaftar di masa depan
+        batas = sekarang.replace(tzinfo=None)
+        potongan = [
+            (nomor_awal + mulai, min(batch_size, count - mulai), tahun_mulai, tahun_akhir, batas, options['seed'])
+            for mulai in range(0, count, batch_size)
+        ]
+
+        # Proses anak hanya menjalankan Faker; semua insert dilakukan di proses ini
+        connections.close_all()
+        mulai_waktu = time.monotonic()
+        dibuat = dilewati = 0
+        using = Siswa.objects.db
+        dengan_signal = options['dengan_signal']
+        with ProcessPoolExecutor(
+            max_workers=max(options['workers'], 1), initializer=_init_worker, initargs=(options['seed'],),
+        ) as executor:
+            for (nomor_pertama, *_), rows in zip(potongan, executor.map(_buat_baris, potongan)):
+                objs = [Siswa(**row) for row in _tanpa_bentrok(rows, nomor_pertama)]
+                dilewati += len(rows) - len(objs)
+                # Tanpa --dengan-signal tidak ada notifikasi per siswa dan
+                # rollup statistik diperbarui sekali per batch. Dengan signal,
+                # receiver post_save yang memperbarui rollup per siswa.
+                with transaction.atomic(using=using):
+                    _simpan(objs, using, dengan_signal)
+                    if not dengan_signal:
+                        statistik.catat_siswa_baru(objs)
+                dibuat += len(objs)
+                laju = dibuat / max(time.monotonic() - mulai_waktu, 1e-9)
+                self.stdout.write(f"  {dibuat}/{count} siswa ({laju:,.0f} baris/detik)")
+
+        cache_statistik.invalidasi_semua()
+        if options['kirim_notifikasi'] and dibuat:
+            kirim_ke_admin("Data Dummy Dibuat", f"{dibuat} data siswa dummy ditambahkan oleh seed_siswa.")
 
-        self.stdout.write(self.style.SUCCESS(f"SELESAI! {count} data siswa dummy telah berhasil dibuat."))
\ No newline at end of file
+        durasi = time.monotonic() - mulai_waktu
+        if dilewati:
+            self.stdout.write(self.style.WARNING(f"{dilewati} baris dilewati karena NISN/NIK sudah dipakai."))
+        self.stdout.write(self.style.SUCCESS(
+            f"SELESAI! {dibuat} data siswa dummy dibuat dalam {durasi:.1f} detik "
+            f"({dibuat / max(durasi, 1e-9):,.0f} baris/detik)."
+        ))
@@ -0,0 +1,30 @@
+# siswa/management/commands/transisi_siswa.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from siswa.transisi import KODE_ATURAN, AturanTidakDikenal, jalankan_transisi
+
+
+class Command(BaseCommand):
+    help = 'Kenaikan kelas dan kelulusan massal di akhir tahun ajaran'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Hanya tampilkan jumlah siswa yang terdampak')
+        parser.add_argument(
+            '--aturan', default='',
+            help=f"Daftar aturan dipisah koma (default semua: {','.join(KODE_ATURAN)})",
+        )
+
+    def handle(self, *args, **options):
+        kode_aturan = [kode.strip() for kode in options['aturan'].split(',') if kode.strip()]
+        try:
+            hasil = jalankan_transisi(kode_aturan or None, dry_run=options['dry_run'])
+        except AturanTidakDikenal as exc:
+            raise CommandError(f"Aturan tidak dikenal: {exc}")
+
+        for item in hasil['hasil']:
+            self.stdout.write(f"  {item['keterangan']}: {item['jumlah']} siswa")
+        if hasil['dry_run']:
+            self.stdout.write(self.style.WARNING("Dry run: tidak ada data yang diubah."))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Transisi tahun ajaran selesai."))
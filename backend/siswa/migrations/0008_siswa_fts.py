@@ -0,0 +1,83 @@
+from django.db import migrations
+
+# SQL dibekukan di sini (bukan diimpor dari siswa.search) supaya migrasi
+# tetap sama walaupun kode aplikasi berubah.
+FTS_TABLE = 'siswa_siswa_fts'
+
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        nama_lengkap, nisn, nik,
+        content='siswa_siswa',
+        content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON siswa_siswa BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, nama_lengkap, nisn, nik)
+        VALUES (new.id, new.nama_lengkap, new.nisn, new.nik);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON siswa_siswa BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nama_lengkap, nisn, nik)
+        VALUES ('delete', old.id, old.nama_lengkap, old.nisn, old.nik);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF nama_lengkap, nisn, nik ON siswa_siswa BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nama_lengkap, nisn, nik)
+        VALUES ('delete', old.id, old.nama_lengkap, old.nisn, old.nik);
+        INSERT INTO {FTS_TABLE}(rowid, nama_lengkap, nisn, nik)
+        VALUES (new.id, new.nama_lengkap, new.nisn, new.nik);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')",
+]
+
+DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def fts_trigram_didukung(conn):
+    if conn.vendor != 'sqlite':
+        return False
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("CREATE VIRTUAL TABLE temp._cek_fts USING fts5(x, tokenize='trigram')")
+            cursor.execute("DROP TABLE temp._cek_fts")
+    except Exception:
+        return False
+    return True
+
+
+def buat_index_pencarian(apps, schema_editor):
+    # Hanya untuk SQLite yang mendukung FTS5 trigram; backend lain tetap memakai icontains
+    if not fts_trigram_didukung(schema_editor.connection):
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def hapus_index_pencarian(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in DROP_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('siswa', '0007_alter_siswa_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(buat_index_pencarian, hapus_index_pencarian),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('siswa', '0008_siswa_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='siswa',
+            index=models.Index(fields=['status', 'kelas', '-created_at'], name='siswa_status_kelas_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='siswa',
+            index=models.Index(fields=['created_at'], name='siswa_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='siswa',
+            index=models.Index(fields=['nisn'], name='siswa_nisn_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='siswa',
+            index=models.Index(fields=['nik'], name='siswa_nik_idx'),
+        ),
+    ]
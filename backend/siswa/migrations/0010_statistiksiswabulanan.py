@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:57
+
+from django.db import migrations, models
+from django.db.models import Count, DateField
+from django.db.models.functions import TruncMonth
+
+
+def isi_rollup(apps, schema_editor):
+    # Sama dengan siswa.statistik.rebuild() saat migrasi ini dibuat, dibekukan
+    # di sini supaya tidak bergantung pada kode aplikasi yang bisa berubah.
+    Siswa = apps.get_model('siswa', 'Siswa')
+    StatistikSiswaBulanan = apps.get_model('siswa', 'StatistikSiswaBulanan')
+    db = schema_editor.connection.alias
+    rows = (
+        Siswa.objects.using(db)
+        .annotate(bulan=TruncMonth('created_at', output_field=DateField()))
+        .values('bulan', 'kelas', 'jenis_kelamin', 'status')
+        .annotate(jumlah=Count('pk'))
+        .order_by()
+    )
+    StatistikSiswaBulanan.objects.using(db).bulk_create(
+        [StatistikSiswaBulanan(**row) for row in rows], batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('siswa', '0009_siswa_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistikSiswaBulanan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bulan', models.DateField(help_text='Tanggal 1 dari bulan created_at siswa')),
+                ('kelas', models.CharField(choices=[('X', 'Kelas X'), ('XI', 'Kelas XI'), ('XII', 'Kelas XII')], max_length=5)),
+                ('jenis_kelamin', models.CharField(choices=[('L', 'Laki-laki'), ('P', 'Perempuan')], max_length=1)),
+                ('status', models.CharField(choices=[('BARU', 'Murid Baru'), ('AKTIF', 'Aktif'), ('LULUS', 'Lulus'), ('PINDAH', 'Pindah'), ('DROPOUT', 'Drop Out')], max_length=10)),
+                ('jumlah', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('bulan', 'kelas', 'jenis_kelamin', 'status'), name='statistik_siswa_bulanan_unik')],
+            },
+        ),
+        migrations.RunPython(isi_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:08
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('siswa', '0010_statistiksiswabulanan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SesiUnggah',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kolom', models.CharField(help_text='Field Siswa tujuan, mis. dok_kk', max_length=20)),
+                ('nama_file', models.CharField(max_length=255)),
+                ('ukuran', models.BigIntegerField(help_text='Ukuran total file dalam byte')),
+                ('sha256', models.CharField(help_text='Checksum SHA-256 (hex) yang diharapkan', max_length=64)),
+                ('offset', models.BigIntegerField(default=0, help_text='Jumlah byte yang sudah diterima')),
+                ('status', models.CharField(choices=[('AKTIF', 'Sedang diunggah'), ('SELESAI', 'Selesai, checksum cocok'), ('GAGAL', 'Checksum tidak cocok'), ('DIPAKAI', 'Sudah dipakai oleh data siswa')], default='AKTIF', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['updated_at'], name='sesi_unggah_updated_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:11
+
+import siswa.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('siswa', '0011_sesiunggah'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DokumenBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('nama', models.CharField(help_text='Path file di storage', max_length=255, unique=True)),
+                ('ukuran', models.BigIntegerField()),
+                ('jumlah_referensi', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='siswa',
+            name='dok_akte',
+            field=models.FileField(blank=True, null=True, storage=siswa.storage.dokumen_storage, upload_to='dokumen/akte/'),
+        ),
+        migrations.AlterField(
+            model_name='siswa',
+            name='dok_ijazah',
+            field=models.FileField(blank=True, null=True, storage=siswa.storage.dokumen_storage, upload_to='dokumen/ijazah/'),
+        ),
+        migrations.AlterField(
+            model_name='siswa',
+            name='dok_kip',
+            field=models.FileField(blank=True, null=True, storage=siswa.storage.dokumen_storage, upload_to='dokumen/kip/'),
+        ),
+        migrations.AlterField(
+            model_name='siswa',
+            name='dok_kk',
+            field=models.FileField(blank=True, null=True, storage=siswa.storage.dokumen_storage, upload_to='dokumen/kk/'),
+        ),
+        migrations.AlterField(
+            model_name='siswa',
+            name='dok_ktp_ortu',
+            field=models.FileField(blank=True, null=True, storage=siswa.storage.dokumen_storage, upload_to='dokumen/ktp_ortu/'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+# AlterField dok_* di 0012 membuat ulang tabel siswa_siswa di SQLite, dan
+# trigger FTS dari 0008 ikut terhapus. Trigger dibuat ulang di sini lalu
+# index diisi ulang agar siswa yang ditambah sejak itu ikut terindeks.
+# SQL dibekukan di sini, tidak diimpor dari siswa.search.
+FTS_TABLE = 'siswa_siswa_fts'
+
+TRIGGER_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON siswa_siswa BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, nama_lengkap, nisn, nik)
+        VALUES (new.id, new.nama_lengkap, new.nisn, new.nik);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON siswa_siswa BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nama_lengkap, nisn, nik)
+        VALUES ('delete', old.id, old.nama_lengkap, old.nisn, old.nik);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF nama_lengkap, nisn, nik ON siswa_siswa BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nama_lengkap, nisn, nik)
+        VALUES ('delete', old.id, old.nama_lengkap, old.nisn, old.nik);
+        INSERT INTO {FTS_TABLE}(rowid, nama_lengkap, nisn, nik)
+        VALUES (new.id, new.nama_lengkap, new.nisn, new.nik);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')",
+]
+
+
+def pulihkan_index_pencarian(apps, schema_editor):
+    conn = schema_editor.connection
+    # Virtual table hanya dibuat oleh 0008 jika FTS5 trigram tersedia
+    if conn.vendor != 'sqlite' or FTS_TABLE not in conn.introspection.table_names():
+        return
+    for sql in TRIGGER_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('siswa', '0012_dokumenblob'),
+    ]
+
+    operations = [
+        migrations.RunPython(pulihkan_index_pencarian, migrations.RunPython.noop),
+    ]
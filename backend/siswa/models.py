@@ -1,4 +1,12 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
+
+from .storage import DOKUMEN_FIELDS, dokumen_storage
+
+# Kolom yang menentukan bucket rollup statistik (siswa/statistik.py)
+KOLOM_KUNCI_STATISTIK = ('created_at', 'kelas', 'jenis_kelamin', 'status')
 
 class Siswa(models.Model):
     JENIS_KELAMIN_CHOICES = (
@@ -39,11 +47,127 @@ class Siswa(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='BARU')
     foto_profil = models.ImageField(upload_to='foto_profil/', blank=True, null=True)
 
-    dok_kk = models.FileField(upload_to='dokumen/kk/', blank=True, null=True)
-    dok_akte = models.FileField(upload_to='dokumen/akte/', blank=True, null=True)
-    dok_ijazah = models.FileField(upload_to='dokumen/ijazah/', blank=True, null=True)
-    dok_ktp_ortu = models.FileField(upload_to='dokumen/ktp_ortu/', blank=True, null=True)
-    dok_kip = models.FileField(upload_to='dokumen/kip/', blank=True, null=True)
+    # Dokumen disimpan content-addressed: file identik (mis. KK saudara kandung)
+    # hanya disimpan sekali, lihat siswa/storage.py
+    dok_kk = models.FileField(upload_to='dokumen/kk/', storage=dokumen_storage, blank=True, null=True)
+    dok_akte = models.FileField(upload_to='dokumen/akte/', storage=dokumen_storage, blank=True, null=True)
+    dok_ijazah = models.FileField(upload_to='dokumen/ijazah/', storage=dokumen_storage, blank=True, null=True)
+    dok_ktp_ortu = models.FileField(upload_to='dokumen/ktp_ortu/', storage=dokumen_storage, blank=True, null=True)
+    dok_kip = models.FileField(upload_to='dokumen/kip/', storage=dokumen_storage, blank=True, null=True)
 
     def __str__(self):
         return self.nama_lengkap
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Simpan kunci statistik saat dimuat, supaya update berikutnya tahu
+        # bucket lama mana yang harus dikurangi tanpa query tambahan. Muatan
+        # .only()/.defer() tanpa kolom kunci dibiarkan kosong; kunci lamanya
+        # dibaca dari database saat pre_save/pre_delete (siswa/signals.py).
+        if all(name in field_names for name in KOLOM_KUNCI_STATISTIK):
+            instance._statistik_awal = instance.kunci_statistik()
+        # Path dokumen saat dimuat, untuk melepas referensi blob yang diganti
+        instance._dokumen_awal = {name: instance.__dict__[name] for name in DOKUMEN_FIELDS if name in instance.__dict__}
+        # Foto saat dimuat, untuk menghapus varian foto lama (pengelolaSiswa/gambar.py)
+        instance._foto_awal = instance.__dict__.get('foto_profil')
+        return instance
+
+    def kunci_statistik(self):
+        """Bucket rollup (bulan, kelas, jenis_kelamin, status) untuk siswa ini."""
+        data = self.__dict__
+        ditunda = [name for name in KOLOM_KUNCI_STATISTIK if name not in data]
+        if ditunda and self.pk is not None:
+            # Kolom yang tidak ikut dimuat (.only()/.defer()) dibaca dalam satu query
+            baris = type(self)._base_manager.filter(pk=self.pk).values(*ditunda).first()
+            if baris is None:
+                return None
+            data = {**data, **baris}
+        if any(data.get(name) is None for name in KOLOM_KUNCI_STATISTIK):
+            return None
+        bulan = timezone.localtime(data['created_at']).date().replace(day=1)
+        return (bulan, data['kelas'], data['jenis_kelamin'], data['status'])
+
+    class Meta:
+        # Index disesuaikan dengan bentuk query yang sebenarnya dipakai view:
+        # filter status/kelas + urut -created_at, rentang created_at untuk
+        # statistik, dan lookup NISN/NIK.
+        indexes = [
+            models.Index(fields=['status', 'kelas', '-created_at'], name='siswa_status_kelas_created_idx'),
+            models.Index(fields=['created_at'], name='siswa_created_at_idx'),
+            models.Index(fields=['nisn'], name='siswa_nisn_idx'),
+            models.Index(fields=['nik'], name='siswa_nik_idx'),
+        ]
+
+
+class StatistikSiswaBulanan(models.Model):
+    """
+    Rollup jumlah siswa per (bulan, kelas, jenis_kelamin, status).
+    Diperbarui secara inkremental oleh signal Siswa (lihat siswa/statistik.py),
+    sehingga statistik satu tahun ajaran cukup menjumlahkan baris milik 12 bulan.
+    """
+    bulan = models.DateField(help_text="Tanggal 1 dari bulan created_at siswa")
+    kelas = models.CharField(max_length=5, choices=Siswa.KELAS_CHOICES)
+    jenis_kelamin = models.CharField(max_length=1, choices=Siswa.JENIS_KELAMIN_CHOICES)
+    status = models.CharField(max_length=10, choices=Siswa.STATUS_CHOICES)
+    jumlah = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.bulan:%Y-%m} {self.kelas}/{self.jenis_kelamin}/{self.status}: {self.jumlah}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['bulan', 'kelas', 'jenis_kelamin', 'status'],
+                name='statistik_siswa_bulanan_unik',
+            ),
+        ]
+
+
+class SesiUnggah(models.Model):
+    """
+    Sesi unggah bertahap untuk satu file Siswa (foto_profil / dok_*).
+    Client mengirim file per potongan ke /api/unggah/<id>/ lalu mereferensikan
+    id sesi yang sudah SELESAI saat membuat Siswa (lihat siswa/unggah.py).
+    """
+    STATUS_AKTIF = 'AKTIF'
+    STATUS_SELESAI = 'SELESAI'
+    STATUS_GAGAL = 'GAGAL'
+    STATUS_DIPAKAI = 'DIPAKAI'
+    STATUS_CHOICES = (
+        (STATUS_AKTIF, 'Sedang diunggah'),
+        (STATUS_SELESAI, 'Selesai, checksum cocok'),
+        (STATUS_GAGAL, 'Checksum tidak cocok'),
+        (STATUS_DIPAKAI, 'Sudah dipakai oleh data siswa'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kolom = models.CharField(max_length=20, help_text="Field Siswa tujuan, mis. dok_kk")
+    nama_file = models.CharField(max_length=255)
+    ukuran = models.BigIntegerField(help_text="Ukuran total file dalam byte")
+    sha256 = models.CharField(max_length=64, help_text="Checksum SHA-256 (hex) yang diharapkan")
+    offset = models.BigIntegerField(default=0, help_text="Jumlah byte yang sudah diterima")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_AKTIF)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kolom}: {self.nama_file} ({self.offset}/{self.ukuran})"
+
+    class Meta:
+        indexes = [
+            # Pembersihan sesi kedaluwarsa
+            models.Index(fields=['updated_at'], name='sesi_unggah_updated_idx'),
+        ]
+
+
+class DokumenBlob(models.Model):
+    """Satu file dokumen unik (berdasarkan SHA-256) beserta jumlah Siswa yang memakainya."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    nama = models.CharField(max_length=255, unique=True, help_text="Path file di storage")
+    ukuran = models.BigIntegerField()
+    jumlah_referensi = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.nama} ({self.jumlah_referensi} referensi)"
@@ -0,0 +1,195 @@
+# siswa/search.py
+
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+# Nama virtual table FTS5 yang mengindeks kolom pencarian Siswa
+FTS_TABLE = 'siswa_siswa_fts'
+FTS_COLUMNS = ('nama_lengkap', 'nisn', 'nik')
+
+# Tokenizer trigram butuh minimal 3 karakter per kata kunci
+MIN_TRIGRAM_LENGTH = 3
+
+# NISN/NIK hanya berisi angka, cukup dicari lewat prefix di index biasa
+NOMOR_PATTERN = re.compile(r'^\d+$')
+
+_CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {', '.join(FTS_COLUMNS)},
+        content='siswa_siswa',
+        content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    # Trigger menjaga index tetap sinkron untuk semua jalur tulis,
+    # termasuk bulk_create() dan QuerySet.update() yang tidak memicu signal.
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON siswa_siswa BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, nama_lengkap, nisn, nik)
+        VALUES (new.id, new.nama_lengkap, new.nisn, new.nik);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON siswa_siswa BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nama_lengkap, nisn, nik)
+        VALUES ('delete', old.id, old.nama_lengkap, old.nisn, old.nik);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF nama_lengkap, nisn, nik ON siswa_siswa BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nama_lengkap, nisn, nik)
+        VALUES ('delete', old.id, old.nama_lengkap, old.nisn, old.nik);
+        INSERT INTO {FTS_TABLE}(rowid, nama_lengkap, nisn, nik)
+        VALUES (new.id, new.nama_lengkap, new.nisn, new.nik);
+    END
+    """,
+]
+
+_DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def fts_supported(conn=connection):
+    """
+    Cek apakah database mendukung FTS5 dengan tokenizer trigram
+    (SQLite >= 3.34 yang dikompilasi dengan FTS5).
+    """
+    if conn.vendor != 'sqlite':
+        return False
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE temp._cek_fts USING fts5(x, tokenize='trigram')"
+            )
+            cursor.execute("DROP TABLE temp._cek_fts")
+    except Exception:
+        return False
+    return True
+
+
+# Cache per alias database supaya introspeksi tidak dijalankan di setiap request
+_fts_ready = set()
+
+
+def fts_table_exists(conn=connection):
+    if conn.vendor != 'sqlite':
+        return False
+    if conn.alias in _fts_ready:
+        return True
+    if FTS_TABLE in conn.introspection.table_names():
+        _fts_ready.add(conn.alias)
+        return True
+    return False
+
+
+def create_fts_schema(conn=connection):
+    with conn.cursor() as cursor:
+        for sql in _CREATE_SQL:
+            cursor.execute(sql)
+
+
+def drop_fts_schema(conn=connection):
+    _fts_ready.discard(conn.alias)
+    with conn.cursor() as cursor:
+        for sql in _DROP_SQL:
+            cursor.execute(sql)
+
+
+def rebuild_fts_index(conn=connection):
+    """
+    Bangun ulang isi index FTS dari tabel siswa_siswa.
+    Membuat virtual table dan trigger terlebih dahulu jika belum ada.
+    """
+    create_fts_schema(conn)
+    with conn.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def jumlah_terindeks(conn=connection):
+    """
+    Jumlah baris siswa yang benar-benar ada di index FTS. COUNT(*) dari
+    virtual table sendiri membaca tabel konten (siswa_siswa), jadi yang
+    dihitung adalah tabel bayangan _docsize.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}_docsize")
+        return cursor.fetchone()[0]
+
+
+def build_match_query(terms):
+    """
+    Ubah daftar kata kunci menjadi ekspresi MATCH FTS5.
+    Setiap kata dibungkus tanda kutip agar karakter khusus tidak dianggap operator.
+    """
+    return ' AND '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def prefix_range(field, prefix):
+    """
+    Filter prefix yang bisa memakai index B-tree biasa.
+    `startswith` di SQLite menjadi LIKE yang case-insensitive sehingga
+    tidak bisa memakai index, jadi kita pakai rentang [prefix, prefix+1).
+    """
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper})
+
+
+class SiswaSearchFilter(filters.SearchFilter):
+    """
+    Pencarian siswa di belakang parameter `?search=`.
+
+    - Kata kunci berupa angka (NISN/NIK) dicari lewat prefix pada kolom nisn/nik.
+    - Kata kunci lain dicocokkan ke index FTS5 trigram dan diurutkan
+      berdasarkan relevansi (bm25).
+    - Jika FTS tidak tersedia atau kata kunci terlalu pendek, kembali ke
+      perilaku SearchFilter bawaan DRF (icontains).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        if all(NOMOR_PATTERN.match(term) for term in terms):
+            condition = Q()
+            for term in terms:
+                condition &= prefix_range('nisn', term) | prefix_range('nik', term)
+            return queryset.filter(condition)
+
+        if (
+            all(len(term) >= MIN_TRIGRAM_LENGTH for term in terms)
+            and fts_table_exists(connection)
+        ):
+            match = build_match_query(terms)
+            ordering = [str(field) for field in queryset.query.order_by]
+            # FTS yang menentukan baris (rowid = siswa_siswa.id), tabel siswa
+            # hanya diambil lewat primary key. Dinyatakan lewat subquery dan
+            # anotasi agar tetap bisa digabung dengan .values() dan order_by
+            # keyset dari pagination. `LIMIT -1` mencegah SQLite meratakan
+            # subquery rank ke subquery berkorelasi: hasil MATCH dihitung sekali
+            # (dengan index otomatis), bukan sekali per baris siswa.
+            return queryset.filter(
+                id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]),
+            ).annotate(
+                search_rank=RawSQL(
+                    f'SELECT hasil.rank FROM (SELECT rowid, rank FROM {FTS_TABLE} '
+                    f'WHERE {FTS_TABLE} MATCH %s LIMIT -1) hasil WHERE hasil.rowid = siswa_siswa.id',
+                    [match],
+                    output_field=FloatField(),
+                ),
+            ).order_by('search_rank', *ordering)
+
+        return super().filter_queryset(request, queryset, view)
@@ -1,9 +1,244 @@
 # siswa/serializers.py
 
+from collections import OrderedDict
+
+import os
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models, transaction
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Siswa
+from pengelolaSiswa.gambar import FORMAT_VARIAN, UKURAN_VARIAN, VarianGambarField
+from pengelolaSiswa.media import url_bertanda
+from .models import Siswa, SesiUnggah
+from . import unggah
+
+# Field file/gambar; butuh instance model + storage untuk membangun URL-nya
+FILE_FIELDS = ('foto_profil', 'dok_kk', 'dok_akte', 'dok_ijazah', 'dok_ktp_ortu', 'dok_kip')
+# Id sesi unggah bertahap sebagai ganti file multipart, mis. `dok_kk_upload`
+UPLOAD_FIELDS = tuple(f'{name}_upload' for name in FILE_FIELDS)
+
+
+class SparseFieldsMixin:
+    """
+    Mendukung sparse fieldset lewat `?fields=nama_lengkap,nisn,kelas`.
+    Hanya berlaku untuk request baca (GET); nama field yang tidak dikenal diabaikan.
+    """
+    fields_query_param = 'fields'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        requested = request.query_params.get(self.fields_query_param)
+        if not requested:
+            return
+        allowed = {name.strip() for name in requested.split(',') if name.strip()}
+        if not allowed & set(self.fields):
+            return
+        for name in list(self.fields):
+            if name not in allowed:
+                self.fields.pop(name)
+
+
+def url_berkas(fieldfile, request=None):
+    path = reverse('siswa-berkas', kwargs={'pk': fieldfile.instance.pk, 'field': fieldfile.field.name})
+    return url_bertanda(path, request)
+
+
+class BerkasMixin:
+    """
+    Foto/dokumen siswa tidak pernah dikembalikan sebagai /media/... publik,
+    melainkan URL bertanda ke /api/siswa/<id>/berkas/<field>/ yang berlaku
+    sementara (lihat pengelolaSiswa/media.py).
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return url_berkas(value, self.context.get('request'))
+
+
+class BerkasField(BerkasMixin, serializers.FileField):
+    pass
+
+
+class BerkasGambarField(BerkasMixin, serializers.ImageField):
+    pass
+
+
+class VarianBerkasField(VarianGambarField):
+    """
+    Varian foto siswa lewat endpoint berkas (`&varian=thumb.webp`), bukan
+    /media/varian/ yang publik. Selama varian belum dibuat, endpoint tersebut
+    mengirim foto aslinya.
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = url_berkas(value, self.context.get('request'))
+        return {
+            ukuran: {ekstensi: f'{url}&varian={ukuran}.{ekstensi}' for ekstensi in FORMAT_VARIAN}
+            for ukuran in UKURAN_VARIAN
+        }
+
+
+class BerkasSerializerMixin:
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.FileField: BerkasField,
+        models.ImageField: BerkasGambarField,
+    }
+
+
+class SiswaSerializer(SparseFieldsMixin, BerkasSerializerMixin, serializers.ModelSerializer):
+    # URL thumbnail/medium (WebP & JPEG) yang dibuat di latar belakang; lihat pengelolaSiswa/gambar.py
+    foto_profil_varian = VarianBerkasField(source='foto_profil')
+
+    # Id SesiUnggah yang sudah SELESAI (lihat siswa/unggah.py)
+    foto_profil_upload = serializers.UUIDField(write_only=True, required=False)
+    dok_kk_upload = serializers.UUIDField(write_only=True, required=False)
+    dok_akte_upload = serializers.UUIDField(write_only=True, required=False)
+    dok_ijazah_upload = serializers.UUIDField(write_only=True, required=False)
+    dok_ktp_ortu_upload = serializers.UUIDField(write_only=True, required=False)
+    dok_kip_upload = serializers.UUIDField(write_only=True, required=False)
 
-class SiswaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Siswa
         fields = '__all__'
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        self._sesi_unggah = []
+        self._file_unggahan = []
+        sesi_ids = {name: attrs.pop(f'{name}_upload') for name in FILE_FIELDS if f'{name}_upload' in attrs}
+        if not sesi_ids:
+            return attrs
+
+        daftar_sesi = SesiUnggah.objects.in_bulk(sesi_ids.values())
+        errors = {}
+        for name, sesi_id in sesi_ids.items():
+            sesi = daftar_sesi.get(sesi_id)
+            if attrs.get(name):
+                errors[f'{name}_upload'] = 'Kirim file langsung atau id unggahan, tidak keduanya.'
+            elif sesi is None or sesi.kolom != name:
+                errors[f'{name}_upload'] = 'Sesi unggah tidak ditemukan.'
+            elif sesi.status != SesiUnggah.STATUS_SELESAI:
+                errors[f'{name}_upload'] = f'Sesi unggah belum selesai atau sudah dipakai (status {sesi.status}).'
+            else:
+                berkas = unggah.FileUnggahan(sesi)
+                try:
+                    # Validasi yang sama dengan upload multipart (mis. harus gambar untuk foto_profil)
+                    attrs[name] = self.fields[name].run_validation(berkas)
+                    self._sesi_unggah.append(sesi)
+                    self._file_unggahan.append(berkas)
+                except serializers.ValidationError as exc:
+                    berkas.close()
+                    errors[f'{name}_upload'] = exc.detail
+                except DjangoValidationError as exc:
+                    berkas.close()
+                    # ImageField memvalidasi gambar lewat form field Django
+                    errors[f'{name}_upload'] = exc.messages
+        if errors:
+            self._tutup_file_unggahan()
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def _tutup_file_unggahan(self):
+        for berkas in getattr(self, '_file_unggahan', []):
+            berkas.close()
+        self._file_unggahan = []
+
+    def _simpan_dengan_sesi(self, simpan):
+        if not getattr(self, '_sesi_unggah', []):
+            return simpan()
+        # Sesi diklaim sebelum file dipindahkan dari folder sementara, dalam
+        # transaksi yang sama dengan penyimpanan Siswa
+        try:
+            with transaction.atomic():
+                try:
+                    unggah.pakai(getattr(self, '_sesi_unggah', []))
+                except unggah.SesiSudahDipakai:
+                    raise serializers.ValidationError({
+                        f'{sesi.kolom}_upload': 'Sesi unggah sudah dipakai.' for sesi in self._sesi_unggah
+                    })
+                return simpan()
+        finally:
+            self._tutup_file_unggahan()
+
+    def create(self, validated_data):
+        return self._simpan_dengan_sesi(lambda: super(SiswaSerializer, self).create(validated_data))
+
+    def update(self, instance, validated_data):
+        return self._simpan_dengan_sesi(lambda: super(SiswaSerializer, self).update(instance, validated_data))
+
+
+class SesiUnggahSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SesiUnggah
+        fields = ['id', 'kolom', 'nama_file', 'ukuran', 'sha256', 'offset', 'status', 'created_at']
+        read_only_fields = ['offset', 'status', 'created_at']
+
+    def validate_kolom(self, value):
+        if value not in FILE_FIELDS:
+            raise serializers.ValidationError(f"Pilih salah satu: {', '.join(FILE_FIELDS)}.")
+        return value
+
+    def validate_nama_file(self, value):
+        # Hanya nama file; direktori tujuan ditentukan oleh upload_to field Siswa
+        return os.path.basename(value.replace('\\', '/'))
+
+    def validate_ukuran(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('Ukuran file harus lebih dari 0.')
+        if value > unggah.MAKS_UKURAN:
+            raise serializers.ValidationError(f'Ukuran file maksimal {unggah.MAKS_UKURAN} byte.')
+        return value
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if len(value) != 64 or any(c not in '0123456789abcdef' for c in value):
+            raise serializers.ValidationError('Checksum harus berupa SHA-256 dalam format hex.')
+        return value
+
+
+class SiswaListSerializer(SparseFieldsMixin, BerkasSerializerMixin, serializers.ModelSerializer):
+    """Representasi ringkas untuk tabel daftar siswa (`?ringkas=1`)."""
+    foto_profil_varian = VarianBerkasField(source='foto_profil')
+
+    class Meta:
+        model = Siswa
+        fields = ['id', 'nama_lengkap', 'nisn', 'kelas', 'status', 'jenis_kelamin', 'foto_profil', 'foto_profil_varian']
+
+
+def needs_instances(serializer):
+    """
+    True jika serializer tidak bisa dilayani dari `QuerySet.values()`: ada
+    field file (atau turunannya, mis. varian foto) yang butuh instance dan
+    storage, atau field yang nilainya bukan satu kolom Siswa
+    (SerializerMethodField, `source='*'`, source bertitik, property model).
+    """
+    kolom = {field.name for field in Siswa._meta.concrete_fields}
+    return any(
+        field.source in FILE_FIELDS or field.source not in kolom
+        for field in serializer.fields.values() if not field.write_only
+    )
+
+
+def serialize_values(serializer, rows):
+    """
+    Serialisasi langsung dari baris `QuerySet.values()` tanpa membuat instance
+    Siswa. Setiap nilai tetap melewati `to_representation` field serializer
+    sehingga hasilnya identik dengan jalur biasa.
+    """
+    fields = [(name, field) for name, field in serializer.fields.items() if not field.write_only]
+    data = []
+    for row in rows:
+        item = OrderedDict()
+        for name, field in fields:
+            value = row[field.source]
+            item[name] = None if value is None else field.to_representation(value)
+        data.append(item)
+    return data
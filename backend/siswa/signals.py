@@ -1,23 +1,146 @@
 # siswa/signals.py
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
-from django.contrib.auth.models import User
 from .models import Siswa
-from notifikasi.models import Notifikasi # <-- Import model Notifikasi
+from .storage import DOKUMEN_FIELDS, dokumen_storage
+from . import cache_statistik, statistik
+from notifikasi.fanout import kirim_pendaftar_baru
+from pengelolaSiswa import gambar, metrik
 
 @receiver(post_save, sender=Siswa)
 def send_new_student_notification(sender, instance, created, **kwargs):
     # Kirim notifikasi hanya jika siswa baru dibuat DAN statusnya 'BARU'
     if created and instance.status == 'BARU':
-        # Ambil semua user yang merupakan staf/admin
-        admins = User.objects.filter(is_staff=True)
-        
-        title = "Pendaftar Baru!"
-        content = f"Siswa baru bernama {instance.nama_lengkap} telah mendaftar."
-        
-        # Buat notifikasi untuk setiap admin
-        for admin in admins:
-            Notifikasi.objects.create(user=admin, title=title, content=content)
-        
-        print(f"✔️ Notifikasi dibuat untuk {admins.count()} admin.")
\ No newline at end of file
+        # Ditulis untuk semua admin setelah commit; pendaftaran beruntun digabung
+        # menjadi satu notifikasi digest (lihat notifikasi/fanout.py)
+        kirim_pendaftar_baru(instance.nama_lengkap)
+
+
+@receiver(post_save, sender=Siswa)
+def hitung_pendaftaran(sender, instance, created, raw=False, **kwargs):
+    # Laju pendaftaran di /metrics: rate(pengelola_pendaftaran_siswa_total[5m])
+    if created and not raw:
+        transaction.on_commit(lambda: metrik.tambah('pengelola_pendaftaran_siswa_total'))
+
+
+# --- Rollup statistik (siswa/statistik.py) ---
+
+@receiver(pre_save, sender=Siswa)
+def simpan_kunci_statistik_lama(sender, instance, raw=False, **kwargs):
+    # Instance yang tidak dimuat lewat from_db (mis. dibuat manual dengan pk)
+    # belum punya kunci lama; ambil dari database sebelum ditimpa.
+    if raw or instance._state.adding or hasattr(instance, '_statistik_awal'):
+        return
+    lama = Siswa.objects.filter(pk=instance.pk).first()
+    instance._statistik_awal = lama.kunci_statistik() if lama else None
+
+
+@receiver(post_save, sender=Siswa)
+def perbarui_statistik(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    kunci_baru = instance.kunci_statistik()
+    kunci_lama = None if created else getattr(instance, '_statistik_awal', None)
+    if kunci_lama != kunci_baru:
+        statistik.catat_perubahan(kunci_lama, kunci_baru)
+        # Invalidasi setelah commit agar request lain tidak meng-cache data lama
+        transaction.on_commit(lambda: cache_statistik.invalidasi_bucket(kunci_lama, kunci_baru))
+    instance._statistik_awal = kunci_baru
+
+
+@receiver(pre_delete, sender=Siswa)
+def simpan_kunci_statistik_sebelum_hapus(sender, instance, **kwargs):
+    # Instance dari .only()/.defer(): baca kolom kunci selagi barisnya masih ada
+    if not hasattr(instance, '_statistik_awal'):
+        instance._statistik_awal = instance.kunci_statistik()
+
+
+@receiver(post_delete, sender=Siswa)
+def kurangi_statistik(sender, instance, **kwargs):
+    kunci = getattr(instance, '_statistik_awal', None) or instance.kunci_statistik()
+    statistik.catat_perubahan(kunci, None)
+    transaction.on_commit(lambda: cache_statistik.invalidasi_bucket(kunci))
+
+
+# --- Varian foto profil (pengelolaSiswa/gambar.py) ---
+
+@receiver(post_save, sender=Siswa)
+def buat_varian_foto(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'foto_profil' not in update_fields):
+        return
+    gambar.perbarui_varian(instance)
+
+
+# --- Referensi blob dokumen (siswa/storage.py) ---
+
+def _lepas_setelah_commit(daftar_nama):
+    daftar_nama = [nama for nama in daftar_nama if nama]
+    if daftar_nama:
+        transaction.on_commit(lambda: [dokumen_storage().lepas(nama) for nama in daftar_nama])
+
+
+def _lengkapi_dokumen_awal(instance, fields):
+    """
+    Pastikan path lama setiap field di `fields` tercatat di _dokumen_awal.
+    Field yang tidak ikut dimuat (.only()/.defer()) atau instance yang tidak
+    berasal dari from_db dibaca dari database dalam satu query.
+    """
+    awal = instance.__dict__.setdefault('_dokumen_awal', {})
+    kurang = [name for name in fields if name not in awal]
+    if kurang and instance.pk is not None:
+        awal.update(Siswa._base_manager.filter(pk=instance.pk).values(*kurang).first() or {})
+    return awal
+
+
+def _field_dokumen_disimpan(instance, update_fields):
+    # Field dok_* yang tidak dimuat dan tidak diubah tidak ikut ditulis
+    return [
+        name for name in DOKUMEN_FIELDS
+        if name in instance.__dict__ and (update_fields is None or name in update_fields)
+    ]
+
+
+@receiver(pre_save, sender=Siswa)
+def simpan_dokumen_lama(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    fields = _field_dokumen_disimpan(instance, update_fields)
+    _lengkapi_dokumen_awal(instance, fields)
+    # Isi upload yang belum ditulis; setelah simpan field hanya berisi nama file
+    instance._dokumen_isi = {
+        name: berkas.file for name in fields
+        if (berkas := getattr(instance, name)) and not berkas._committed
+    }
+
+
+@receiver(post_save, sender=Siswa)
+def perbarui_referensi_dokumen(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Referensi dinaikkan setelah baris tersimpan, di transaksi yang sama:
+    # jika simpan gagal atau di-rollback, jumlah referensi ikut batal.
+    if raw:
+        return
+    awal = instance.__dict__.setdefault('_dokumen_awal', {})
+    isi = instance.__dict__.pop('_dokumen_isi', {})
+    storage = dokumen_storage()
+    dilepas = []
+    for name in _field_dokumen_disimpan(instance, update_fields):
+        lama = None if created else awal.get(name) or None
+        baru = getattr(instance, name).name or None
+        if lama != baru:
+            storage.tambah_referensi(baru, isi.get(name))
+            dilepas.append(lama)
+        awal[name] = baru
+    _lepas_setelah_commit(dilepas)
+
+
+@receiver(pre_delete, sender=Siswa)
+def simpan_dokumen_sebelum_hapus(sender, instance, **kwargs):
+    _lengkapi_dokumen_awal(instance, DOKUMEN_FIELDS)
+
+
+@receiver(post_delete, sender=Siswa)
+def lepas_dokumen(sender, instance, **kwargs):
+    awal = getattr(instance, '_dokumen_awal', {})
+    _lepas_setelah_commit(awal.get(name) for name in DOKUMEN_FIELDS)
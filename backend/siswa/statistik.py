@@ -0,0 +1,232 @@
+# siswa/statistik.py
+
+from collections import Counter
+from datetime import date, datetime, time
+
+from django.db import connections, router, transaction
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Siswa, StatistikSiswaBulanan
+
+# Nama kunci hasil agregasi, sama dengan yang dipakai view statistik_siswa
+KOLOM_STATISTIK = {
+    'total_x': Q(kelas='X'),
+    'total_xi': Q(kelas='XI'),
+    'total_xii': Q(kelas='XII'),
+    'laki': Q(jenis_kelamin='L'),
+    'perempuan': Q(jenis_kelamin='P'),
+    'status_baru': Q(status='BARU'),
+    'status_aktif': Q(status='AKTIF'),
+    'status_lulus': Q(status='LULUS'),
+    'status_pindah': Q(status='PINDAH'),
+    'status_dropout': Q(status='DROPOUT'),
+}
+
+KUNCI_BUCKET = ('bulan', 'kelas', 'jenis_kelamin', 'status')
+# Bucket per statement upsert (5 parameter per bucket, di bawah batas 999 SQLite)
+UKURAN_BATCH_UPSERT = 150
+
+
+# --- Pembaruan inkremental ---
+
+def ubah_jumlah(perubahan):
+    """
+    Terapkan perubahan {(bulan, kelas, jenis_kelamin, status): delta} ke rollup.
+    Semua bucket ditulis dengan satu INSERT ... ON CONFLICT DO UPDATE SET
+    jumlah = jumlah + delta (upsert atomik, juga aman terhadap proses lain),
+    jadi jumlah query tidak bertambah mengikuti banyaknya bucket.
+    """
+    baris = [(kunci, delta) for kunci, delta in perubahan.items() if delta and kunci is not None]
+    if not baris:
+        return
+
+    meta = StatistikSiswaBulanan._meta
+    connection = connections[router.db_for_write(StatistikSiswaBulanan)]
+    qn = connection.ops.quote_name
+    fields = [meta.get_field(nama) for nama in KUNCI_BUCKET]
+    tabel = qn(meta.db_table)
+    kolom = ', '.join(qn(field.column) for field in fields)
+    jumlah = qn(meta.get_field('jumlah').column)
+    placeholder = '(' + ', '.join(['%s'] * (len(fields) + 1)) + ')'
+
+    for mulai in range(0, len(baris), UKURAN_BATCH_UPSERT):
+        potongan = baris[mulai:mulai + UKURAN_BATCH_UPSERT]
+        params = []
+        for kunci, delta in potongan:
+            params.extend(field.get_db_prep_value(nilai, connection) for field, nilai in zip(fields, kunci))
+            params.append(delta)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {tabel} ({kolom}, {jumlah}) VALUES {", ".join([placeholder] * len(potongan))} '
+                f'ON CONFLICT ({kolom}) DO UPDATE SET {jumlah} = {tabel}.{jumlah} + excluded.{jumlah}',
+                params,
+            )
+
+
+def catat_siswa_baru(daftar_siswa):
+    """Tambahkan banyak siswa sekaligus (mis. setelah bulk_create) ke rollup."""
+    ubah_jumlah(Counter(siswa.kunci_statistik() for siswa in daftar_siswa))
+
+
+def catat_perubahan(kunci_lama, kunci_baru):
+    if kunci_lama == kunci_baru:
+        return
+    perubahan = Counter()
+    perubahan[kunci_lama] -= 1
+    perubahan[kunci_baru] += 1
+    ubah_jumlah(perubahan)
+
+
+# --- Membaca rollup ---
+
+def _agregasi(queryset, fungsi):
+    return queryset.aggregate(**{
+        nama: fungsi(kondisi) for nama, kondisi in KOLOM_STATISTIK.items()
+    })
+
+
+def hitung(start_date, end_date):
+    """
+    Statistik untuk rentang [start_date, end_date] dari tabel rollup.
+    Rentang tahun ajaran/semester selalu berupa bulan utuh, jadi cukup
+    memfilter bucket bulan yang jatuh di dalamnya.
+    """
+    return _agregasi(
+        StatistikSiswaBulanan.objects.filter(
+            bulan__gte=start_date.date().replace(day=1), bulan__lte=end_date.date(),
+        ),
+        lambda kondisi: Sum('jumlah', filter=kondisi, default=0),
+    )
+
+
+def jumlah_bulan(bulan):
+    """Jumlah siswa yang dibuat pada bulan tertentu (tanggal 1 bulan tersebut)."""
+    return StatistikSiswaBulanan.objects.filter(bulan=bulan).aggregate(
+        total=Sum('jumlah', default=0)
+    )['total']
+
+
+def hitung_langsung(start_date, end_date):
+    """Agregasi langsung dari tabel Siswa; dipakai untuk cek konsistensi."""
+    return _agregasi(
+        Siswa.objects.filter(created_at__range=(start_date, end_date)),
+        lambda kondisi: Count('pk', filter=kondisi),
+    )
+
+
+# --- Bangun ulang & cek konsistensi ---
+
+def _hitung_bucket(siswa_model):
+    rows = (
+        siswa_model.objects
+        .annotate(bulan=TruncMonth('created_at', output_field=DateField()))
+        .values(*KUNCI_BUCKET)
+        .annotate(jumlah=Count('pk'))
+        .order_by()
+    )
+    return {tuple(row[k] for k in KUNCI_BUCKET): row['jumlah'] for row in rows}
+
+
+def rebuild(siswa_model=Siswa, rollup_model=StatistikSiswaBulanan):
+    """
+    Hitung ulang seluruh rollup dari tabel Siswa dalam satu GROUP BY.
+    Model bisa diganti dengan model historis saat dipanggil dari migrasi.
+    """
+    with transaction.atomic():
+        rollup_model.objects.all().delete()
+        bucket = _hitung_bucket(siswa_model)
+        rollup_model.objects.bulk_create([
+            rollup_model(jumlah=jumlah, **dict(zip(KUNCI_BUCKET, kunci)))
+            for kunci, jumlah in bucket.items()
+        ], batch_size=500)
+    return len(bucket)
+
+
+def periksa_konsistensi():
+    """
+    Bandingkan rollup dengan agregasi langsung tabel Siswa.
+    Mengembalikan daftar (kunci, jumlah_rollup, jumlah_sebenarnya) yang berbeda.
+    """
+    sebenarnya = _hitung_bucket(Siswa)
+    rollup = {
+        tuple(row[k] for k in KUNCI_BUCKET): row['jumlah']
+        for row in StatistikSiswaBulanan.objects.values(*KUNCI_BUCKET, 'jumlah')
+    }
+    selisih = []
+    for kunci in sorted(set(sebenarnya) | set(rollup)):
+        a, b = rollup.get(kunci, 0), sebenarnya.get(kunci, 0)
+        if a != b:
+            selisih.append((kunci, a, b))
+    return selisih
+
+
+# --- Deret waktu multi tahun ---
+
+def _ringkasan_kosong():
+    return {
+        'total': 0,
+        'kelas': {kode: 0 for kode, _ in Siswa.KELAS_CHOICES},
+        'jenis_kelamin': {kode: 0 for kode, _ in Siswa.JENIS_KELAMIN_CHOICES},
+        'status': {kode: 0 for kode, _ in Siswa.STATUS_CHOICES},
+    }
+
+
+def _tambah(ringkasan, row):
+    ringkasan['total'] += row['jumlah']
+    ringkasan['kelas'][row['kelas']] = ringkasan['kelas'].get(row['kelas'], 0) + row['jumlah']
+    ringkasan['jenis_kelamin'][row['jenis_kelamin']] = (
+        ringkasan['jenis_kelamin'].get(row['jenis_kelamin'], 0) + row['jumlah']
+    )
+    ringkasan['status'][row['status']] = ringkasan['status'].get(row['status'], 0) + row['jumlah']
+
+
+def _tahun_ajaran_kosong(tahun_mulai):
+    bulan = [date(tahun_mulai, m, 1) for m in range(7, 13)] + [date(tahun_mulai + 1, m, 1) for m in range(1, 7)]
+    return {
+        'tahun_ajaran': f'{tahun_mulai}/{tahun_mulai + 1}',
+        **_ringkasan_kosong(),
+        'semester': {'Ganjil': _ringkasan_kosong(), 'Genap': _ringkasan_kosong()},
+        'bulan': [{'bulan': f'{b:%Y-%m}', **_ringkasan_kosong()} for b in bulan],
+    }
+
+
+def deret_waktu(tahun_mulai, tahun_akhir):
+    """
+    Generator statistik per tahun ajaran (beserta per semester dan per bulan)
+    untuk tahun ajaran tahun_mulai/tahun_mulai+1 s.d. tahun_akhir/tahun_akhir+1.
+
+    Semua angka berasal dari satu query GROUP BY bulan(created_at), kelas,
+    jenis_kelamin, status yang dibaca berurutan; setiap tahun ajaran di-yield
+    begitu selesai sehingga respon bisa di-stream.
+    """
+    start_date = timezone.make_aware(datetime(tahun_mulai, 7, 1))
+    end_date = timezone.make_aware(datetime.combine(date(tahun_akhir + 1, 6, 30), time.max))
+    rows = (
+        Siswa.objects
+        .filter(created_at__range=(start_date, end_date))
+        .annotate(bulan=TruncMonth('created_at', output_field=DateField()))
+        .values(*KUNCI_BUCKET)
+        .annotate(jumlah=Count('pk'))
+        .order_by('bulan')
+    )
+
+    tahun = tahun_mulai
+    sekarang = _tahun_ajaran_kosong(tahun)
+    for row in rows.iterator():
+        bulan = row['bulan']
+        tahun_row = bulan.year if bulan.month >= 7 else bulan.year - 1
+        while tahun < tahun_row:
+            yield sekarang
+            tahun += 1
+            sekarang = _tahun_ajaran_kosong(tahun)
+
+        _tambah(sekarang, row)
+        _tambah(sekarang['semester']['Ganjil' if bulan.month >= 7 else 'Genap'], row)
+        _tambah(sekarang['bulan'][(bulan.month - 7) % 12], row)
+
+    while tahun <= tahun_akhir:
+        yield sekarang
+        tahun += 1
+        sekarang = _tahun_ajaran_kosong(tahun)
@@ -0,0 +1,203 @@
+# siswa/storage.py
+
+import hashlib
+import os
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+# Semua dokumen disimpan di sini berdasarkan hash isinya, mis.
+# dokumen/blob/3f/3fa1...e9.pdf, sehingga file identik hanya disimpan sekali.
+BLOB_DIR = 'dokumen/blob'
+DOKUMEN_FIELDS = ('dok_kk', 'dok_akte', 'dok_ijazah', 'dok_ktp_ortu', 'dok_kip')
+# File blob tanpa baris DokumenBlob baru dihapus setelah tidak disentuh selama ini;
+# simpan Siswa yang sedang berjalan baru mencatat referensinya setelah INSERT.
+TENGGANG_BLOB_YATIM = timedelta(hours=1)
+
+
+def hash_berkas(content):
+    sha = hashlib.sha256()
+    for chunk in content.chunks():
+        sha.update(chunk)
+    return sha.hexdigest()
+
+
+def nama_blob(sha256, nama_asli):
+    ekstensi = os.path.splitext(nama_asli)[1].lower()[:10]
+    return f'{BLOB_DIR}/{sha256[:2]}/{sha256}{ekstensi}'
+
+
+@deconstructible
+class DokumenStorage(FileSystemStorage):
+    """
+    Storage content-addressed untuk field dok_* Siswa.
+
+    File disimpan dengan nama dari SHA-256 isinya. Jika blob yang sama sudah
+    ada, file tidak ditulis lagi dan path yang ada dikembalikan. Jumlah
+    referensi (DokumenBlob) dinaikkan dan dilepas oleh signal Siswa setelah
+    barisnya tersimpan/terhapus, sehingga ikut transaksi yang sama; blob
+    tanpa referensi dihapus. File yang tertinggal tanpa baris DokumenBlob
+    (mis. simpan yang di-rollback) dibersihkan oleh `bersihkan_unggah`.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Nama akhir ditentukan oleh hash di _save, jadi tidak perlu mencari
+        # nama bebas (yang juga berarti satu stat file lebih sedikit).
+        return name
+
+    def _save(self, name, content):
+        from .models import DokumenBlob
+
+        sha256 = hash_berkas(content)
+        # Isi yang sama dengan ekstensi lain tetap memakai blob yang sudah ada
+        nama = DokumenBlob.objects.filter(sha256=sha256).values_list('nama', flat=True).first()
+        if nama is None:
+            nama = nama_blob(sha256, name)
+        if not self._sentuh(nama):
+            self._tulis_blob(nama, content)
+        return nama
+
+    def _sentuh(self, nama):
+        """
+        Perbarui mtime blob yang dipakai ulang supaya tidak dianggap yatim oleh
+        bersihkan_blob_yatim(). False jika filenya tidak ada.
+        """
+        try:
+            os.utime(self.path(nama))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _tulis_blob(self, nama, content):
+        # Tulis ke nama sementara lalu os.replace: penulis lain dengan isi yang
+        # sama tidak bentrok dan pembaca tidak pernah melihat file setengah jadi.
+        sementara = super()._save(f'{nama}.{uuid.uuid4().hex}.tmp', content)
+        os.replace(self.path(sementara), self.path(nama))
+
+    def tambah_referensi(self, nama, isi=None):
+        """
+        Naikkan referensi blob; dipanggil setelah baris Siswa yang memakainya
+        ditulis. `isi` adalah file upload yang baru disimpan: jika blob yang
+        dipilih _save sempat dilepas (baris dan file terhapus) sebelum
+        referensinya tercatat, file ditulis ulang dari isi tersebut.
+        """
+        from .models import DokumenBlob
+
+        if not nama or not nama.startswith(f'{BLOB_DIR}/'):
+            return
+        with transaction.atomic():
+            if DokumenBlob.objects.filter(nama=nama).update(jumlah_referensi=F('jumlah_referensi') + 1):
+                return
+            # Tidak ada baris: blob baru, atau lepas() sudah menghapus baris dan
+            # filenya di transaksi yang sama, jadi cek file di sini tidak balapan.
+            if not self.exists(nama):
+                if isi is None or isi.closed:
+                    raise FileNotFoundError(f'Blob {nama} sudah dihapus dan isinya tidak tersedia.')
+                self._tulis_blob(nama, File(isi))
+            try:
+                with transaction.atomic():
+                    DokumenBlob.objects.create(
+                        sha256=os.path.splitext(os.path.basename(nama))[0], nama=nama,
+                        ukuran=self.size(nama), jumlah_referensi=1,
+                    )
+            except IntegrityError:
+                # Blob yang sama baru saja dicatat oleh request lain
+                DokumenBlob.objects.filter(nama=nama).update(jumlah_referensi=F('jumlah_referensi') + 1)
+
+    def lepas(self, nama):
+        """Kurangi referensi blob; hapus file jika sudah tidak dipakai siapa pun."""
+        from .models import DokumenBlob
+
+        if not nama or not nama.startswith(f'{BLOB_DIR}/'):
+            # File lama (sebelum dedup) tidak dihitung referensinya
+            return
+        with transaction.atomic():
+            DokumenBlob.objects.filter(nama=nama, jumlah_referensi__gt=0).update(
+                jumlah_referensi=F('jumlah_referensi') - 1,
+            )
+            # Baris hanya terhapus jika referensinya memang habis (tidak ada
+            # tambah_referensi yang menyusul). File dihapus sebelum commit,
+            # selagi lock tulis masih dipegang.
+            dihapus, _ = DokumenBlob.objects.filter(nama=nama, jumlah_referensi__lte=0).delete()
+            if dihapus:
+                self.delete(nama)
+
+
+_dokumen_storage = None
+
+
+def dokumen_storage():
+    """Callable untuk `storage=` FileField agar migrasi tidak menyimpan instance storage."""
+    global _dokumen_storage
+    if _dokumen_storage is None:
+        _dokumen_storage = DokumenStorage()
+    return _dokumen_storage
+
+
+def hitung_ulang_referensi():
+    """Bangun ulang tabel DokumenBlob dari path dok_* yang benar-benar dipakai Siswa."""
+    from .models import DokumenBlob, Siswa
+
+    storage = dokumen_storage()
+    referensi = Counter()
+    for row in Siswa.objects.values_list(*DOKUMEN_FIELDS).iterator(chunk_size=2000):
+        referensi.update(nama for nama in row if nama and nama.startswith(f'{BLOB_DIR}/'))
+
+    with transaction.atomic():
+        DokumenBlob.objects.all().delete()
+        DokumenBlob.objects.bulk_create([
+            DokumenBlob(
+                sha256=os.path.splitext(os.path.basename(nama))[0], nama=nama,
+                ukuran=storage.size(nama), jumlah_referensi=jumlah,
+            )
+            for nama, jumlah in referensi.items() if storage.exists(nama)
+        ], batch_size=500)
+    return len(referensi)
+
+
+def bersihkan_blob_yatim(tenggang=TENGGANG_BLOB_YATIM):
+    """
+    Hapus file di BLOB_DIR yang tidak punya baris DokumenBlob, mis. dari simpan
+    Siswa yang di-rollback (_save menulis file sebelum INSERT) atau file
+    sementara _tulis_blob yang tertinggal. File yang disentuh dalam `tenggang`
+    terakhir dilewati.
+    """
+    from .models import DokumenBlob
+
+    storage = dokumen_storage()
+    akar = Path(storage.path(BLOB_DIR))
+    if not akar.is_dir():
+        return 0
+    batas = time.time() - tenggang.total_seconds()
+    kandidat = {
+        path.relative_to(storage.location).as_posix(): path
+        for path in akar.rglob('*') if path.is_file() and path.stat().st_mtime < batas
+    }
+    daftar_nama = list(kandidat)
+    terpakai = set()
+    for mulai in range(0, len(daftar_nama), 500):
+        terpakai.update(DokumenBlob.objects.filter(
+            nama__in=daftar_nama[mulai:mulai + 500],
+        ).values_list('nama', flat=True))
+
+    dihapus = 0
+    for nama, path in kandidat.items():
+        if nama in terpakai:
+            continue
+        try:
+            # Bisa saja baru dipakai ulang oleh _save sejak didaftar
+            if path.stat().st_mtime >= batas:
+                continue
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        dihapus += 1
+    return dihapus
@@ -1,3 +1,1616 @@
-from django.test import TestCase
+import base64
+import csv
+import hashlib
+import importlib
+import io
+import json
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches
+from django.utils import timezone
+from PIL import Image
+import openpyxl
+from rest_framework.exceptions import ValidationError
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from akun.tests import BUDGET_QUERY as BUDGET_AKUN
+from akun.models import Profile
+from akun.serializers import MyTokenObtainPairSerializer
+from akun.tests import kredensial
+from notifikasi.models import Notifikasi
+from notifikasi.tests import BUDGET_QUERY as BUDGET_NOTIFIKASI
+from pengaturan.tests import BUDGET_QUERY as BUDGET_PENGATURAN
+import pengelolaSiswa.urls
+from pengelolaSiswa import gambar, instrumentasi, metrik, worker
+from pengelolaSiswa.cache import timeout_cache
+from pengelolaSiswa.query_budget import QueryBudgetMixin, rute_api
+
+from . import exporter, importer, statistik, storage, transisi, unggah
+from .management.commands import seed_siswa
+from .models import DokumenBlob, SesiUnggah, Siswa, StatistikSiswaBulanan
+from .search import FTS_TABLE
+from .serializers import FILE_FIELDS, SiswaListSerializer, SiswaSerializer, needs_instances, serialize_values
+from .storage import DokumenStorage, dokumen_storage
+
+
+def buat_siswa(**kwargs):
+    data = dict(
+        nama_lengkap='Budi Santoso',
+        nisn='0012345678',
+        tempat_lahir='Bandung',
+        tanggal_lahir=date(2008, 5, 17),
+        nik='3273011705080001',
+        jenis_kelamin='L',
+        alamat='Jl. Merdeka No. 1',
+        no_telepon='081234567890',
+        asal_sekolah='SMP Negeri 1 Bandung',
+        alamat_asal_sekolah='Jl. Sumatera No. 5',
+        nama_ayah='Ahmad Santoso',
+        nama_ibu='Siti Aminah',
+        no_telepon_ortu='081298765432',
+    )
+    data.update(kwargs)
+    return Siswa.objects.create(**data)
+
+
+class DirektoriSementaraMixin:
+    """MEDIA_ROOT dan UNGGAH_TEMP_DIR di folder sementara yang dihapus setelah setiap test."""
+
+    def setUp(self):
+        super().setUp()
+        direktori = tempfile.TemporaryDirectory()
+        self.addCleanup(direktori.cleanup)
+        self.media_root = Path(direktori.name) / 'media'
+        self.temp_unggah = Path(direktori.name) / 'unggah'
+        pengaturan = override_settings(MEDIA_ROOT=str(self.media_root), UNGGAH_TEMP_DIR=self.temp_unggah)
+        pengaturan.enable()
+        self.addCleanup(pengaturan.disable)
+
+
+class QueryPlanTests(TestCase):
+    """
+    Menjalankan EXPLAIN QUERY PLAN untuk setiap query yang benar-benar
+    dikirim oleh view siswa, dan gagal jika ada yang jatuh ke full table scan.
+    """
+
+    # "SCAN siswa_siswa" tanpa "USING ... INDEX" berarti seluruh tabel dibaca
+    FULL_SCAN = re.compile(r'^SCAN (TABLE )?(?P<table>\w+)(?: AS \w+)?$')
+    # Tabel kecil/lookup yang memang wajar dibaca utuh
+    TABEL_DIABAIKAN = {'sqlite_master', 'django_migrations', 'django_content_type'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+        cls.siswa = buat_siswa()
+        buat_siswa(nama_lengkap='Citra Lestari', nisn='0087654321', nik='3273015509080002',
+                   jenis_kelamin='P', kelas='XI', status='AKTIF')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertTanpaFullScan(self, method, url, data=None, **extra):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, data, **extra)
+        self.assertLess(response.status_code, 400, response.content)
+
+        diperiksa = 0
+        for query in ctx.captured_queries:
+            sql = query['sql']
+            if not re.match(r'^\s*(SELECT|UPDATE|DELETE)\b', sql, re.IGNORECASE):
+                continue
+            diperiksa += 1
+            for detail in self.explain(sql):
+                match = self.FULL_SCAN.match(detail.strip())
+                if match and match.group('table') not in self.TABEL_DIABAIKAN:
+                    self.fail(f'Full table scan pada {url}:\n  {detail}\n  SQL: {sql}')
+        self.assertGreater(diperiksa, 0, f'Tidak ada query yang tertangkap untuk {url}')
+        return response
+
+    def test_list(self):
+        self.assertTanpaFullScan('get', '/api/siswa/')
+
+    def test_list_filter_status_kelas(self):
+        self.assertTanpaFullScan('get', '/api/siswa/', {'status': 'AKTIF', 'kelas': 'XI'})
+
+    def test_list_filter_status(self):
+        self.assertTanpaFullScan('get', '/api/siswa/', {'status': 'BARU'})
+
+    def test_list_filter_kelas(self):
+        self.assertTanpaFullScan('get', '/api/siswa/', {'kelas': 'X'})
+
+    def test_list_cursor(self):
+        response = self.client.get('/api/siswa/', {'pagination': 'cursor', 'page_size': 1})
+        self.assertTanpaFullScan('get', response.data['next'])
+
+    def test_list_cursor_dengan_filter(self):
+        self.assertTanpaFullScan('get', '/api/siswa/', {'pagination': 'cursor', 'kelas': 'XI', 'status': 'AKTIF'})
+
+    def test_search_nama(self):
+        # Index FTS yang kosong/tidak sinkron juga lolos cek query plan, jadi hasilnya ikut diperiksa
+        response = self.assertTanpaFullScan('get', '/api/siswa/', {'search': 'Santoso'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.siswa.pk])
+
+    def test_search_nomor(self):
+        response = self.assertTanpaFullScan('get', '/api/siswa/', {'search': '0012'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.siswa.pk])
+
+    def test_retrieve(self):
+        self.assertTanpaFullScan('get', f'/api/siswa/{self.siswa.pk}/')
+
+    def test_partial_update(self):
+        self.assertTanpaFullScan('patch', f'/api/siswa/{self.siswa.pk}/', {'status': 'AKTIF'}, format='json')
+
+    def test_destroy(self):
+        self.assertTanpaFullScan('delete', f'/api/siswa/{self.siswa.pk}/')
+
+    def test_statistik(self):
+        self.assertTanpaFullScan('get', '/api/statistik-siswa/')
+
+    def test_statistik_semester(self):
+        self.assertTanpaFullScan('get', '/api/statistik-siswa/', {'tahunAjaran': '2024/2025', 'semester': 'Genap'})
+
+
+class PencarianSiswaTests(TestCase):
+    """Hasil `?search=` (index FTS5 trigram dijaga oleh trigger, lihat siswa/search.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def cari(self, kata_kunci):
+        response = self.client.get('/api/siswa/', {'search': kata_kunci})
+        self.assertEqual(response.status_code, 200, response.content)
+        return sorted(row['nisn'] for row in response.data['results'])
+
+    def test_trigger_fts_ada_setelah_migrate(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'siswa_siswa'")
+            trigger = {row[0] for row in cursor.fetchall()}
+        self.assertEqual(trigger, {f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au'})
+
+    def test_siswa_baru_langsung_terindeks(self):
+        buat_siswa()
+        self.assertEqual(self.cari('Santoso'), ['0012345678'])
+
+
+    def isi(self):
+        self.budi = buat_siswa()
+        self.citra = buat_siswa(nama_lengkap='Citra Lestari', nisn='0087654321', nik='3273015509080002')
+        self.dewi = buat_siswa(nama_lengkap='Dewi Santika', nisn='0099887766', nik='3205010302090001')
+
+    def test_trigram_di_tengah_kata(self):
+        self.isi()
+        self.assertEqual(self.cari('ntos'), ['0012345678'])
+        self.assertEqual(self.cari('SANT'), ['0012345678', '0099887766'])
+
+    def test_beberapa_kata_kunci_harus_cocok_semua(self):
+        self.isi()
+        self.assertEqual(self.cari('Dewi Santi'), ['0099887766'])
+        self.assertEqual(self.cari('Citra Santoso'), [])
+
+    def test_kata_kunci_pendek_memakai_icontains(self):
+        self.isi()
+        self.assertEqual(self.cari('Ci'), ['0087654321'])
+        self.assertEqual(self.cari('i'), ['0012345678', '0087654321', '0099887766'])
+
+    def test_prefix_angka_nisn_dan_nik(self):
+        self.isi()
+        self.assertEqual(self.cari('00876'), ['0087654321'])
+        self.assertEqual(self.cari('3205'), ['0099887766'])
+        self.assertEqual(self.cari('3273'), ['0012345678', '0087654321'])
+        # Prefix, bukan substring
+        self.assertEqual(self.cari('654321'), [])
+
+    def test_perubahan_dan_penghapusan_sampai_ke_index(self):
+        self.isi()
+        self.client.patch(f'/api/siswa/{self.budi.pk}/', {'nama_lengkap': 'Budi Hartono'}, format='json')
+        self.assertEqual(self.cari('Santoso'), [])
+        self.assertEqual(self.cari('Hartono'), ['0012345678'])
+
+        Siswa.objects.filter(pk=self.citra.pk).update(nama_lengkap='Citra Kirana')
+        self.assertEqual(self.cari('Kirana'), ['0087654321'])
+
+        self.dewi.delete()
+        self.assertEqual(self.cari('Santika'), [])
+
+    def test_diurutkan_berdasarkan_relevansi(self):
+        self.isi()
+        buat_siswa(nama_lengkap='Santoso Santoso Santoso', nisn='0055555555', nik='3273010000000055')
+        response = self.client.get('/api/siswa/', {'search': 'Santoso'})
+        self.assertEqual([row['nisn'] for row in response.data['results']], ['0055555555', '0012345678'])
+
+    def test_digabung_dengan_values_dan_cursor(self):
+        self.isi()
+        response = self.client.get('/api/siswa/', {'search': 'Sant', 'fields': 'nisn'})
+        self.assertEqual(sorted(row['nisn'] for row in response.data['results']), ['0012345678', '0099887766'])
+        self.assertEqual(list(response.data['results'][0]), ['nisn'])
+
+        # Mode cursor memakai urutan keyset (-created_at, -id), bukan relevansi
+        hasil = []
+        params = {'search': 'Sant', 'pagination': 'cursor', 'page_size': 1, 'ringkas': 1}
+        response = self.client.get('/api/siswa/', params)
+        while True:
+            self.assertEqual(response.status_code, 200, response.content)
+            hasil += [row['nisn'] for row in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(hasil, ['0099887766', '0012345678'])
+
+
+def isi_siswa(jumlah):
+    """Tambah siswa (bulk) sampai total `jumlah` baris."""
+    mulai = Siswa.objects.count()
+    Siswa.objects.bulk_create([
+        Siswa(
+            nama_lengkap=f'Siswa Uji {i}', nisn=f'77{i:08d}', tempat_lahir='Bandung',
+            tanggal_lahir=date(2008, 1, 1), nik=f'3273{i:012d}', jenis_kelamin='LP'[i % 2],
+            alamat='Jl. Uji', no_telepon='0812', asal_sekolah='SMP Uji', alamat_asal_sekolah='Jl. Uji',
+            nama_ayah='Ayah', nama_ibu='Ibu', no_telepon_ortu='0813',
+            kelas=('X', 'XI', 'XII')[i % 3], status=('BARU', 'AKTIF')[i % 2],
+        )
+        for i in range(mulai, jumlah)
+    ], batch_size=500)
+
+
+def csv_impor(jumlah):
+    baris = ['nama_lengkap,nisn,tempat_lahir,tanggal_lahir,nik,jenis_kelamin,alamat,no_telepon,'
+             'asal_sekolah,alamat_asal_sekolah,nama_ayah,nama_ibu,no_telepon_ortu']
+    baris += [
+        f'Impor {i},66{jumlah:03d}{i:05d},Bandung,2008-01-01,3274{jumlah:04d}{i:08d},L,Jl. Impor,0812,'
+        f'SMP Impor,Jl. Impor,Ayah,Ibu,0813'
+        for i in range(jumlah)
+    ]
+    return {'file': SimpleUploadedFile('siswa.csv', '\n'.join(baris).encode(), content_type='text/csv')}
+
+
+# Jumlah query maksimal per route (lihat pengelolaSiswa/query_budget.py)
+BUDGET_QUERY = {
+    'api-root': 0,
+    # COUNT + halaman; mode cursor tanpa COUNT (user dari token, tanpa query)
+    'siswa-list': {None: 2, 10: 1, 100: 1},
+    # pendaftaran publik: INSERT siswa + upsert rollup statistik (notifikasi ditulis setelah commit)
+    ('siswa-list', 'POST'): 2,
+    'siswa-detail': 1,
+    # SELECT + UPDATE + upsert rollup statistik
+    ('siswa-detail', 'PATCH'): 3,
+    # SELECT + DELETE + upsert rollup statistik (+ savepoint)
+    ('siswa-detail', 'DELETE'): 5,
+    'siswa-berkas': 1,
+    # INSERT + upsert rollup statistik (dalam savepoint)
+    'siswa-impor': 4,
+    # satu SELECT streaming
+    'siswa-export': 1,
+    # savepoint + (hitung perubahan rollup + UPDATE) per aturan + upsert rollup;
+    # konstan terhadap jumlah siswa, hanya bergantung pada jumlah aturan transisi
+    'siswa-transisi': 12,
+    # publik: INSERT sesi / SELECT sesi / SELECT + UPDATE offset (+ UPDATE status di chunk terakhir)
+    'unggah-list': 1,
+    'unggah-detail': 1,
+    ('unggah-detail', 'PATCH'): 3,
+    # generasi cache + agregat rollup
+    'statistik-siswa': 3,
+    'statistik-siswa-cache': 0,
+    'statistik-siswa-series': 1,
+    'metrics': 0,
+    'instrumentasi': 0,
+}
+
+
+class KeysetPaginationTests(TestCase):
+    """Mode `?pagination=cursor` untuk daftar siswa (pengelolaSiswa/pagination.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+        data = [
+            ('Budi Santoso', 'X', 'BARU'), ('Sari Lestari', 'XI', 'AKTIF'), ('Budi Hartono', 'XI', 'AKTIF'),
+            ('Dewi Anggraini', 'XII', 'AKTIF'), ('Budiman Saputra', 'XI', 'AKTIF'), ('Agus Salim', 'X', 'BARU'),
+            ('Putri Budiarti', 'XI', 'AKTIF'),
+        ]
+        for i, (nama, kelas, status_siswa) in enumerate(data):
+            buat_siswa(nama_lengkap=nama, nisn=f'00300000{i:02d}', nik=f'32730200000000{i:02d}', kelas=kelas, status=status_siswa)
+        # Sebagian besar siswa dibuat pada detik yang sama: urutan ditentukan id
+        sama = timezone.now().replace(microsecond=0)
+        ids = list(Siswa.objects.order_by('pk').values_list('pk', flat=True))
+        Siswa.objects.filter(pk__in=ids[1:6]).update(created_at=sama)
+        Siswa.objects.filter(pk=ids[6]).update(created_at=sama - timedelta(days=1))
+        Siswa.objects.filter(pk=ids[0]).update(created_at=sama + timedelta(days=1))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def urutan(self, **filter):
+        return list(Siswa.objects.filter(**filter).order_by('-created_at', '-id').values_list('nisn', flat=True))
+
+    def halaman(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+
+    def jelajahi(self, **params):
+        """Ikuti `next` sampai habis lalu `previous` kembali ke awal; kembalikan kedua urutan."""
+        halaman = [self.halaman('/api/siswa/', {'pagination': 'cursor', 'page_size': 2, **params})]
+        self.assertIsNone(halaman[0]['previous'])
+        while halaman[-1]['next']:
+            halaman.append(self.halaman(halaman[-1]['next']))
+        maju = [[row['nisn'] for row in page['results']] for page in halaman]
+
+        mundur = [maju[-1]]
+        data = halaman[-1]
+        while data['previous']:
+            data = self.halaman(data['previous'])
+            mundur.insert(0, [row['nisn'] for row in data['results']])
+        self.assertEqual(mundur, maju)
+        self.assertTrue(all(len(page) <= 2 for page in maju))
+        return [nisn for page in maju for nisn in page]
+
+    def test_tanpa_duplikat_atau_celah(self):
+        hasil = self.jelajahi()
+        self.assertEqual(hasil, self.urutan())
+        self.assertEqual(len(set(hasil)), 7)
+
+    def test_dengan_filter(self):
+        self.assertEqual(self.jelajahi(kelas='XI', status='AKTIF'), self.urutan(kelas='XI', status='AKTIF'))
+        self.assertEqual(self.jelajahi(status='BARU'), self.urutan(status='BARU'))
+
+    def test_dengan_pencarian(self):
+        # Di mode cursor hasil pencarian mengikuti urutan keyset, bukan ranking relevansi
+        hasil = self.jelajahi(search='Budi')
+        self.assertEqual(hasil, [nisn for nisn in self.urutan() if nisn in set(
+            Siswa.objects.filter(nama_lengkap__icontains='budi').values_list('nisn', flat=True)
+        )])
+        self.assertEqual(len(hasil), 4)
+        self.assertEqual(self.jelajahi(search='Budi', kelas='XI'), [
+            nisn for nisn in hasil if nisn in set(Siswa.objects.filter(kelas='XI').values_list('nisn', flat=True))
+        ])
+
+    def test_cursor_tidak_valid(self):
+        def token(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+        berikut = self.halaman('/api/siswa/', {'pagination': 'cursor', 'page_size': 2})['next']
+        asli = re.search(r'cursor=([^&]+)', berikut).group(1)
+        for cursor in (
+            'bukan-base64!', asli[:-3], token([1, 2]), token({'p': ['kemarin', 5]}),
+            token({'p': ['2026-01-01T00:00:00+00:00']}), token({'p': ['2026-01-01T00:00:00+00:00', 'x']}),
+        ):
+            response = self.client.get('/api/siswa/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.data, {'cursor': ['Cursor tidak valid.']})
+
+
+class SparseFieldsTests(TestCase):
+    """`?fields=`, `?ringkas=1` dan jalur cepat values() pada daftar siswa."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+        buat_siswa()
+        buat_siswa(
+            nama_lengkap='Citra Lestari', nisn='0087654321', nik='3273015509080002', jenis_kelamin='P',
+            kelas='XI', status='AKTIF', no_telepon='', alamat='Jl. "Kutip" & <Tanda>',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def daftar(self, **params):
+        response = self.client.get('/api/siswa/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['results']
+
+    def test_fields_memangkas_key(self):
+        for row in self.daftar(fields='nama_lengkap,nisn'):
+            self.assertEqual(list(row), ['nama_lengkap', 'nisn'])
+        # Nama yang tidak dikenal diabaikan; jika tidak ada yang dikenal sama sekali, semua field dikirim
+        self.assertEqual(list(self.daftar(fields='nisn, tidak_ada,')[0]), ['nisn'])
+        self.assertEqual(list(self.daftar(fields='tidak_ada')[0]), list(self.daftar()[0]))
+
+    def test_ringkas(self):
+        rows = self.daftar(ringkas=1)
+        self.assertEqual([list(row) for row in rows], [SiswaListSerializer.Meta.fields] * 2)
+        self.assertEqual(list(self.daftar(ringkas=1, fields='id,kelas,alamat')[0]), ['id', 'kelas'])
+
+    def test_jalur_values_identik_dengan_instance(self):
+        request = Request(APIRequestFactory().get('/api/siswa/'))
+        lengkap = SiswaSerializer(Siswa.objects.order_by('-created_at'), many=True, context={'request': request}).data
+        kolom = [
+            name for name, field in SiswaSerializer().fields.items()
+            if not field.write_only and field.source not in FILE_FIELDS
+        ]
+
+        with mock.patch('siswa.views.serialize_values', wraps=serialize_values) as jalur_cepat:
+            rows = self.daftar(fields=','.join(kolom))
+        jalur_cepat.assert_called_once()
+        self.assertEqual([list(row) for row in rows], [kolom] * 2)
+        self.assertEqual(
+            json.loads(JSONRenderer().render(rows)),
+            json.loads(JSONRenderer().render([{name: row[name] for name in kolom} for row in lengkap])),
+        )
+
+    def test_field_bukan_kolom_memakai_instance(self):
+        class Kolom(serializers.ModelSerializer):
+            class Meta:
+                model = Siswa
+                fields = ['id', 'nama_lengkap', 'kelas']
+
+        class DenganMethod(Kolom):
+            nama_panggilan = serializers.SerializerMethodField()
+
+            class Meta(Kolom.Meta):
+                fields = Kolom.Meta.fields + ['nama_panggilan']
+
+            def get_nama_panggilan(self, obj):
+                return obj.nama_lengkap.split()[0]
+
+        class DenganSourceBertitik(Kolom):
+            panjang_nama = serializers.IntegerField(source='nama_lengkap.__len__')
+
+            class Meta(Kolom.Meta):
+                fields = Kolom.Meta.fields + ['panjang_nama']
+
+        self.assertFalse(needs_instances(Kolom()))
+        self.assertTrue(needs_instances(DenganMethod()))
+        self.assertTrue(needs_instances(DenganSourceBertitik()))
+
+
+class SiswaQueryBudgetTests(DirektoriSementaraMixin, QueryBudgetMixin, TestCase):
+    """Budget query per endpoint; daftar diuji dengan 10 dan 1000 siswa."""
+
+    budget_query = BUDGET_QUERY
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+        cls.siswa = buat_siswa()
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(**kredensial(self.admin))
+
+    def test_api_root(self):
+        self.client.credentials()
+        self.assertBudgetQuery('api-root', 'get', '/api/')
+
+    def test_list(self):
+        for params in ({}, {'ringkas': 1}, {'kelas': 'XI', 'status': 'AKTIF'}, {'search': 'Uji'}, {'search': '7700'}):
+            with self.subTest(params=params):
+                self.assertQueryKonstan('siswa-list', 'get', '/api/siswa/', isi_siswa, params)
+
+    def test_list_cursor_per_page_size(self):
+        for page_size in (10, 100):
+            with self.subTest(page_size=page_size):
+                self.assertQueryKonstan(
+                    'siswa-list', 'get', '/api/siswa/', isi_siswa,
+                    {'pagination': 'cursor', 'page_size': page_size}, page_size=page_size,
+                )
+
+    def test_pendaftaran(self):
+        self.client.credentials()
+        response = self.assertBudgetQuery('siswa-list', 'post', '/api/siswa/', {
+            'nama_lengkap': 'Dewi Anggraini', 'nisn': '0011111111', 'tempat_lahir': 'Garut',
+            'tanggal_lahir': '2009-02-03', 'nik': '3205010302090001', 'jenis_kelamin': 'P',
+            'alamat': 'Jl. Cimanuk', 'no_telepon': '0812', 'asal_sekolah': 'SMP 1 Garut',
+            'alamat_asal_sekolah': 'Jl. Garut', 'nama_ayah': 'Asep', 'nama_ibu': 'Euis', 'no_telepon_ortu': '0813',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_detail(self):
+        self.assertBudgetQuery('siswa-detail', 'get', f'/api/siswa/{self.siswa.pk}/')
+        self.assertBudgetQuery('siswa-detail', 'patch', f'/api/siswa/{self.siswa.pk}/', {'status': 'AKTIF'}, format='json')
+        self.assertBudgetQuery('siswa-detail', 'delete', f'/api/siswa/{self.siswa.pk}/')
+
+    def test_berkas(self):
+        response = self.assertBudgetQuery('siswa-berkas', 'get', f'/api/siswa/{self.siswa.pk}/berkas/dok_kk/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_impor(self):
+        # Di atas ~37 baris bulk_create dipecah menjadi beberapa INSERT karena
+        # batas 999 parameter SQLite; yang diuji di sini tidak ada query per baris
+        self.assertQueryKonstan(
+            'siswa-impor', 'post', '/api/siswa/import/', lambda jumlah: None, csv_impor, ukuran=(10, 30),
+            format='multipart',
+        )
+
+    def test_export(self):
+        self.assertQueryKonstan('siswa-export', 'get', '/api/siswa/export/', isi_siswa)
+
+    def test_transisi(self):
+        self.assertQueryKonstan(
+            'siswa-transisi', 'post', '/api/siswa/transisi/', isi_siswa, {'dry_run': True}, format='json',
+        )
+
+    def test_unggah(self):
+        self.client.credentials()
+        isi = b'%PDF-1.4 uji'
+        response = self.assertBudgetQuery('unggah-list', 'post', '/api/unggah/', {
+            'kolom': 'dok_kk', 'nama_file': 'kk.pdf', 'ukuran': len(isi), 'sha256': hashlib.sha256(isi).hexdigest(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        url = response['Location']
+        self.assertBudgetQuery('unggah-detail', 'get', url)
+        response = self.assertBudgetQuery(
+            'unggah-detail', 'patch', url, isi, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET='0',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_statistik(self):
+        self.assertQueryKonstan('statistik-siswa', 'get', '/api/statistik-siswa/', lambda jumlah: (cache.clear(), isi_siswa(jumlah)))
+        self.assertBudgetQuery('statistik-siswa-cache', 'get', '/api/statistik-siswa/cache/')
+        self.assertBudgetQuery('statistik-siswa-series', 'get', '/api/statistik-siswa/series/')
+
+    def test_metrics(self):
+        self.client.credentials()
+        self.assertBudgetQuery('metrics', 'get', '/metrics')
+
+    def test_instrumentasi(self):
+        self.assertBudgetQuery('instrumentasi', 'get', '/api/instrumentasi/')
+
+
+class UnggahBertahapTests(DirektoriSementaraMixin, TestCase):
+    ISI = b'%PDF-1.4 kartu keluarga'
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def sesi_selesai(self):
+        response = self.client.post('/api/unggah/', {
+            'kolom': 'dok_kk', 'nama_file': 'kk.pdf', 'ukuran': len(self.ISI),
+            'sha256': hashlib.sha256(self.ISI).hexdigest(),
+        }, format='json')
+        sesi_id = response.data['id']
+        response = self.client.patch(
+            f'/api/unggah/{sesi_id}/', self.ISI, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET='0',
+        )
+        self.assertEqual(response.data['status'], SesiUnggah.STATUS_SELESAI)
+        return sesi_id
+
+    def data_siswa(self, sesi_id, nomor):
+        return {
+            'nama_lengkap': f'Siswa Unggah {nomor}', 'nisn': f'00555{nomor:05d}', 'tempat_lahir': 'Garut',
+            'tanggal_lahir': '2009-02-03', 'nik': f'320501030209{nomor:04d}', 'jenis_kelamin': 'P',
+            'alamat': 'Jl. Cimanuk', 'no_telepon': '0812', 'asal_sekolah': 'SMP 1 Garut',
+            'alamat_asal_sekolah': 'Jl. Garut', 'nama_ayah': 'Asep', 'nama_ibu': 'Euis', 'no_telepon_ortu': '0813',
+            'dok_kk_upload': sesi_id,
+        }
+
+    def test_sesi_dipakai_untuk_siswa(self):
+        sesi_id = self.sesi_selesai()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/siswa/', self.data_siswa(sesi_id, 1), format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        siswa = Siswa.objects.get(pk=response.data['id'])
+        with siswa.dok_kk.open('rb') as berkas:
+            self.assertEqual(berkas.read(), self.ISI)
+        self.assertEqual(SesiUnggah.objects.get(pk=sesi_id).status, SesiUnggah.STATUS_DIPAKAI)
+        self.assertEqual(list(self.temp_unggah.glob('*.part')), [])
+
+    def test_dua_request_memakai_sesi_yang_sama(self):
+        sesi_id = self.sesi_selesai()
+        # Keduanya lolos validasi (sesi masih SELESAI), lalu disimpan berurutan
+        pertama = SiswaSerializer(data=self.data_siswa(sesi_id, 1))
+        kedua = SiswaSerializer(data=self.data_siswa(sesi_id, 2))
+        self.assertTrue(pertama.is_valid(), pertama.errors)
+        self.assertTrue(kedua.is_valid(), kedua.errors)
+        berkas = pertama._file_unggahan[0]
+
+        pertama.save()
+        with self.assertRaises(ValidationError) as ctx:
+            kedua.save()
+        self.assertIn('dok_kk_upload', ctx.exception.detail)
+        self.assertEqual(Siswa.objects.filter(nama_lengkap__startswith='Siswa Unggah').count(), 1)
+        # Handle file yang dibuka saat validasi ditutup setelah disimpan
+        self.assertTrue(berkas.closed)
+        self.assertEqual(kedua._file_unggahan, [])
+
+    def test_bersihkan_file_yatim(self):
+        aktif = SesiUnggah.objects.create(kolom='dok_kk', nama_file='a.pdf', ukuran=10, sha256='0' * 64)
+        dipakai = SesiUnggah.objects.create(
+            kolom='dok_kk', nama_file='b.pdf', ukuran=10, sha256='0' * 64, status=SesiUnggah.STATUS_DIPAKAI,
+        )
+        self.temp_unggah.mkdir(parents=True)
+        for nama in (aktif.pk, dipakai.pk, uuid.uuid4()):
+            (self.temp_unggah / f'{nama}.part').write_bytes(b'x')
+
+        self.assertEqual(unggah.bersihkan_file_yatim(), 2)
+        self.assertEqual([path.name for path in self.temp_unggah.glob('*.part')], [f'{aktif.pk}.part'])
+
+
+
+class BerkasSiswaTests(DirektoriSementaraMixin, TestCase):
+    ISI = b'%PDF-1.4 ' + bytes(range(256)) * 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+
+    def setUp(self):
+        super().setUp()
+        self.siswa = buat_siswa()
+        self.siswa.dok_kk.save('kk.pdf', ContentFile(self.ISI))
+        self.url = f'/api/siswa/{self.siswa.pk}/berkas/dok_kk/'
+        self.client = APIClient()
+        self.client.credentials(**kredensial(self.admin))
+
+    def test_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.ISI[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.ISI)}')
+
+    def test_range_di_luar_ukuran(self):
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.ISI)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.ISI)}')
+
+    def test_if_none_match(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_range_hanya_etag_kuat(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=0-3', HTTP_IF_RANGE=etag).status_code, 206)
+        # ETag lemah tidak boleh dipakai untuk If-Range: kirim file utuh
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-3', HTTP_IF_RANGE=f'W/{etag}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.ISI)
+
+    def test_serializer_mengembalikan_url_bertanda(self):
+        url = self.client.get(f'/api/siswa/{self.siswa.pk}/').data['dok_kk']
+        self.assertNotIn('/media/', url)
+        self.assertTrue(url.startswith(f'http://testserver{self.url}?'), url)
+
+        anonim = APIClient()
+        response = anonim.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.ISI)
+
+    def test_tanpa_login_atau_tanda_tangan_ditolak(self):
+        anonim = APIClient()
+        self.assertEqual(anonim.get(self.url).status_code, 401)
+        url = self.client.get(f'/api/siswa/{self.siswa.pk}/').data['dok_kk']
+        # Tanda tangan hanya berlaku untuk path berkas yang ditandatangani
+        query = url.partition('?')[2]
+        self.assertEqual(anonim.get(f'/api/siswa/{self.siswa.pk}/berkas/dok_akte/?{query}').status_code, 401)
+        self.assertEqual(anonim.get(f'/api/siswa/{self.siswa.pk}/?{query}').status_code, 401)
+        self.assertEqual(anonim.get(url.replace('ttd=', 'ttd=x')).status_code, 401)
+        with mock.patch('pengelolaSiswa.media.time.time', return_value=time.time() + 86400):
+            self.assertEqual(anonim.get(url).status_code, 401)
+
+    def test_token_di_query_string_tidak_diterima(self):
+        token = kredensial(self.admin)['HTTP_AUTHORIZATION'].split()[1]
+        self.assertEqual(APIClient().get(f'{self.url}?token={token}').status_code, 401)
+
+    def test_media_siswa_tidak_dilayani_publik(self):
+        # Pola static() hanya dibuat saat DEBUG; muat ulang urls dengan DEBUG=True
+        self.addCleanup(clear_url_caches)
+        self.addCleanup(importlib.reload, pengelolaSiswa.urls)
+        with override_settings(DEBUG=True):
+            importlib.reload(pengelolaSiswa.urls)
+        clear_url_caches()
+
+        self.assertEqual(APIClient().get(f'/media/{self.siswa.dok_kk.name}').status_code, 404)
+        (self.media_root / 'foto_profil_admin').mkdir(parents=True)
+        (self.media_root / 'foto_profil_admin' / 'default.jpg').write_bytes(b'jpg')
+        self.assertEqual(APIClient().get('/media/foto_profil_admin/default.jpg').status_code, 200)
+
+
+
+def gambar_jpeg(warna='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (600, 400), warna).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class DokumenBlobTests(DirektoriSementaraMixin, TestCase):
+    ISI = b'%PDF-1.4 kartu keluarga'
+    ISI_LAIN = b'%PDF-1.4 akte kelahiran'
+
+    def setUp(self):
+        super().setUp()
+        self.storage = dokumen_storage()
+
+    def referensi(self):
+        return dict(DokumenBlob.objects.values_list('nama', 'jumlah_referensi'))
+
+    def test_referensi_naik_dan_turun(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            pertama = buat_siswa(dok_kk=ContentFile(self.ISI, name='kk.pdf'))
+            # Isi sama dengan ekstensi lain tetap memakai blob yang sama
+            kedua = buat_siswa(nisn='0012345679', dok_akte=ContentFile(self.ISI, name='akte.PDF'))
+        blob = pertama.dok_kk.name
+        self.assertTrue(blob.startswith('dokumen/blob/'))
+        self.assertEqual(kedua.dok_akte.name, blob)
+        self.assertEqual(self.referensi(), {blob: 2})
+
+        # Simpan ulang tanpa mengganti dokumen tidak menambah referensi
+        pertama.alamat = 'Jl. Baru'
+        pertama.save()
+        pertama.dok_kk = ContentFile(self.ISI, name='kk-lagi.pdf')
+        pertama.save()
+        self.assertEqual(self.referensi(), {blob: 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pertama.dok_kk = ContentFile(self.ISI_LAIN, name='kk.pdf')
+            pertama.save()
+        self.assertEqual(self.referensi(), {blob: 1, pertama.dok_kk.name: 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            kedua.delete()
+        self.assertEqual(self.referensi(), {pertama.dok_kk.name: 1})
+        self.assertFalse(self.storage.exists(blob))
+
+    def test_simpan_gagal_tidak_menambah_referensi(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            blob = buat_siswa(dok_kk=ContentFile(self.ISI, name='kk.pdf')).dok_kk.name
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            buat_siswa(nama_lengkap=None, dok_kk=ContentFile(self.ISI, name='kk.pdf'))
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            buat_siswa(dok_kk=ContentFile(self.ISI, name='kk.pdf'))
+            raise RuntimeError('batal')
+        self.assertEqual(self.referensi(), {blob: 1})
+
+    def test_blob_dilepas_sebelum_referensi_tercatat(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            blob = buat_siswa(dok_kk=ContentFile(self.ISI, name='kk.pdf')).dok_kk.name
+        simpan = DokumenStorage._save
+
+        def simpan_lalu_dilepas(storage, name, content):
+            nama = simpan(storage, name, content)
+            # Request lain melepas referensi terakhir di antara _save dan post_save
+            DokumenBlob.objects.filter(nama=nama).update(jumlah_referensi=1)
+            storage.lepas(nama)
+            return nama
+
+        with mock.patch.object(DokumenStorage, '_save', autospec=True, side_effect=simpan_lalu_dilepas):
+            kedua = buat_siswa(nisn='0012345679', dok_akte=ContentFile(self.ISI, name='akte.pdf'))
+        self.assertEqual(kedua.dok_akte.name, blob)
+        self.assertEqual(self.referensi(), {blob: 1})
+        self.assertEqual((self.media_root / blob).read_bytes(), self.ISI)
+
+    def test_bersihkan_blob_yatim(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            dipakai = buat_siswa(dok_kk=ContentFile(self.ISI, name='kk.pdf')).dok_kk.name
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            yatim = buat_siswa(nisn='0012345679', dok_kk=ContentFile(self.ISI_LAIN, name='kk.pdf')).dok_kk.name
+            raise RuntimeError('batal')
+        self.assertTrue(self.storage.exists(yatim))
+        sisa = self.media_root / f'{dipakai}.{uuid.uuid4().hex}.tmp'
+        sisa.write_bytes(self.ISI)
+
+        # Masih dalam masa tenggang: bisa jadi simpan yang belum selesai
+        call_command('bersihkan_unggah', stdout=io.StringIO())
+        self.assertTrue(self.storage.exists(yatim))
+
+        lama = time.time() - storage.TENGGANG_BLOB_YATIM.total_seconds() - 60
+        for path in (self.media_root / yatim, self.media_root / dipakai, sisa):
+            os.utime(path, (lama, lama))
+        self.assertEqual(storage.bersihkan_blob_yatim(), 2)
+        self.assertFalse(self.storage.exists(yatim))
+        self.assertFalse(sisa.exists())
+        self.assertTrue(self.storage.exists(dipakai))
+        self.assertEqual(self.referensi(), {dipakai: 1})
+
+    def test_instance_dengan_kolom_ditunda(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            pk = buat_siswa(dok_kk=ContentFile(self.ISI, name='kk.pdf'), dok_akte=ContentFile(self.ISI_LAIN, name='akte.pdf')).pk
+        lama_kk, lama_akte = Siswa.objects.values_list('dok_kk', 'dok_akte').get(pk=pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            siswa = Siswa.objects.only('pk').get(pk=pk)
+            siswa.dok_kk = ContentFile(self.ISI_LAIN, name='kk.pdf')
+            siswa.save()
+        self.assertEqual(self.referensi(), {lama_akte: 2})
+        self.assertFalse(self.storage.exists(lama_kk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Siswa.objects.only('pk', 'nisn').get(pk=pk).delete()
+        self.assertEqual(self.referensi(), {})
+        self.assertFalse(self.storage.exists(lama_akte))
+
+    def test_dedup_dokumen(self):
+        lama = {'dokumen/kk/a.pdf': self.ISI, 'dokumen/kk/b.pdf': self.ISI, 'dokumen/akte/c.PDF': self.ISI,
+                'dokumen/akte/d.pdf': self.ISI_LAIN}
+        for nama, isi in lama.items():
+            path = self.media_root / nama
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(isi)
+        # Data lama dari sebelum storage content-addressed (tanpa signal)
+        pertama, kedua = buat_siswa(), buat_siswa(nisn='0012345679')
+        Siswa.objects.filter(pk=pertama.pk).update(dok_kk='dokumen/kk/a.pdf', dok_akte='dokumen/akte/d.pdf')
+        Siswa.objects.filter(pk=kedua.pk).update(dok_kk='dokumen/kk/b.pdf', dok_akte='dokumen/akte/c.PDF')
+
+        keluaran = io.StringIO()
+        call_command('dedup_dokumen', dry_run=True, stdout=keluaran)
+        self.assertIn('Blob unik            : 2', keluaran.getvalue())
+        self.assertEqual(Siswa.objects.get(pk=pertama.pk).dok_kk.name, 'dokumen/kk/a.pdf')
+        self.assertFalse(DokumenBlob.objects.exists())
+
+        call_command('dedup_dokumen', stdout=io.StringIO())
+        baris = dict((pk, (kk, akte)) for pk, kk, akte in Siswa.objects.values_list('pk', 'dok_kk', 'dok_akte'))
+        blob, blob_lain = baris[pertama.pk]
+        self.assertEqual(baris[kedua.pk], (blob, blob))
+        self.assertEqual(self.referensi(), {blob: 3, blob_lain: 1})
+        self.assertEqual((self.media_root / blob).read_bytes(), self.ISI)
+        for nama in lama:
+            self.assertFalse((self.media_root / nama).exists(), nama)
+
+
+class VarianFotoTests(DirektoriSementaraMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # Varian dibuat/dihapus langsung, bukan di thread worker
+        worker_sinkron = mock.patch.object(gambar.worker, 'submit', side_effect=lambda fn, *args, **kwargs: fn(*args, **kwargs))
+        worker_sinkron.start()
+        self.addCleanup(worker_sinkron.stop)
+        self.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(**kredensial(self.admin))
+
+    def siswa_dengan_foto(self, buat_varian=True):
+        siswa = buat_siswa()
+        with self.captureOnCommitCallbacks(execute=buat_varian):
+            siswa.foto_profil.save('budi.jpg', ContentFile(gambar_jpeg()))
+        return siswa
+
+    def test_varian_siswa_lewat_endpoint_berkas(self):
+        siswa = self.siswa_dengan_foto()
+        varian = self.client.get(f'/api/siswa/{siswa.pk}/').data['foto_profil_varian']
+        url = varian['thumb']['webp']
+        self.assertNotIn('/media/', url)
+        self.assertIn(f'/api/siswa/{siswa.pk}/berkas/foto_profil/?', url)
+
+        response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as thumb:
+            self.assertEqual(thumb.size, (96, 96))
+        self.assertEqual(APIClient().get(url.replace('thumb.webp', 'besar.webp')).status_code, 404)
+
+    def test_varian_belum_ada_mengirim_foto_asli(self):
+        siswa = self.siswa_dengan_foto(buat_varian=False)
+        url = self.client.get(f'/api/siswa/{siswa.pk}/').data['foto_profil_varian']['medium']['webp']
+        response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(b''.join(response.streaming_content), gambar_jpeg())
+
+    def test_ganti_foto_menghapus_varian_lama(self):
+        siswa = Siswa.objects.get(pk=self.siswa_dengan_foto().pk)
+        lama = siswa.foto_profil.name
+        self.assertTrue(gambar.varian_tersedia(lama))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            siswa.foto_profil.save('budi_baru.jpg', ContentFile(gambar_jpeg('blue')))
+        self.assertFalse(gambar.varian_tersedia(lama))
+        self.assertEqual(list((self.media_root / gambar.PREFIX / 'foto_profil').glob(f'{Path(lama).stem}.*')), [])
+        self.assertTrue(gambar.varian_tersedia(siswa.foto_profil.name))
+
+    def test_foto_akun_tanpa_varian_memakai_url_asli(self):
+        profile = self.admin.profile
+        self.assertEqual(profile.foto_profil.name, 'foto_profil_admin/default.jpg')
+        token = MyTokenObtainPairSerializer.get_token(self.admin)
+        self.assertEqual(token['profile_picture_thumb_url'], token['profile_picture_url'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.foto_profil.save('admin.jpg', ContentFile(gambar_jpeg()))
+        token = MyTokenObtainPairSerializer.get_token(self.admin)
+        self.assertEqual(token['profile_picture_thumb_url'], f'/media/{gambar.nama_varian(profile.foto_profil.name, "thumb", "webp")}')
+
+    def test_varian_foto_bersama_tidak_dihapus(self):
+        # default.jpg dipakai banyak akun: varian tetap ada selama masih dipakai
+        bawaan = 'foto_profil_admin/default.jpg'
+        (self.media_root / 'foto_profil_admin').mkdir(parents=True)
+        (self.media_root / bawaan).write_bytes(gambar_jpeg())
+        gambar.buat_varian(bawaan)
+        User.objects.create_user(username='operator', password='rahasia123')
+
+        profile = Profile.objects.get(user=self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.foto_profil.save('admin.jpg', ContentFile(gambar_jpeg()))
+        self.assertTrue(gambar.varian_tersedia(bawaan))
+
+
+
+class RollupStatistikTests(TestCase):
+    def rollup(self):
+        return {
+            (row.kelas, row.jenis_kelamin, row.status): row.jumlah
+            for row in StatistikSiswaBulanan.objects.exclude(jumlah=0)
+        }
+
+    def test_delta_create_update_delete(self):
+        siswa = buat_siswa()
+        self.assertEqual(self.rollup(), {('X', 'L', 'BARU'): 1})
+        buat_siswa(nisn='0012345679', nik='3273011705080002', jenis_kelamin='P')
+        self.assertEqual(self.rollup(), {('X', 'L', 'BARU'): 1, ('X', 'P', 'BARU'): 1})
+
+        siswa.kelas, siswa.status = 'XI', 'AKTIF'
+        siswa.save()
+        self.assertEqual(self.rollup(), {('XI', 'L', 'AKTIF'): 1, ('X', 'P', 'BARU'): 1})
+        # Simpan tanpa perubahan kunci tidak mengubah rollup
+        siswa.alamat = 'Jl. Baru'
+        siswa.save()
+        self.assertEqual(self.rollup(), {('XI', 'L', 'AKTIF'): 1, ('X', 'P', 'BARU'): 1})
+
+        siswa.delete()
+        self.assertEqual(self.rollup(), {('X', 'P', 'BARU'): 1})
+        self.assertEqual(statistik.periksa_konsistensi(), [])
+
+    def test_instance_dengan_kolom_ditunda(self):
+        pk = buat_siswa().pk
+        siswa = Siswa.objects.only('pk', 'kelas').get(pk=pk)
+        siswa.kelas = 'XII'
+        siswa.save()
+        self.assertEqual(self.rollup(), {('XII', 'L', 'BARU'): 1})
+
+        siswa = Siswa.objects.only('pk', 'status').get(pk=pk)
+        siswa.status = 'LULUS'
+        siswa.save(update_fields=['status'])
+        self.assertEqual(self.rollup(), {('XII', 'L', 'LULUS'): 1})
+
+        Siswa.objects.defer('created_at', 'kelas', 'status').get(pk=pk).delete()
+        self.assertEqual(self.rollup(), {})
+
+    def test_rebuild(self):
+        buat_siswa()
+        buat_siswa(nisn='0012345679', nik='3273011705080002', kelas='XI')
+        Siswa.objects.filter(kelas='XI').update(status='AKTIF')  # tanpa signal: rollup tertinggal
+        self.assertNotEqual(statistik.periksa_konsistensi(), [])
+
+        self.assertEqual(statistik.rebuild(), 2)
+        self.assertEqual(statistik.periksa_konsistensi(), [])
+        self.assertEqual(self.rollup(), {('X', 'L', 'BARU'): 1, ('XI', 'L', 'AKTIF'): 1})
+
+
+class ImporSiswaTests(TestCase):
+    HEADER = ('nama_lengkap,nisn,tempat_lahir,tanggal_lahir,nik,jenis_kelamin,alamat,no_telepon,'
+              'asal_sekolah,alamat_asal_sekolah,nama_ayah,nama_ibu,no_telepon_ortu')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+
+    def setUp(self):
+        # Id admin penerima notifikasi di-cache; jangan bocor ke test lain
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def berkas(self, *baris):
+        return io.BytesIO('\n'.join((self.HEADER,) + baris).encode())
+
+    def baris(self, i, tanggal='2008-01-01', jenis_kelamin='L'):
+        return (f'Impor {i},0066{i:06d},Bandung,{tanggal},3274000000{i:06d},{jenis_kelamin},Jl. Impor,0812,'
+                'SMP Impor,Jl. Impor,Ayah,Ibu,0813')
+
+    def test_validasi_per_baris(self):
+        berkas = self.berkas(
+            self.baris(1), self.baris(2, tanggal='17-05-2008'), self.baris(3, jenis_kelamin='X'),
+            'Tanpa NISN,,Bandung,2008-01-01,3274,L,Jl,0812,SMP,Jl,Ayah,Ibu,0813', self.baris(5),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            laporan = importer.impor_siswa(berkas, 'siswa.csv', chunk_size=2)
+
+        self.assertEqual((laporan['total'], laporan['berhasil'], laporan['gagal']), (5, 2, 3))
+        # Nomor baris mengikuti file (baris 1 = header)
+        self.assertEqual(
+            {error['baris']: sorted(error['errors']) for error in laporan['errors']},
+            {3: ['tanggal_lahir'], 4: ['jenis_kelamin'], 5: ['nisn']},
+        )
+        self.assertEqual(sorted(Siswa.objects.values_list('nama_lengkap', flat=True)), ['Impor 1', 'Impor 5'])
+        self.assertEqual(statistik.periksa_konsistensi(), [])
+        notifikasi = Notifikasi.objects.get()
+        self.assertEqual((notifikasi.user, notifikasi.title), (self.admin, 'Impor Siswa Selesai'))
+
+    def test_dry_run_tidak_menyimpan(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            laporan = importer.impor_siswa(self.berkas(self.baris(1), self.baris(2)), 'siswa.csv', dry_run=True)
+        self.assertEqual((laporan['berhasil'], laporan['gagal']), (2, 0))
+        self.assertFalse(Siswa.objects.exists())
+        self.assertFalse(StatistikSiswaBulanan.objects.exists())
+        self.assertFalse(Notifikasi.objects.exists())
+
+    def test_chunk_gagal_dibatalkan_utuh(self):
+        berkas = self.berkas(*(self.baris(i) for i in range(4)))
+        asli = statistik.catat_siswa_baru
+        panggilan = []
+
+        def gagal_di_chunk_kedua(objs):
+            panggilan.append(len(objs))
+            asli(objs)
+            if len(panggilan) == 2:
+                raise RuntimeError('disk penuh')
+
+        with mock.patch.object(statistik, 'catat_siswa_baru', side_effect=gagal_di_chunk_kedua):
+            with self.assertRaises(RuntimeError):
+                importer.impor_siswa(berkas, 'siswa.csv', chunk_size=2)
+        # Chunk pertama sudah tersimpan; chunk kedua (siswa dan rollup-nya) di-rollback
+        self.assertEqual(sorted(Siswa.objects.values_list('nama_lengkap', flat=True)), ['Impor 0', 'Impor 1'])
+        self.assertEqual(statistik.periksa_konsistensi(), [])
+
+    def test_xlsx(self):
+        workbook = openpyxl.Workbook()
+        workbook.active.append(self.HEADER.split(','))
+        # Excel sering menyimpan NISN/NIK sebagai angka dan tanggal sebagai datetime
+        workbook.active.append([
+            'Impor Excel', 66000001.0, 'Bandung', datetime(2008, 1, 1), 3274000000000001.0, 'P',
+            'Jl. Impor', '0812', 'SMP Impor', 'Jl. Impor', 'Ayah', 'Ibu', '0813',
+        ])
+        berkas = io.BytesIO()
+        workbook.save(berkas)
+        berkas.seek(0)
+
+        laporan = importer.impor_siswa(berkas, 'siswa.xlsx')
+        self.assertEqual(laporan['berhasil'], 1, laporan['errors'])
+        siswa = Siswa.objects.get()
+        self.assertEqual((siswa.nisn, siswa.nik, siswa.tanggal_lahir), ('66000001', '3274000000000001', date(2008, 1, 1)))
+
+    def test_format_tidak_didukung(self):
+        with self.assertRaises(importer.FormatFileTidakDidukung):
+            importer.impor_siswa(io.BytesIO(b''), 'siswa.pdf')
+
+
+class EksporSiswaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+        data = [('Budi Santoso', 'X', 'BARU'), ('Sari Lestari', 'XI', 'AKTIF'), ('Budi Hartono', 'XI', 'AKTIF'),
+                ('Dewi Anggraini', 'XII', 'AKTIF')]
+        for i, (nama, kelas, status_siswa) in enumerate(data):
+            buat_siswa(nama_lengkap=nama, nisn=f'00400000{i:02d}', nik=f'32730300000000{i:02d}', kelas=kelas, status=status_siswa)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def ekspor(self, **params):
+        response = self.client.get('/api/siswa/export/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment; filename="siswa-', response['Content-Disposition'])
+        return response, b''.join(response.streaming_content)
+
+    def test_csv(self):
+        response, isi = self.ekspor(kelas='XI', kolom='nisn,nama_lengkap,tanggal_lahir,status')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertTrue(isi.startswith('\ufeff'.encode()))
+        rows = list(csv.reader(io.StringIO(isi.decode('utf-8-sig'))))
+        self.assertEqual(rows[0], ['nisn', 'nama_lengkap', 'tanggal_lahir', 'status'])
+        self.assertEqual(sorted(rows[1:]), [
+            ['0040000001', 'Sari Lestari', '2008-05-17', 'AKTIF'],
+            ['0040000002', 'Budi Hartono', '2008-05-17', 'AKTIF'],
+        ])
+
+        # Tanpa `kolom` semua kolom Siswa ikut; filter pencarian juga berlaku
+        _, isi = self.ekspor(search='Budi')
+        rows = list(csv.reader(io.StringIO(isi.decode('utf-8-sig'))))
+        self.assertEqual(rows[0], exporter.KOLOM_EKSPOR)
+        nisn = rows[0].index('nisn')
+        self.assertEqual(sorted(row[nisn] for row in rows[1:]), ['0040000000', '0040000002'])
+
+    def test_xlsx(self):
+        response, isi = self.ekspor(tipe='xlsx', status='AKTIF', kolom='nisn,kelas,created_at')
+        self.assertEqual(response['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        sheet = openpyxl.load_workbook(io.BytesIO(isi), read_only=True)['Siswa']
+        rows = [list(row) for row in sheet.iter_rows(values_only=True)]
+        self.assertEqual(rows[0], ['nisn', 'kelas', 'created_at'])
+        self.assertEqual(sorted(row[:2] for row in rows[1:]), [['0040000001', 'XI'], ['0040000002', 'XI'], ['0040000003', 'XII']])
+        dibuat = Siswa.objects.get(nisn='0040000003').created_at.isoformat()
+        self.assertIn(['0040000003', 'XII', dibuat], rows)
+
+    def test_parameter_tidak_valid(self):
+        self.assertEqual(self.client.get('/api/siswa/export/', {'tipe': 'pdf'}).status_code, 400)
+        response = self.client.get('/api/siswa/export/', {'kolom': 'nisn,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'kolom': ['Kolom tidak dikenal: password']})
+
+
+class TransisiSiswaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+        awal = [('X', 'BARU'), ('X', 'AKTIF'), ('XI', 'AKTIF'), ('XII', 'AKTIF'), ('XII', 'LULUS'), ('XI', 'PINDAH')]
+        for i, (kelas, status_siswa) in enumerate(awal):
+            buat_siswa(nisn=f'00200000{i:02d}', nik=f'32730117050800{i:02d}', kelas=kelas, status=status_siswa)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def keadaan(self):
+        return sorted(Siswa.objects.values_list('nisn', 'kelas', 'status'))
+
+    def test_aturan_berurutan(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            hasil = transisi.jalankan_transisi()
+
+        self.assertEqual(
+            [(item['aturan'], item['jumlah']) for item in hasil['hasil']],
+            [('kelulusan', 1), ('naik_xi_xii', 1), ('naik_x_xi', 1), ('baru_aktif', 1)],
+        )
+        # Siswa yang baru naik ke XII tidak ikut lulus, murid baru tidak ikut naik kelas
+        self.assertEqual(self.keadaan(), [
+            ('0020000000', 'X', 'AKTIF'),
+            ('0020000001', 'XI', 'AKTIF'),
+            ('0020000002', 'XII', 'AKTIF'),
+            ('0020000003', 'XII', 'LULUS'),
+            ('0020000004', 'XII', 'LULUS'),
+            ('0020000005', 'XI', 'PINDAH'),
+        ])
+        self.assertEqual(statistik.periksa_konsistensi(), [])
+        self.assertEqual(Notifikasi.objects.get(user=self.admin).title, 'Transisi Tahun Ajaran')
+
+    def test_sebagian_aturan(self):
+        hasil = transisi.jalankan_transisi(['baru_aktif'])
+        self.assertEqual([item['aturan'] for item in hasil['hasil']], ['baru_aktif'])
+        self.assertEqual(Siswa.objects.filter(status='BARU').count(), 0)
+        self.assertEqual(Siswa.objects.filter(kelas='X', status='AKTIF').count(), 2)
+        self.assertEqual(statistik.periksa_konsistensi(), [])
+
+        with self.assertRaises(transisi.AturanTidakDikenal):
+            transisi.jalankan_transisi(['baru_aktif', 'naik_xii_alumni'])
+
+    def test_dry_run_dibatalkan(self):
+        sebelum = self.keadaan()
+        rollup = list(StatistikSiswaBulanan.objects.values_list('kelas', 'status', 'jumlah').order_by('pk'))
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            hasil = transisi.jalankan_transisi(dry_run=True)
+
+        self.assertTrue(hasil['dry_run'])
+        self.assertEqual(sum(item['jumlah'] for item in hasil['hasil']), 4)
+        self.assertEqual(self.keadaan(), sebelum)
+        self.assertEqual(list(StatistikSiswaBulanan.objects.values_list('kelas', 'status', 'jumlah').order_by('pk')), rollup)
+        self.assertEqual(callbacks, [])
+        self.assertFalse(Notifikasi.objects.exists())
+
+    def test_api(self):
+        client = APIClient()
+        client.credentials(**kredensial(self.admin))
+        response = client.post('/api/siswa/transisi/', {'aturan': 'kelulusan,naik_x_xii'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = client.post('/api/siswa/transisi/', {'dry_run': True, 'aturan': 'kelulusan'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['hasil'][0]['jumlah'], 1)
+        self.assertEqual(Siswa.objects.filter(status='LULUS').count(), 1)
+
+
+class SeedSiswaTests(TestCase):
+    def test_nomor_dan_bentrok(self):
+        self.assertEqual(seed_siswa._nomor_awal(), 1)
+        # Siswa asli ber-NIK 3273... dan hasil seed sebelumnya (id jauh lebih kecil dari nomornya)
+        buat_siswa(nik=seed_siswa._nik(42))
+        buat_siswa(nisn=seed_siswa._nisn(40), nik='3204000000000001')
+        self.assertEqual(seed_siswa._nomor_awal(), 41)
+
+        rows = [{'nisn': seed_siswa._nisn(nomor), 'nik': seed_siswa._nik(nomor)} for nomor in range(40, 44)]
+        self.assertEqual([row['nisn'] for row in seed_siswa._tanpa_bentrok(rows, 40)], ['9000000041', '9000000043'])
+
+    def seed(self, **options):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('seed_siswa', workers=1, batch_size=20, stdout=io.StringIO(), **options)
+
+    def test_created_at_tersebar_tanpa_mengubah_field(self):
+        field = Siswa._meta.get_field('created_at')
+        flag = []
+        simpan = seed_siswa._simpan
+
+        def simpan_dan_cek(*args, **kwargs):
+            # auto_now_add milik model tidak pernah dimatikan selama insert
+            flag.append(field.auto_now_add)
+            return simpan(*args, **kwargs)
+
+        with mock.patch.object(seed_siswa, '_simpan', side_effect=simpan_dan_cek):
+            self.seed(count=50, dari='2021/2022', sampai='2023/2024')
+        self.assertEqual(flag, [True] * 3)
+        self.assertTrue(field.auto_now_add)
+        self.assertEqual(Siswa.objects.count(), 50)
+        tahun = set(Siswa.objects.values_list('created_at__year', flat=True))
+        self.assertLessEqual(tahun, {2021, 2022, 2023, 2024})
+        self.assertGreater(len(tahun), 1)
+        self.assertEqual(statistik.periksa_konsistensi(), [])
+        # Siswa yang dibuat biasa tetap memakai waktu simpan
+        self.assertEqual(buat_siswa().created_at.date(), timezone.now().date())
+
+    def test_sampai_tahun_ajaran_mendatang_ditolak(self):
+        sekarang = timezone.localtime()
+        berjalan = sekarang.year if sekarang.month >= 7 else sekarang.year - 1
+        with self.assertRaisesMessage(CommandError, '--sampai tidak boleh setelah tahun ajaran berjalan'):
+            self.seed(count=5, sampai=f'{berjalan + 1}/{berjalan + 2}')
+        self.assertFalse(Siswa.objects.exists())
+        self.seed(count=5, sampai=f'{berjalan}/{berjalan + 1}')
+        self.assertFalse(Siswa.objects.filter(created_at__gt=timezone.now()).exists())
+
+    def test_dengan_signal(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+        self.seed(count=30)
+        self.assertFalse(Notifikasi.objects.filter(user=admin).exclude(title='Data Dummy Dibuat').exists())
+
+        with mock.patch.object(statistik, 'catat_siswa_baru') as catat_batch:
+            self.seed(count=30, dengan_signal=True)
+        catat_batch.assert_not_called()
+        self.assertEqual(Siswa.objects.count(), 60)
+        # Rollup diperbarui receiver post_save per siswa, notifikasi pendaftar digabung jadi digest
+        self.assertEqual(statistik.periksa_konsistensi(), [])
+        digest = Notifikasi.objects.get(user=admin, kategori='pendaftar_baru')
+        baru = Siswa.objects.filter(status='BARU', nisn__gte=seed_siswa._nisn(31)).count()
+        self.assertGreater(baru, 0)
+        self.assertEqual(digest.jumlah, baru)
+
+
+class CacheStatistikTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(**kredensial(self.admin))
+
+    def ambil(self):
+        response = self.client.get('/api/statistik-siswa/')
+        return response['X-Cache'], response.data['total'], response.data['kelas']['XI']
+
+    def test_perubahan_siswa_menginvalidasi_cache(self):
+        self.assertEqual(self.ambil(), ('MISS', 0, 0))
+        self.assertEqual(self.ambil(), ('HIT', 0, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            siswa = buat_siswa()
+        self.assertEqual(self.ambil(), ('MISS', 1, 0))
+        self.assertEqual(self.ambil(), ('HIT', 1, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            siswa.kelas = 'XI'
+            siswa.save()
+        self.assertEqual(self.ambil(), ('MISS', 1, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            siswa.delete()
+        self.assertEqual(self.ambil(), ('MISS', 0, 0))
+
+    def test_timeout_dibatasi_untuk_cache_per_proses(self):
+        self.assertEqual(timeout_cache(300, 30), 30)
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            self.assertEqual(timeout_cache(300, 30), 300)
+
+
+class DeretStatistikTests(TestCase):
+    """`/api/statistik-siswa/series/` untuk dataset yang diketahui."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+        data = [
+            (datetime(2023, 8, 3, 9), 'X', 'L', 'BARU'),
+            (datetime(2023, 8, 28, 15), 'XI', 'P', 'AKTIF'),
+            (datetime(2024, 2, 14, 8), 'XII', 'L', 'LULUS'),
+            (datetime(2025, 9, 1, 7), 'X', 'P', 'BARU'),
+        ]
+        for i, (dibuat, kelas, jenis_kelamin, status_siswa) in enumerate(data):
+            pk = buat_siswa(
+                nisn=f'00500000{i:02d}', nik=f'32730400000000{i:02d}', kelas=kelas, jenis_kelamin=jenis_kelamin,
+                status=status_siswa,
+            ).pk
+            Siswa.objects.filter(pk=pk).update(created_at=timezone.make_aware(dibuat))
+        statistik.rebuild()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(**kredensial(self.admin))
+
+    def series(self, **params):
+        response = self.client.get('/api/statistik-siswa/series/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return json.loads(b''.join(response.streaming_content))
+
+    def assertSamaDenganRollup(self, ringkasan, mulai, akhir):
+        rollup = statistik.hitung(timezone.make_aware(mulai), timezone.make_aware(akhir))
+        self.assertEqual(
+            (ringkasan['kelas'], ringkasan['jenis_kelamin'], ringkasan['status']),
+            (
+                {'X': rollup['total_x'], 'XI': rollup['total_xi'], 'XII': rollup['total_xii']},
+                {'L': rollup['laki'], 'P': rollup['perempuan']},
+                {'BARU': rollup['status_baru'], 'AKTIF': rollup['status_aktif'], 'LULUS': rollup['status_lulus'],
+                 'PINDAH': rollup['status_pindah'], 'DROPOUT': rollup['status_dropout']},
+            ),
+        )
+
+    def test_nilai_sesuai_rollup(self):
+        data = self.series(dari='2023/2024', sampai='2025/2026')
+        self.assertEqual((data['dari'], data['sampai']), ('2023/2024', '2025/2026'))
+        self.assertEqual([tahun['tahun_ajaran'] for tahun in data['series']], ['2023/2024', '2024/2025', '2025/2026'])
+        self.assertEqual([tahun['total'] for tahun in data['series']], [3, 0, 1])
+
+        for tahun in data['series']:
+            awal = int(tahun['tahun_ajaran'][:4])
+            self.assertSamaDenganRollup(tahun, datetime(awal, 7, 1), datetime(awal + 1, 6, 30, 23, 59, 59))
+            self.assertSamaDenganRollup(
+                tahun['semester']['Ganjil'], datetime(awal, 7, 1), datetime(awal, 12, 31, 23, 59, 59),
+            )
+            self.assertSamaDenganRollup(
+                tahun['semester']['Genap'], datetime(awal + 1, 1, 1), datetime(awal + 1, 6, 30, 23, 59, 59),
+            )
+            self.assertEqual(len(tahun['bulan']), 12)
+            for bulan in tahun['bulan']:
+                self.assertEqual(bulan['total'], statistik.jumlah_bulan(date.fromisoformat(bulan['bulan'] + '-01')))
+
+        pertama = data['series'][0]
+        self.assertEqual([bulan['bulan'] for bulan in pertama['bulan']][:2], ['2023-07', '2023-08'])
+        self.assertEqual(
+            [bulan['total'] for bulan in pertama['bulan']], [0, 2, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0],
+        )
+        # Bulan dan tahun ajaran kosong tetap dikirim lengkap dengan angka nol
+        kosong = pertama['bulan'][0]
+        self.assertEqual(
+            (kosong['kelas'], kosong['jenis_kelamin'], set(kosong['status'].values())),
+            ({'X': 0, 'XI': 0, 'XII': 0}, {'L': 0, 'P': 0}, {0}),
+        )
+        self.assertEqual({bulan['total'] for bulan in data['series'][1]['bulan']}, {0})
+
+    def test_sejalan_dengan_statistik_tercache(self):
+        tahun_ajaran = '2023/2024'
+
+        def dashboard():
+            response = self.client.get('/api/statistik-siswa/', {'tahunAjaran': tahun_ajaran})
+            return response['X-Cache'], response.data['total'], response.data['kelas']
+
+        def dari_series():
+            tahun = self.series(dari=tahun_ajaran, sampai=tahun_ajaran)['series'][0]
+            return tahun['total'], tahun['kelas']
+
+        self.assertEqual(dashboard(), ('MISS', 3, {'X': 1, 'XI': 1, 'XII': 1}))
+        self.assertEqual(dashboard(), ('HIT', 3, {'X': 1, 'XI': 1, 'XII': 1}))
+        self.assertEqual(dari_series(), (3, {'X': 1, 'XI': 1, 'XII': 1}))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            siswa = Siswa.objects.get(nisn='0050000000')
+            siswa.kelas = 'XI'
+            siswa.save()
+        self.assertEqual(dashboard(), ('MISS', 3, {'X': 0, 'XI': 2, 'XII': 1}))
+        self.assertEqual(dashboard(), ('HIT', 3, {'X': 0, 'XI': 2, 'XII': 1}))
+        self.assertEqual(dari_series(), (3, {'X': 0, 'XI': 2, 'XII': 1}))
+
+    def test_rentang_tidak_valid(self):
+        for params in ({'dari': '2024'}, {'dari': '2024/2026'}, {'dari': '2025/2026', 'sampai': '2020/2021'},
+                       {'dari': '1900/1901', 'sampai': '2025/2026'}):
+            self.assertEqual(self.client.get('/api/statistik-siswa/series/', params).status_code, 400, params)
+
+
+class MetrikTests(TestCase):
+    def test_bukan_proses_server_tidak_mencatat(self):
+        with mock.patch.object(metrik, '_penyimpan', None):
+            metrik.tambah('pengelola_pendaftaran_siswa_total')
+            self.assertIsNone(metrik._penyimpan)
+
+    def test_bersihkan_file_proses_mati(self):
+        proses = subprocess.Popen(['true'])
+        proses.wait()
+        with tempfile.TemporaryDirectory() as direktori:
+            hidup = Path(direktori) / f'metrik-{os.getpid()}.json'
+            mati = Path(direktori) / f'metrik-{proses.pid}.json'
+            for path in (hidup, mati):
+                path.write_text('{"counter": [], "histogram": []}')
+            metrik.PenyimpanMetrik(direktori, 5).bersihkan()
+            self.assertTrue(hidup.exists())
+            self.assertFalse(mati.exists())
+
+    def test_lama_menunggu_lock_sqlite(self):
+        def terkunci(sql, params, many, context):
+            raise OperationalError('database is locked')
+
+        with tempfile.TemporaryDirectory() as direktori:
+            middleware = metrik.MetrikMiddleware(lambda request: None)
+            middleware.store = metrik.PenyimpanMetrik(direktori, 5)
+            bungkus = middleware._bungkus_query([0])
+            with self.assertRaises(OperationalError):
+                bungkus(terkunci, 'UPDATE siswa_siswa SET kelas = %s', ['XI'], False, {})
+            bungkus(lambda *args: None, 'SELECT 1', [], False, {})
+            middleware.store.flush(paksa=True)
+            counter, histogram, _ = middleware.store.gabungkan()
+        self.assertEqual(counter[('pengelola_sqlite_lock_errors_total', ())], 1)
+        self.assertEqual(sum(histogram[('pengelola_sqlite_lock_wait_seconds', ())][:-1]), 1)
+        self.assertEqual(sum(histogram[('pengelola_db_query_duration_seconds', ())][:-1]), 2)
+
+    def test_gauge_antrian_worker(self):
+        pekerja = worker.InProcessWorker(name='uji-metrik')
+        self.addCleanup(pekerja.stop)
+        mulai, lanjut = threading.Event(), threading.Event()
+
+        def tugas():
+            mulai.set()
+            lanjut.wait(5)
+
+        pekerja.submit(tugas)
+        mulai.wait(5)
+        pekerja.submit(lambda: None)
+        pekerja.submit(lambda: None)
+        with mock.patch.object(metrik, 'worker', pekerja), tempfile.TemporaryDirectory() as direktori:
+            store = metrik.PenyimpanMetrik(direktori, 5)
+            store.flush(paksa=True)
+            # File proses yang sudah berhenti tidak ikut menyumbang gauge
+            (Path(direktori) / 'metrik-999999999.json').write_text(
+                '{"gauge": [["pengelola_worker_antrian", [], 7]]}'
+            )
+            teks = metrik.render_prometheus(*store.gabungkan())
+        lanjut.set()
+        pekerja.join()
+        self.assertIn('# TYPE pengelola_worker_antrian gauge\npengelola_worker_antrian 2\n', teks)
+        self.assertIn('pengelola_worker_berjalan 1\n', teks)
+        self.assertEqual((pekerja.jumlah_antrian(), pekerja.sedang_berjalan), (0, 0))
+
+    def test_tanpa_token_hanya_ip_internal(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='8.8.8.8').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code, 200)
+
+    @override_settings(METRIK={'token': 'rahasia'})
+    def test_dengan_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', REMOTE_ADDR='8.8.8.8', HTTP_AUTHORIZATION='Bearer rahasia')
+        self.assertEqual(response.status_code, 200)
+
+
+class InstrumentasiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='rahasia123', is_staff=True)
+        cls.guru = User.objects.create_user(username='guru', password='rahasia123')
+
+    def setUp(self):
+        instrumentasi.reset_histogram()
+        self.addCleanup(instrumentasi.reset_histogram)
+        self.client = APIClient()
+
+    def test_endpoint_histogram_hanya_admin(self):
+        for durasi in (3, 40, 700):
+            instrumentasi.catat_endpoint('GET api/siswa/', durasi)
+
+        self.client.credentials(**kredensial(self.guru))
+        self.assertEqual(self.client.get('/api/instrumentasi/').status_code, 403)
+
+        self.client.credentials(**kredensial(self.admin))
+        response = self.client.get('/api/instrumentasi/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['pid'], os.getpid())
+        ringkasan = response.data['endpoint']['GET api/siswa/']
+        self.assertEqual((ringkasan['jumlah'], ringkasan['p50_ms'], ringkasan['p99_ms']), (3, 40, 700))
+
+        self.assertEqual(self.client.delete('/api/instrumentasi/').status_code, 204)
+        self.assertEqual(self.client.get('/api/instrumentasi/').data['endpoint'], {})
+
+    def client_terinstrumentasi(self, **config):
+        # Middleware dibaca saat handler test client dibuat, jadi setting harus aktif lebih dulu
+        pengaturan = override_settings(PERF_INSTRUMENTATION={'aktif': True, **config})
+        pengaturan.enable()
+        self.addCleanup(pengaturan.disable)
+        client = APIClient()
+        client.credentials(**kredensial(self.admin))
+        return client
+
+    def test_server_timing(self):
+        buat_siswa()
+        client = self.client_terinstrumentasi()
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/siswa/')
+        self.assertEqual(response.status_code, 200)
+
+        bagian = dict(re.match(r'(\w+);dur=([\d.]+)', item.strip()).groups() for item in response['Server-Timing'].split(','))
+        self.assertEqual(list(bagian), ['db', 'auth', 'view', 'ser', 'render', 'total'])
+        self.assertIn(f'desc="{len(ctx.captured_queries)} query"', response['Server-Timing'])
+        self.assertGreater(float(bagian['ser']), 0)
+        self.assertGreaterEqual(float(bagian['total']), float(bagian['view']))
+        self.assertEqual(instrumentasi.ringkasan_endpoint()['GET api/siswa/']['jumlah'], 1)
+
+        client = self.client_terinstrumentasi(server_timing=False)
+        self.assertNotIn('Server-Timing', client.get('/api/siswa/'))
+
+    def test_log_request_dan_query_lambat(self):
+        client = self.client_terinstrumentasi(request_lambat_ms=0, query_lambat_ms=0)
+        with self.assertLogs('pengelolaSiswa.instrumentasi', 'WARNING') as log:
+            client.get('/api/siswa/?status=BARU')
+
+        query = [pesan for pesan in log.output if 'Query lambat' in pesan]
+        self.assertTrue(query)
+        # Lokasi pemicu query adalah kode proyek, bukan Django/DRF
+        self.assertTrue(all(re.search(r' di \w+/[\w/]+\.py:\d+ in ', pesan) for pesan in query), query)
+        self.assertIn("params=('BARU',", ''.join(query))
+        request = [pesan for pesan in log.output if 'Request lambat' in pesan]
+        self.assertEqual(len(request), 1)
+        self.assertIn('GET /api/siswa/?status=BARU', request[0])
+        self.assertIn('status 200', request[0])
+
+    def test_tidak_ada_log_di_bawah_batas(self):
+        client = self.client_terinstrumentasi(request_lambat_ms=60_000, query_lambat_ms=60_000)
+        with self.assertNoLogs('pengelolaSiswa.instrumentasi', 'WARNING'):
+            client.get('/api/siswa/')
+
+    def test_nonaktif(self):
+        with override_settings(PERF_INSTRUMENTATION={'aktif': False}):
+            with self.assertRaises(MiddlewareNotUsed):
+                instrumentasi.InstrumentasiMiddleware(lambda request: None)
+            client = APIClient()
+            client.credentials(**kredensial(self.admin))
+            self.assertNotIn('Server-Timing', client.get('/api/siswa/'))
+        self.assertEqual(instrumentasi.ringkasan_endpoint(), {})
+
+    def test_histogram_bergulir(self):
+        histogram = instrumentasi.HistogramBergulir(jendela=100)
+        for durasi in (5, 5.1, 10, 999, 6000):
+            histogram.catat(durasi)
+        bucket = histogram.ringkasan()['bucket']
+        # Batas bucket inklusif; di atas bucket terakhir masuk 'lebih'
+        self.assertEqual(
+            {nama: jumlah for nama, jumlah in bucket.items() if jumlah},
+            {'<=5ms': 1, '<=10ms': 2, '<=1000ms': 1, 'lebih': 1},
+        )
+        self.assertEqual(sum(bucket.values()), 5)
+
+        histogram = instrumentasi.HistogramBergulir(jendela=100)
+        for durasi in range(1, 201):
+            histogram.catat(durasi)
+        ringkasan = histogram.ringkasan()
+        # Persentil hanya dari 100 sampel terakhir (101..200); jumlah dan rata-rata sejak awal
+        self.assertEqual(
+            (ringkasan['jumlah'], ringkasan['rata_rata_ms'], ringkasan['p50_ms'], ringkasan['p95_ms'], ringkasan['p99_ms']),
+            (200, 100.5, 151, 196, 200),
+        )
+        self.assertEqual(sum(ringkasan['bucket'].values()), 200)
+
+        kosong = instrumentasi.HistogramBergulir(jendela=10).ringkasan()
+        self.assertEqual((kosong['jumlah'], kosong['rata_rata_ms'], kosong['p95_ms']), (0, None, None))
+
+
+class RuteBudgetTests(TestCase):
+    def test_semua_rute_punya_budget(self):
+        """Route baru di pengelolaSiswa/urls.py wajib diberi budget query."""
+        tercakup = {
+            kunci[0] if isinstance(kunci, tuple) else kunci
+            for budget in (BUDGET_QUERY, BUDGET_AKUN, BUDGET_NOTIFIKASI, BUDGET_PENGATURAN)
+            for kunci in budget
+        }
+        self.assertEqual(rute_api() - tercakup, set())
@@ -0,0 +1,84 @@
+# siswa/transisi.py
+
+from collections import Counter, namedtuple
+
+from django.db import transaction
+from django.db.models import Count, DateField, Q
+from django.db.models.functions import TruncMonth
+
+from notifikasi.fanout import kirim_ke_admin
+from .models import Siswa
+from . import cache_statistik, statistik
+
+Aturan = namedtuple('Aturan', ['kode', 'keterangan', 'kondisi', 'nilai'])
+
+# Urutan penting: XII diluluskan lebih dulu agar siswa yang baru naik ke XII
+# tidak ikut lulus, dan BARU -> AKTIF terakhir agar murid baru tidak ikut naik kelas.
+ATURAN = [
+    Aturan('kelulusan', 'Kelas XII aktif menjadi LULUS', Q(kelas='XII', status='AKTIF'), {'status': 'LULUS'}),
+    Aturan('naik_xi_xii', 'Kenaikan kelas XI ke XII', Q(kelas='XI', status='AKTIF'), {'kelas': 'XII'}),
+    Aturan('naik_x_xi', 'Kenaikan kelas X ke XI', Q(kelas='X', status='AKTIF'), {'kelas': 'XI'}),
+    Aturan('baru_aktif', 'Murid baru menjadi AKTIF', Q(status='BARU'), {'status': 'AKTIF'}),
+]
+KODE_ATURAN = [aturan.kode for aturan in ATURAN]
+
+
+class AturanTidakDikenal(Exception):
+    pass
+
+
+def _perubahan_rollup(queryset, nilai):
+    """
+    Hitung perubahan bucket rollup untuk satu aturan dengan satu GROUP BY,
+    sebagai pengganti signal per baris yang tidak dijalankan oleh update().
+    """
+    perubahan = Counter()
+    rows = (
+        queryset
+        .annotate(bulan=TruncMonth('created_at', output_field=DateField()))
+        .values(*statistik.KUNCI_BUCKET)
+        .annotate(jumlah=Count('pk'))
+        .order_by()
+    )
+    for row in rows:
+        lama = tuple(row[k] for k in statistik.KUNCI_BUCKET)
+        baru = tuple(nilai.get(k, row[k]) for k in statistik.KUNCI_BUCKET)
+        perubahan[lama] -= row['jumlah']
+        perubahan[baru] += row['jumlah']
+    return perubahan
+
+
+def jalankan_transisi(kode_aturan=None, dry_run=False):
+    """
+    Jalankan aturan transisi akhir tahun ajaran, masing-masing sebagai satu
+    UPDATE, semuanya dalam satu transaksi. Dengan dry_run=True transaksi
+    di-rollback sehingga hasilnya hanya berupa jumlah baris yang terdampak.
+    """
+    kode_aturan = list(kode_aturan or KODE_ATURAN)
+    tidak_dikenal = [kode for kode in kode_aturan if kode not in KODE_ATURAN]
+    if tidak_dikenal:
+        raise AturanTidakDikenal(', '.join(tidak_dikenal))
+
+    hasil = []
+    with transaction.atomic():
+        perubahan = Counter()
+        for aturan in ATURAN:
+            if aturan.kode not in kode_aturan:
+                continue
+            queryset = Siswa.objects.filter(aturan.kondisi)
+            perubahan.update(_perubahan_rollup(queryset, aturan.nilai))
+            jumlah = queryset.update(**aturan.nilai)
+            hasil.append({'aturan': aturan.kode, 'keterangan': aturan.keterangan, 'jumlah': jumlah})
+
+        statistik.ubah_jumlah(perubahan)
+
+        if dry_run:
+            transaction.set_rollback(True)
+        elif any(item['jumlah'] for item in hasil):
+            transaction.on_commit(cache_statistik.invalidasi_semua)
+            kirim_ke_admin(
+                "Transisi Tahun Ajaran",
+                "; ".join(f"{item['keterangan']}: {item['jumlah']} siswa" for item in hasil) + ".",
+            )
+
+    return {'dry_run': dry_run, 'hasil': hasil}
@@ -0,0 +1,171 @@
+# siswa/unggah.py
+
+import hashlib
+import os
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.utils import timezone
+
+from .models import SesiUnggah
+
+# Batas ukuran satu file dan satu potongan (byte)
+MAKS_UKURAN = getattr(settings, 'UNGGAH_MAKS_UKURAN', 20 * 1024 * 1024)
+MAKS_CHUNK = getattr(settings, 'UNGGAH_MAKS_CHUNK', 5 * 1024 * 1024)
+# Sesi yang tidak disentuh selama ini dihapus oleh `bersihkan_unggah`
+KEDALUWARSA = timedelta(hours=getattr(settings, 'UNGGAH_KEDALUWARSA_JAM', 24))
+# Ukuran blok baca/tulis; body request tidak pernah dibaca utuh ke memori
+UKURAN_BLOK = 64 * 1024
+
+
+class OffsetTidakCocok(Exception):
+    """Offset dari client berbeda dengan offset di server (atau ada PATCH lain yang lebih dulu)."""
+
+
+class SesiSudahDipakai(Exception):
+    """Sesi unggah sudah diklaim oleh request lain (atau tidak lagi berstatus SELESAI)."""
+
+
+def temp_dir():
+    # Dibaca setiap kali agar bisa diganti lewat override_settings di test
+    return Path(getattr(settings, 'UNGGAH_TEMP_DIR', Path(settings.BASE_DIR) / 'tmp_uploads'))
+
+
+def path_sementara(sesi):
+    return temp_dir() / f'{sesi.pk}.part'
+
+
+def tulis_chunk(sesi, stream, panjang):
+    """
+    Tulis `panjang` byte dari stream request ke file sementara mulai dari
+    sesi.offset, blok demi blok. Byte yang sempat diterima tetap dihitung
+    walaupun koneksi putus, jadi client cukup melanjutkan dari offset terbaru.
+    """
+    path = path_sementara(sesi)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ditulis = 0
+    with open(path, 'r+b' if path.exists() else 'wb') as berkas:
+        berkas.seek(sesi.offset)
+        while ditulis < panjang:
+            blok = stream.read(min(UKURAN_BLOK, panjang - ditulis))
+            if not blok:
+                break
+            berkas.write(blok)
+            ditulis += len(blok)
+        berkas.flush()
+        os.fsync(berkas.fileno())
+
+    offset_baru = sesi.offset + ditulis
+    # Update bersyarat: dua PATCH pada offset yang sama tidak bisa sama-sama maju
+    if not SesiUnggah.objects.filter(
+        pk=sesi.pk, offset=sesi.offset, status=SesiUnggah.STATUS_AKTIF,
+    ).update(offset=offset_baru, updated_at=timezone.now()):
+        raise OffsetTidakCocok()
+    sesi.offset = offset_baru
+
+    if sesi.offset >= sesi.ukuran:
+        _selesaikan(sesi)
+    return sesi
+
+
+def _checksum(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as berkas:
+        for blok in iter(lambda: berkas.read(UKURAN_BLOK), b''):
+            sha.update(blok)
+    return sha.hexdigest()
+
+
+def _selesaikan(sesi):
+    path = path_sementara(sesi)
+    with open(path, 'r+b') as berkas:
+        # Buang sisa byte dari potongan lama yang pernah terputus
+        berkas.truncate(sesi.ukuran)
+    if _checksum(path) == sesi.sha256.lower():
+        sesi.status = SesiUnggah.STATUS_SELESAI
+    else:
+        sesi.status = SesiUnggah.STATUS_GAGAL
+        path.unlink(missing_ok=True)
+    SesiUnggah.objects.filter(pk=sesi.pk).update(status=sesi.status)
+
+
+class FileUnggahan(UploadedFile):
+    """
+    File hasil sesi unggah. `temporary_file_path` membuat FileSystemStorage
+    memindahkan file sementara ke MEDIA_ROOT alih-alih menyalin isinya.
+    """
+
+    def __init__(self, sesi):
+        path = path_sementara(sesi)
+        super().__init__(open(path, 'rb'), name=sesi.nama_file, size=sesi.ukuran)
+        self.path = path
+
+    def temporary_file_path(self):
+        return str(self.path)
+
+
+def pakai(daftar_sesi):
+    """
+    Klaim sesi SELESAI menjadi DIPAKAI dengan satu UPDATE bersyarat, lalu
+    hapus sisa file sementara setelah commit. Harus dipanggil di dalam
+    transaksi yang sama dan *sebelum* file dipindahkan ke storage: dari dua
+    request yang memakai sesi yang sama hanya satu yang berhasil mengklaim,
+    yang lain mendapat SesiSudahDipakai (bukan FileNotFoundError karena
+    filenya sudah dipindahkan).
+    """
+    if not daftar_sesi:
+        return
+    diklaim = SesiUnggah.objects.filter(
+        pk__in=[sesi.pk for sesi in daftar_sesi], status=SesiUnggah.STATUS_SELESAI,
+    ).update(status=SesiUnggah.STATUS_DIPAKAI)
+    if diklaim != len(daftar_sesi):
+        raise SesiSudahDipakai()
+
+    def hapus():
+        for sesi in daftar_sesi:
+            path_sementara(sesi).unlink(missing_ok=True)
+
+    transaction.on_commit(hapus)
+
+
+def bersihkan_kedaluwarsa():
+    """Hapus sesi (beserta file sementaranya) yang tidak disentuh lebih lama dari KEDALUWARSA."""
+    sesi_lama = list(SesiUnggah.objects.filter(updated_at__lt=timezone.now() - KEDALUWARSA))
+    for sesi in sesi_lama:
+        path_sementara(sesi).unlink(missing_ok=True)
+    SesiUnggah.objects.filter(pk__in=[sesi.pk for sesi in sesi_lama]).delete()
+    return len(sesi_lama)
+
+
+def bersihkan_file_yatim():
+    """
+    Hapus file .part yang tidak akan dipakai lagi: sesinya sudah tidak ada,
+    sudah DIPAKAI (mis. proses mati sebelum on_commit menghapusnya) atau GAGAL.
+    """
+    daftar_file = {path.stem: path for path in temp_dir().glob('*.part')}
+    if not daftar_file:
+        return 0
+    masih_berguna = set(
+        str(pk) for pk in SesiUnggah.objects.filter(
+            pk__in=[stem for stem in daftar_file if _uuid_valid(stem)],
+            status__in=[SesiUnggah.STATUS_AKTIF, SesiUnggah.STATUS_SELESAI],
+        ).values_list('pk', flat=True)
+    )
+    dihapus = 0
+    for stem, path in daftar_file.items():
+        if stem not in masih_berguna:
+            path.unlink(missing_ok=True)
+            dihapus += 1
+    return dihapus
+
+
+def _uuid_valid(teks):
+    try:
+        uuid.UUID(teks)
+    except ValueError:
+        return False
+    return True
@@ -2,14 +2,17 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import SiswaViewSet
-from .views import statistik_siswa
+from .views import SiswaViewSet, SesiUnggahViewSet
+from .views import statistik_siswa, statistik_cache, statistik_series
 
 router = DefaultRouter()
 router.register(r'siswa', SiswaViewSet)
+router.register(r'unggah', SesiUnggahViewSet, basename='unggah')
 
 urlpatterns = [
     path('', include(router.urls)),
-    path('statistik-siswa/', statistik_siswa),
+    path('statistik-siswa/', statistik_siswa, name='statistik-siswa'),
+    path('statistik-siswa/cache/', statistik_cache, name='statistik-siswa-cache'),
+    path('statistik-siswa/series/', statistik_series, name='statistik-siswa-series'),
     path('', include(router.urls)),
 ]
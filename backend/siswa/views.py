@@ -1,16 +1,32 @@
 # siswa/views.py
 
-from rest_framework import viewsets, filters, status
+from rest_framework import mixins, viewsets, status
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Siswa
-from .serializers import SiswaSerializer
+from .models import Siswa, SesiUnggah
+from .serializers import (
+    FILE_FIELDS, SiswaSerializer, SiswaListSerializer, SesiUnggahSerializer, needs_instances, serialize_values,
+)
+from .search import SiswaSearchFilter
+from . import exporter, unggah
+from .transisi import AturanTidakDikenal, jalankan_transisi
+from .importer import FormatFileTidakDidukung, impor_siswa, DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_SIZE
+from pengelolaSiswa.pagination import SiswaPagination
+from pengelolaSiswa import gambar
+from pengelolaSiswa.media import PassthroughRenderer, TautanBertanda, serve_berkas
 from rest_framework.response import Response
 # [FIX 1] Impor dekorator dan kelas izin yang diperlukan
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.db.models import Count, Q
+from . import cache_statistik
+from .statistik import hitung as hitung_statistik, jumlah_bulan as jumlah_siswa_bulan, deret_waktu
 from django.utils import timezone
 from datetime import datetime, time
+import json
+import os
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated]) # <-- [FIX 2] TAMBAHKAN DEKORATOR INI
@@ -50,21 +66,15 @@ def statistik_siswa(request):
         start_date = timezone.make_aware(datetime(start_year, 7, 1))
         end_date = timezone.make_aware(datetime.combine(datetime(end_year, 6, 30), time.max))
 
-    # --- 3. Bangun QuerySet Dasar dengan Filter Waktu ---
-    queryset = Siswa.objects.filter(created_at__range=(start_date, end_date))
-
-    # --- 4. Lakukan Agregasi (Hitungan) dalam Satu Query ---
-    statistik = queryset.aggregate(
-        total_x=Count('pk', filter=Q(kelas='X')),
-        total_xi=Count('pk', filter=Q(kelas='XI')),
-        total_xii=Count('pk', filter=Q(kelas='XII')),
-        laki=Count('pk', filter=Q(jenis_kelamin='L')),
-        perempuan=Count('pk', filter=Q(jenis_kelamin='P')),
-        status_baru=Count('pk', filter=Q(status='BARU')),
-        status_aktif=Count('pk', filter=Q(status='AKTIF')),
-        status_lulus=Count('pk', filter=Q(status='LULUS')),
-        status_pindah=Count('pk', filter=Q(status='PINDAH')),
-        status_dropout=Count('pk', filter=Q(status='DROPOUT')),
+    # --- 3 & 4. Ambil Hitungan dari Tabel Rollup Bulanan ---
+    # Rollup diperbarui oleh signal Siswa, jadi cukup menjumlahkan bucket
+    # milik bulan-bulan di dalam rentang (maksimal 12 bulan) -- lihat siswa/statistik.py.
+    # Hasilnya di-cache per (tahun ajaran, semester) dan diinvalidasi oleh signal Siswa.
+    if semester_filter not in ('Ganjil', 'Genap'):
+        semester_filter = 'Semua'
+    statistik, status_cache = cache_statistik.ambil_statistik(
+        f"{start_year}/{end_year}", semester_filter,
+        lambda: hitung_statistik(start_date, end_date),
     )
 
     # --- 5. Hitung Metrik Lain (jika ada) ---
@@ -72,10 +82,10 @@ def statistik_siswa(request):
     today = timezone.now()
     start_of_month = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     start_of_last_month = (start_of_month - timezone.timedelta(days=1)).replace(day=1)
-    end_of_last_month = start_of_month - timezone.timedelta(microseconds=1)
-    siswa_baru_bulan_lalu = Siswa.objects.filter(
-        created_at__range=(start_of_last_month, end_of_last_month)
-    ).count()
+    bulan_lalu = timezone.localtime(start_of_last_month).date()
+    siswa_baru_bulan_lalu, _ = cache_statistik.ambil_jumlah_bulan(
+        bulan_lalu, lambda: jumlah_siswa_bulan(bulan_lalu),
+    )
 
     # --- 6. Susun Respon JSON Sesuai Kebutuhan Frontend ---
     total_siswa = statistik['total_x'] + statistik['total_xi'] + statistik['total_xii']
@@ -97,14 +107,67 @@ def statistik_siswa(request):
             "dropout": statistik['status_dropout'],
         },
         "total_baru": statistik['status_baru'],
-    })
+    }, headers={'X-Cache': status_cache})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def statistik_cache(request):
+    # Counter hit/miss cache statistik, untuk memantau efek cache di produksi
+    return Response(cache_statistik.ringkasan_counter())
+
+
+# Batas jumlah tahun ajaran dalam satu permintaan deret waktu
+MAKS_TAHUN_SERIES = 50
+
+
+def _tahun_mulai(tahun_ajaran):
+    # "2024/2025" -> 2024
+    start_year_str, end_year_str = tahun_ajaran.split('/')
+    start_year, end_year = int(start_year_str), int(end_year_str)
+    if end_year != start_year + 1:
+        raise ValueError(tahun_ajaran)
+    return start_year
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def statistik_series(request):
+    """
+    Deret waktu statistik siswa untuk banyak tahun ajaran sekaligus:
+    /api/statistik-siswa/series/?dari=2020/2021&sampai=2025/2026
+    Default: lima tahun ajaran terakhir s.d. tahun ajaran berjalan.
+    """
+    now_date = timezone.now()
+    tahun_berjalan = now_date.year if now_date.month >= 7 else now_date.year - 1
+    try:
+        sampai = _tahun_mulai(request.query_params['sampai']) if request.query_params.get('sampai') else tahun_berjalan
+        dari = _tahun_mulai(request.query_params['dari']) if request.query_params.get('dari') else sampai - 4
+    except (ValueError, IndexError):
+        return Response({"detail": "Format tahun ajaran harus seperti 2024/2025."}, status=status.HTTP_400_BAD_REQUEST)
+    if dari > sampai or sampai - dari + 1 > MAKS_TAHUN_SERIES:
+        return Response(
+            {"detail": f"Rentang tahun ajaran tidak valid (maksimal {MAKS_TAHUN_SERIES} tahun)."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    def stream():
+        yield '{"dari": "%d/%d", "sampai": "%d/%d", "series": [' % (dari, dari + 1, sampai, sampai + 1)
+        for i, tahun_ajaran in enumerate(deret_waktu(dari, sampai)):
+            yield (',' if i else '') + json.dumps(tahun_ajaran, separators=(',', ':'))
+        yield ']}'
+
+    return StreamingHttpResponse(stream(), content_type='application/json')
 
 
 class SiswaViewSet(viewsets.ModelViewSet):
     queryset = Siswa.objects.all().order_by('-created_at')
     serializer_class = SiswaSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    # Pencarian memakai index FTS5 (lihat siswa/search.py), bukan LIKE '%term%'
+    filter_backends = [DjangoFilterBackend, SiswaSearchFilter]
     filterset_fields = ['kelas', 'status']
+    # `?pagination=cursor` mengaktifkan keyset pagination (-created_at, -id)
+    pagination_class = SiswaPagination
     search_fields = ['nama_lengkap', 'nisn', 'nik']
     
     # Menentukan permission_classes berdasarkan aksi (Logika ini sudah benar)
@@ -112,11 +175,37 @@ class SiswaViewSet(viewsets.ModelViewSet):
         if self.action == 'create':
             # Siapa saja boleh mendaftar (untuk form publik)
             self.permission_classes = [AllowAny] # <-- Diperbaiki agar lebih eksplisit
+        elif self.action == 'berkas':
+            # URL berkas di respon serializer sudah bertanda (bisa dibuka langsung oleh browser)
+            self.permission_classes = [IsAuthenticated | TautanBertanda]
         else:
             # Aksi lain (list, retrieve, update, delete) butuh autentikasi
             self.permission_classes = [IsAuthenticated] # <-- Diperbaiki agar lebih eksplisit
         return super(SiswaViewSet, self).get_permissions()
 
+    def get_serializer_class(self):
+        # `?ringkas=1` memakai representasi ringkas untuk tabel daftar siswa
+        if self.action == 'list' and self.request.query_params.get('ringkas'):
+            return SiswaListSerializer
+        return SiswaSerializer
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        if needs_instances(serializer):
+            return super().list(request, *args, **kwargs)
+
+        # Jalur cepat: tidak ada URL file yang diminta, jadi baca langsung dari
+        # values() tanpa membuat instance Siswa. id dan created_at selalu ikut
+        # karena dipakai sebagai posisi keyset pagination.
+        kolom = [field.source for field in serializer.fields.values() if not field.write_only]
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            *dict.fromkeys(kolom + ['id', 'created_at'])
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_values(serializer, page))
+        return Response(serialize_values(serializer, queryset))
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if not serializer.is_valid():
@@ -124,4 +213,189 @@ class SiswaViewSet(viewsets.ModelViewSet):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
-        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    @action(
+        detail=True, methods=['get'], url_path=r'berkas/(?P<field>[a-z_]+)',
+        renderer_classes=[JSONRenderer, PassthroughRenderer],
+    )
+    def berkas(self, request, pk=None, field=None):
+        """
+        Unduh foto/dokumen siswa (hanya untuk user yang login), mis.
+        /api/siswa/<id>/berkas/dok_ijazah/. Mendukung Range, ETag/304 dan
+        X-Sendfile/X-Accel-Redirect (lihat pengelolaSiswa/media.py).
+        `?unduh=1` memaksa download, `?varian=thumb.webp` mengirim varian foto. Selain dengan header Authorization, bisa
+        dibuka lewat URL bertanda (?exp=&ttd=) yang dikembalikan SiswaSerializer.
+        """
+        if field not in FILE_FIELDS:
+            raise Http404('Berkas tidak dikenal.')
+        # Hanya kolom file yang dibaca, tanpa filter/pagination daftar
+        siswa = get_object_or_404(Siswa.objects.only('pk', 'nisn', field), pk=pk)
+        berkas = getattr(siswa, field)
+        varian = request.query_params.get('varian')
+        if varian:
+            # Thumbnail/medium foto (pengelolaSiswa/gambar.py); foto asli bila belum dibuat
+            if field != 'foto_profil':
+                raise Http404('Varian hanya tersedia untuk foto.')
+            try:
+                berkas = gambar.berkas_varian(berkas, varian)
+            except ValueError:
+                raise Http404('Varian tidak dikenal.')
+        # Dokumen disimpan dengan nama hash (siswa/storage.py); beri nama yang bisa dibaca
+        nama = f"{field}_{siswa.nisn}{os.path.splitext(berkas.name or '')[1]}"
+        return serve_berkas(request, berkas, as_attachment=bool(request.query_params.get('unduh')), nama=nama)
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def impor(self, request):
+        """
+        Impor massal siswa dari file CSV/XLSX (field `file`).
+        Parameter opsional: `chunk_size`, `batch_size`, `dry_run`.
+        """
+        berkas = request.FILES.get('file')
+        if berkas is None:
+            return Response({"file": ["File CSV/XLSX wajib diunggah."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            chunk_size = int(request.data.get('chunk_size', DEFAULT_CHUNK_SIZE))
+            batch_size = int(request.data.get('batch_size', DEFAULT_BATCH_SIZE))
+        except (TypeError, ValueError):
+            return Response({"detail": "chunk_size dan batch_size harus berupa angka."}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'ya')
+
+        try:
+            laporan = impor_siswa(
+                berkas, berkas.name,
+                chunk_size=max(chunk_size, 1), batch_size=max(batch_size, 1), dry_run=dry_run,
+            )
+        except FormatFileTidakDidukung as exc:
+            return Response({"file": [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(laporan, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Ekspor siswa ke CSV/XLSX, memakai filter yang sama dengan daftar
+        siswa (`kelas`, `status`, `search`). CSV dialirkan baris demi baris;
+        XLSX ditulis dulu ke file sementara lalu dikirim (lihat exporter.tulis_xlsx).
+        Parameter: `tipe=csv|xlsx` (default csv), `kolom=nama_lengkap,nisn,...`.
+        """
+        tipe = request.query_params.get('tipe', 'csv').lower()
+        if tipe not in ('csv', 'xlsx'):
+            return Response({"tipe": ["Pilih csv atau xlsx."]}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            kolom = exporter.pilih_kolom(request.query_params.get('kolom'))
+        except exporter.KolomTidakDikenal as exc:
+            return Response({"kolom": [f"Kolom tidak dikenal: {exc}"]}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        nama_file = f"siswa-{timezone.localtime():%Y%m%d-%H%M}.{tipe}"
+
+        if tipe == 'xlsx':
+            if exporter.openpyxl is None:
+                return Response({"tipe": ["Ekspor XLSX membutuhkan paket openpyxl."]}, status=status.HTTP_400_BAD_REQUEST)
+            return FileResponse(
+                exporter.tulis_xlsx(queryset, kolom), as_attachment=True, filename=nama_file,
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            )
+
+        response = StreamingHttpResponse(exporter.stream_csv(queryset, kolom), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{nama_file}"'
+        return response
+
+    @action(detail=False, methods=['post'])
+    def transisi(self, request):
+        """
+        Kenaikan kelas dan kelulusan massal (satu UPDATE per aturan).
+        Body: {"dry_run": true, "aturan": ["kelulusan", "naik_xi_xii", "naik_x_xi", "baru_aktif"]}
+        """
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'ya')
+        kode_aturan = request.data.get('aturan') or None
+        if isinstance(kode_aturan, str):
+            kode_aturan = [kode.strip() for kode in kode_aturan.split(',') if kode.strip()]
+        try:
+            hasil = jalankan_transisi(kode_aturan, dry_run=dry_run)
+        except AturanTidakDikenal as exc:
+            return Response({"aturan": [f"Aturan tidak dikenal: {exc}"]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(hasil)
+
+
+class SesiUnggahViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Unggah file bertahap yang bisa dilanjutkan (untuk koneksi lambat):
+
+    1. POST   /api/unggah/       {kolom, nama_file, ukuran, sha256} -> sesi baru
+    2. PATCH  /api/unggah/<id>/  body = potongan file mentah,
+                                 header Upload-Offset = offset potongan tsb.
+    3. HEAD   /api/unggah/<id>/  -> header Upload-Offset, untuk melanjutkan
+                                 setelah koneksi putus.
+    4. Setelah status SELESAI, kirim `<kolom>_upload: <id>` saat membuat Siswa.
+    """
+    queryset = SesiUnggah.objects.all()
+    serializer_class = SesiUnggahSerializer
+    # Dipakai oleh form pendaftaran publik; id sesi berupa UUID acak
+    permission_classes = [AllowAny]
+
+    def _header_offset(self, response, sesi):
+        response['Upload-Offset'] = str(sesi.offset)
+        response['Upload-Length'] = str(sesi.ukuran)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response['Location'] = f"{request.path.rstrip('/')}/{response.data['id']}/"
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        sesi = self.get_object()
+        return self._header_offset(Response(self.get_serializer(sesi).data), sesi)
+
+    def partial_update(self, request, *args, **kwargs):
+        sesi = self.get_object()
+        if sesi.status != SesiUnggah.STATUS_AKTIF:
+            return self._header_offset(Response(
+                {"detail": f"Sesi tidak menerima data lagi (status {sesi.status})."},
+                status=status.HTTP_409_CONFLICT,
+            ), sesi)
+
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            panjang = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return Response(
+                {"detail": "Header Upload-Offset dan Content-Length wajib berupa angka."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if offset != sesi.offset:
+            return self._header_offset(Response(
+                {"detail": f"Offset tidak cocok, lanjutkan dari byte {sesi.offset}."},
+                status=status.HTTP_409_CONFLICT,
+            ), sesi)
+        if panjang <= 0 or offset + panjang > sesi.ukuran:
+            return Response(
+                {"detail": f"Potongan harus berisi 1 s.d. {sesi.ukuran - offset} byte."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if panjang > unggah.MAKS_CHUNK:
+            return Response(
+                {"detail": f"Potongan maksimal {unggah.MAKS_CHUNK} byte."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+
+        # Body dibaca langsung dari stream (request.data tidak disentuh) agar
+        # potongan tidak ditampung di memori worker.
+        try:
+            sesi = unggah.tulis_chunk(sesi, request.stream, panjang)
+        except unggah.OffsetTidakCocok:
+            sesi.refresh_from_db()
+            return self._header_offset(Response(
+                {"detail": f"Offset tidak cocok, lanjutkan dari byte {sesi.offset}."},
+                status=status.HTTP_409_CONFLICT,
+            ), sesi)
+
+        if sesi.status == SesiUnggah.STATUS_GAGAL:
+            return self._header_offset(Response(
+                {"detail": "Checksum SHA-256 tidak cocok, unggah ulang file dengan sesi baru."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            ), sesi)
+        return self._header_offset(Response(self.get_serializer(sesi).data), sesi)